@@ -30,6 +30,8 @@ import sys
 from glob import glob
 from typing import Callable, Optional
 
+from dask.utils import parse_bytes
+
 from polar2grid.core.script_utils import ExtendAction
 from polar2grid.utils.dynamic_imports import get_reader_attr, get_writer_attr
 
@@ -130,7 +132,7 @@ class GlueArgumentParser:
         if self._args.filenames == ["-"]:
             # parse filenames from stdin
             self._args.filenames = [line.rstrip("\n") for line in sys.stdin]
-        if not self._args.filenames:
+        if not self._args.filenames and not getattr(self._args, "watch_dir", None):
             parser.print_usage()
             parser.exit(1, "\nERROR: No data files provided (-f flag)\n")
 
@@ -146,6 +148,16 @@ class GlueArgumentParser:
         products = self._reader_args.pop("products") or []
         filenames = self._reader_args.pop("filenames") or []
         filenames = list(get_input_files(filenames))
+        self._decompress_inputs = not self._reader_args.pop("no_decompress_inputs")
+        self._stream_args = {
+            "watch_dir": self._reader_args.pop("watch_dir", None),
+            "interval": self._reader_args.pop("watch_interval", None),
+            "timeout": self._reader_args.pop("watch_timeout", None),
+        }
+        self._rolling_args = {
+            "window": self._reader_args.pop("rolling_window", None),
+            "store_dir": self._reader_args.pop("rolling_store", None),
+        }
 
         reader_specific_args, reader_specific_load_args = self._parse_reader_args(reader_subgroups)
         # argparse will combine "extended" arguments like `products` automatically
@@ -256,6 +268,15 @@ def _add_common_arguments(parser: argparse.ArgumentParser, binary_name: str) ->
         default=os.getenv("DASK_NUM_WORKERS", 4),
         help="Specify number of worker threads to use (Default: 4)",
     )
+    parser.add_argument(
+        "--max-memory",
+        type=parse_bytes,
+        help="Target maximum memory usage for processing (ex. '8GB' or '500MiB'). "
+        "As memory usage gets close to this limit fewer worker threads are used "
+        "at the same time and intermediate results are stored in temporary "
+        "files instead of memory. The peak memory usage is logged at the end "
+        "of processing. This is not a hard limit.",
+    )
     parser.add_argument(
         "--extra-config-path",
         action="append",
@@ -475,6 +496,54 @@ def add_scene_argument_groups(parser, is_polar2grid=False):
         #      "on swath-based geolocation data and has no effect otherwise.",
         help=argparse.SUPPRESS,
     )
+    group_1.add_argument(
+        "--no-decompress-inputs",
+        action="store_true",
+        help="Don't decompress compressed input files (.bz2, .gz, .zip) in "
+        "parallel before reading them. By default decompressed copies are "
+        "written to a temporary directory that is removed when processing "
+        "is done. Set the P2G_DECOMPRESS_CACHE_SIZE environment variable "
+        "to a number of gigabytes to keep them in the Satpy cache directory "
+        "for later executions instead.",
+    )
+    if not is_polar2grid:
+        group_1.add_argument(
+            "--watch-dir",
+            help="Directory to watch for the segment files of one full disk "
+            "observation. Output grid rows are computed as soon as the input "
+            "segments covering them arrive and the output files are written "
+            "when the last segment arrives. Only supported by readers with "
+            "segmented inputs (ex. ahi_hsd, fci_l1c_nc).",
+        )
+        group_1.add_argument(
+            "--watch-interval",
+            type=float,
+            default=2.0,
+            help="Seconds between checks for new files in '--watch-dir'.",
+        )
+        group_1.add_argument(
+            "--watch-timeout",
+            type=float,
+            default=600.0,
+            help="Seconds to wait for a new segment before processing the segments received so far.",
+        )
+        group_1.add_argument(
+            "--rolling-window",
+            type=int,
+            metavar="MINUTES",
+            help="Produce the rolling accumulation of the last MINUTES "
+            "minutes of observations instead of the provided files alone. "
+            "The provided files are added to the accumulation kept in "
+            "'--rolling-store' and observations older than the window are "
+            "removed. Only supported by readers with short regularly "
+            "spaced observations (ex. glm_l2).",
+        )
+        group_1.add_argument(
+            "--rolling-store",
+            help="Directory to keep the rolling accumulation in between "
+            "executions. Defaults to a directory in the Satpy cache directory. "
+            "Use a separate directory for every window or grid being produced.",
+        )
     return (group_1,)
 
 
@@ -491,11 +560,13 @@ def _supported_writers(is_polar2grid: bool = False) -> list[str]:
             "awips_tiled",
             "binary",
             "hdf5",
+            "zarr",
         ]
     else:
         writers = [
             "geotiff",
             "awips_tiled",
+            "zarr",
         ]
     return writers
 
@@ -516,6 +587,28 @@ def add_writer_argument_groups(parser, is_polar2grid=False):
         #      "times (ex. '-w geotiff -w awips_tiled'). "
         #      "Supported writers: " + ", ".join(writers),
     )
+    group_1.add_argument(
+        "--progressive",
+        action="store_true",
+        help="Compute and write one product at a time so each product's output "
+        "files are finished as soon as possible instead of all at the end. "
+        "Products are produced in the order specified by --product-priority "
+        "or a reader-specific default order. This may increase total "
+        "processing time.",
+    )
+    group_1.add_argument(
+        "--product-priority",
+        nargs="+",
+        metavar="PRODUCT",
+        help="Product names in the order they should be produced with --progressive. "
+        "Products not listed are produced afterward.",
+    )
+    group_1.add_argument(
+        "--delivery-spool",
+        metavar="FILENAME",
+        help="With --progressive, append a JSON line describing each finished "
+        "product and its output files to this file as soon as it is written.",
+    )
     return (group_1,)
 
 
@@ -595,6 +688,26 @@ def add_resample_argument_groups(parser, is_polar2grid=None):
             # "but only if a small amount of swath data "
             # "lies on the target area.",
         )
+        group_1.add_argument(
+            "--granule-mosaic",
+            action="store_true",
+            help="Resample every granule of a multi-granule pass separately "
+            "and merge the results on the target grid instead of handling the "
+            "pass as one large swath. Memory usage then depends on the size of "
+            "one granule instead of the whole pass. Only changes processing "
+            'for --method "nearest"; "ewa" already processes each granule '
+            "separately, but geolocation for the whole pass is no longer "
+            "pre-loaded in to memory.",
+        )
+        group_1.add_argument(
+            "--accumulator-store",
+            metavar="DIR",
+            help="Directory to keep the resampling state of a pass in between "
+            "executions. Every execution adds its granules to the pass stored "
+            "for each product and grid and writes the products for the entire "
+            "pass received so far. Only used for 'ewa' and 'nearest' "
+            "resampling to grids with static extents.",
+        )
     else:
         group_1.add_argument(
             "--method",
@@ -610,6 +723,15 @@ def add_resample_argument_groups(parser, is_polar2grid=None):
             nargs="*",
             help='Area definition to resample to. Empty means no resampling (default: "MAX")',
         )
+        group_1.add_argument(
+            "--remap-tables",
+            action=argparse.BooleanOptionalAction,
+            default=None,
+            help="Use precomputed remap tables for nearest neighbor resampling between "
+            "static grids. Tables are created on first use and stored in the "
+            "'--cache-dir' directory if provided. Enabled by default for fixed grid "
+            "geostationary readers.",
+        )
 
     # shared options
     group_1.add_argument(
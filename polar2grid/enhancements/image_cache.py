@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Share enhanced images between writers saving the same products.
+
+When multiple writers are used in one execution each writer normally builds
+its own enhanced image for every product. Even when the enhancements are the
+same, the resulting dask tasks are named differently and are computed once per
+writer. While :func:`shared_enhanced_images` is active, enhanced images are
+created once for each product and enhancement configuration and then given to
+every writer that asks for them.
+
+"""
+
+from __future__ import annotations
+
+import contextlib
+import copy
+import threading
+from typing import Iterator
+
+import xarray as xr
+from satpy.enhancements.enhancer import get_enhanced_image as _satpy_get_enhanced_image
+from trollimage.xrimage import XRImage
+
+_SHARED_IMAGES: dict[tuple, XRImage] | None = None
+_SHARED_IMAGES_LOCK = threading.Lock()
+
+
+@contextlib.contextmanager
+def shared_enhanced_images() -> Iterator[None]:
+    """Share enhanced images created by :func:`get_enhanced_image` within this context."""
+    global _SHARED_IMAGES
+    with _SHARED_IMAGES_LOCK:
+        old_images = _SHARED_IMAGES
+        _SHARED_IMAGES = {}
+    try:
+        yield
+    finally:
+        with _SHARED_IMAGES_LOCK:
+            _SHARED_IMAGES = old_images
+
+
+def get_enhanced_image(
+    dataset: xr.DataArray,
+    enhance=None,
+    overlay: dict | None = None,
+    decorate: dict | None = None,
+    fill_value: int | float | None = None,
+) -> XRImage:
+    """Get an enhanced image, reusing a previously enhanced image if possible.
+
+    See :func:`satpy.enhancements.enhancer.get_enhanced_image` for information
+    on the arguments. Images with overlays or decorations are never shared as
+    they depend on the writer's fill value.
+
+    """
+    cache_key = _get_image_cache_key(dataset, enhance)
+    if _SHARED_IMAGES is None or cache_key is None or overlay is not None or decorate is not None:
+        return _satpy_get_enhanced_image(
+            dataset, enhance=enhance, overlay=overlay, decorate=decorate, fill_value=fill_value
+        )
+
+    with _SHARED_IMAGES_LOCK:
+        img = _SHARED_IMAGES.get(cache_key)
+        if img is None:
+            img = _satpy_get_enhanced_image(dataset, enhance=enhance)
+            _SHARED_IMAGES[cache_key] = img
+    # writers may modify the image object (not the data) so give them their own
+    return copy.copy(img)
+
+
+def _get_image_cache_key(dataset: xr.DataArray, enhance) -> tuple | None:
+    data_name = getattr(dataset.data, "name", None)
+    if data_name is None:
+        # numpy arrays
+        return None
+    data_key = (data_name, dataset.attrs.get("_satpy_id"), dataset.attrs.get("name"))
+    if enhance is False:
+        return data_key + (False,)
+    if enhance is None or enhance is True:
+        return data_key + ("default",)
+    config_files = getattr(enhance, "enhancement_config_file", None)
+    if config_files is None:
+        return None
+    if isinstance(config_files, (list, tuple)):
+        config_files = tuple(config_files)
+    return data_key + (type(enhance), config_files)
@@ -20,14 +20,31 @@
 # satellite observation data, remaps it, and writes it to a file format for
 # input into another program.
 # Documentation: http://www.ssec.wisc.edu/software/polar2grid/
-"""Enhancement functions shared between multiple sensors."""
+"""Enhancement functions shared between multiple sensors.
+
+The :func:`colorize` and :func:`palettize` functions in this module parse
+each unique set of palettes only once per process and reuse the resulting
+:class:`~trollimage.colormap.Colormap` for every product and scene that
+references it. Colors are otherwise identical to Satpy's
+:func:`~satpy.enhancements.colormap.colorize` and
+:func:`~satpy.enhancements.colormap.palettize`.
+
+"""
+
+from __future__ import annotations
+
+import os
+import threading
 
 import numpy as np
-from satpy.enhancements.colormap import colorize as _colorize
-from satpy.enhancements.colormap import palettize as _palettize
+from satpy.enhancements.colormap import create_colormap
+from trollimage.colormap import Colormap
 
 from polar2grid.utils.config import get_polar2grid_home
 
+_COLORMAP_CACHE: dict = {}
+_COLORMAP_CACHE_LOCK = threading.Lock()
+
 
 def temperature_difference(img, min_stretch, max_stretch, **kwargs):
     """Scale data linearly with a buffer on the edges for over limit data.
@@ -81,11 +98,72 @@ def _parse_palettes_for_p2g_cmap(palettes: list):
 #     return colors
 
 
+def _hashable_palette_value(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable_palette_value(val)) for key, val in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable_palette_value(val) for val in value)
+    if isinstance(value, np.ndarray):
+        return value.dtype.str, value.shape, value.tobytes()
+    hash(value)
+    return value
+
+
+def _get_palettes_cache_key(palettes: list) -> tuple | None:
+    """Get a hashable key for a list of palette definitions or None if they can't be cached.
+
+    Palettes loaded from a file include the modification time of the file so
+    edited colormaps are reloaded. Palettes that depend on the data being
+    enhanced (``dataset``) are never cached.
+
+    """
+    key = []
+    for palette in palettes:
+        if not isinstance(palette, dict) or "dataset" in palette:
+            return None
+        filename = palette.get("filename")
+        mtime = os.path.getmtime(filename) if filename and os.path.isfile(filename) else None
+        try:
+            key.append((_hashable_palette_value(palette), mtime))
+        except TypeError:
+            # colors provided as a Colormap or other unhashable object
+            return None
+    return tuple(key)
+
+
+def _merge_colormaps(palettes: list, img) -> Colormap:
+    full_cmap = None
+    for palette in palettes:
+        cmap = create_colormap(palette, img)
+        full_cmap = cmap if full_cmap is None else full_cmap + cmap
+    return full_cmap
+
+
+def _get_cached_colormap(palettes: list, img) -> Colormap:
+    cache_key = _get_palettes_cache_key(palettes)
+    if cache_key is None:
+        return _merge_colormaps(palettes, img)
+    with _COLORMAP_CACHE_LOCK:
+        cmap = _COLORMAP_CACHE.get(cache_key)
+    if cmap is None:
+        cmap = _merge_colormaps(palettes, img)
+        with _COLORMAP_CACHE_LOCK:
+            _COLORMAP_CACHE[cache_key] = cmap
+    # trollimage modifies colormaps in-place (ex. dtype adjustments)
+    return Colormap(values=cmap.values.copy(), colors=cmap.colors.copy())
+
+
+def clear_colormap_cache() -> None:
+    """Remove all parsed colormaps from the in-memory cache."""
+    with _COLORMAP_CACHE_LOCK:
+        _COLORMAP_CACHE.clear()
+
+
 def colorize(img, **kwargs):
-    kwargs["palettes"] = list(_parse_palettes_for_p2g_cmap(kwargs["palettes"]))
-    return _colorize(img, **kwargs)
+    palettes = list(_parse_palettes_for_p2g_cmap(kwargs["palettes"]))
+    img.colorize(_get_cached_colormap(palettes, img))
 
 
 def palettize(img, **kwargs):
-    kwargs["palettes"] = list(_parse_palettes_for_p2g_cmap(kwargs["palettes"]))
-    return _palettize(img, **kwargs)
+    palettes = list(_parse_palettes_for_p2g_cmap(kwargs["palettes"]))
+    img.palettize(_get_cached_colormap(palettes, img))
@@ -22,4 +22,5 @@
 # Documentation: http://www.ssec.wisc.edu/software/polar2grid/
 """Filter components for removing entire datasets from a Scene."""
 
-from ._filter_scene import filter_scene  # noqa
+from ._filter_scene import filter_scene, filter_scene_wishlist  # noqa
+from ._utils import remove_from_wishlist  # noqa
@@ -23,10 +23,13 @@
 """Base class for all filters."""
 
 import logging
+from typing import Iterable, Optional
 
 from satpy import Scene
 from xarray import DataArray
 
+from ._utils import area_rows, iter_wishlist_data_arrays, prefetch_swath_polygons
+
 logger = logging.getLogger(__name__)
 
 
@@ -83,6 +86,7 @@ class BaseFilter:
     def filter_scene(self, scene: Scene):
         """Create a new Scene with filtered DataArrays removed."""
         _cache = {}
+        prefetch_swath_polygons(data_arr.attrs.get("area") for data_arr in scene)
         remaining_ids = []
         filtered_ids = []
         for data_id in self._iter_scene_coarsest_to_finest_area(scene):
@@ -98,6 +102,30 @@ class BaseFilter:
         new_scn._wishlist = scene.wishlist.copy() - set(filtered_ids)
         return new_scn
 
+    def filtered_wishlist(self, scene: Scene, data_ids: Optional[Iterable] = None) -> set:
+        """Get the requested products of a loaded Scene that would be removed by this filter.
+
+        Products that haven't been generated yet (composites) are checked
+        using the metadata of their compositor and the geolocation of the
+        loaded datasets they depend on. This way they can be removed from the
+        wishlist before :meth:`Scene.generate_possible_composites` builds
+        them. If ``data_ids`` is provided only those products are checked.
+
+        """
+        _cache = {}
+        wishlist_arrays = dict(iter_wishlist_data_arrays(scene))
+        if data_ids is not None:
+            data_ids = set(data_ids)
+            wishlist_arrays = {data_id: arr for data_id, arr in wishlist_arrays.items() if data_id in data_ids}
+        prefetch_swath_polygons(data_arr.attrs.get("area") for data_arr in wishlist_arrays.values())
+        filtered_ids = set()
+        for data_id, data_arr in sorted(wishlist_arrays.items(), key=lambda item: area_rows(item[1])):
+            logger.debug("Analyzing '{}' for filtering before generation...".format(data_id))
+            if self._filter_data_array(data_arr, _cache):
+                logger.debug(self.FILTER_MSG.format(data_id))
+                filtered_ids.add(data_id)
+        return filtered_ids
+
     @staticmethod
     def _iter_scene_coarsest_to_finest_area(scene: Scene):
         by_area_list = list(scene.iter_by_area())
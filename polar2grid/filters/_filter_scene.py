@@ -105,3 +105,32 @@ def filter_scene(
             night_fraction=night_fraction,
         )
     return input_scene
+
+
+def filter_scene_wishlist(
+    input_scene: Scene,
+    reader_names: List[str],
+    sza_threshold: float = 100.0,
+    day_fraction: Optional[float] = None,
+    night_fraction: Optional[float] = None,
+) -> set:
+    """Get the requested products of a loaded Scene that :func:`filter_scene` would remove.
+
+    Unlike :func:`filter_scene` this only needs the geolocation of the loaded
+    datasets and can be run before composites are generated.
+
+    """
+    filtered_ids = set()
+    if day_fraction is not False:
+        criteria = get_reader_filter_criteria(reader_names, "day_only")
+        day_filter = DayCoverageFilter(
+            criteria, sza_threshold=sza_threshold, day_fraction=0.1 if day_fraction is None else day_fraction
+        )
+        filtered_ids |= day_filter.filtered_wishlist(input_scene)
+    if night_fraction is not False:
+        criteria = get_reader_filter_criteria(reader_names, "night_only")
+        night_filter = NightCoverageFilter(
+            criteria, sza_threshold=sza_threshold, night_fraction=0.1 if night_fraction is None else night_fraction
+        )
+        filtered_ids |= night_filter.filtered_wishlist(input_scene)
+    return filtered_ids
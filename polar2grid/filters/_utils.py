@@ -23,26 +23,26 @@
 """Utilities related to filtering."""
 
 import logging
+from typing import Iterable, Iterator, Optional, Union
 
 import dask.array as da
 import numpy as np
 
-try:
-    # Python 3.9+
-    from functools import cache
-except ImportError:
-    from functools import lru_cache as cache
-
-from typing import Union
-
 from pyresample.boundary import AreaBoundary, AreaDefBoundary, Boundary
 from pyresample.geometry import AreaDefinition, SwathDefinition, get_geostationary_bounding_box_in_lonlats
-from pyresample.spherical import SphPolygon
+from pyresample.spherical import Arc, SCoordinate, SphPolygon
+from satpy import Scene
+from xarray import DataArray
 
 logger = logging.getLogger(__name__)
 
+# maximum number of geolocation rows and columns used to estimate a swath footprint
+FOOTPRINT_MAX_SAMPLES = 200
+
 PRGeometry = Union[SwathDefinition, AreaDefinition]
 
+_POLYGON_CACHE: dict = {}
+
 
 def boundary_for_area(area_def: PRGeometry) -> Boundary:
     """Create Boundary object representing the provided area."""
@@ -52,45 +52,234 @@ def boundary_for_area(area_def: PRGeometry) -> Boundary:
         freq_fraction = 0.30 if isinstance(area_def, AreaDefinition) else 0.05
         try:
             adp = area_def.boundary(force_clockwise=True)
-            adp.decimate(int(freq_fraction * area_def.shape[0]))
-            if adp.contour_poly.area() < 0:
-                # https://github.com/ssec/polar2grid/issues/696
-                raise ValueError("Failed to generate valid polygon for area. Polygon has a negative area.")
-        except ValueError:
+            _decimate_and_validate_boundary(adp, int(freq_fraction * area_def.shape[0]))
+        except (ValueError, IndexError):
             if not isinstance(area_def, SwathDefinition):
                 logger.error("Unable to generate bounding geolocation polygon")
                 raise
             logger.warning(
-                "Geolocation data contains invalid bounding values. Computing entire array to get bounds instead."
+                "Geolocation data contains invalid bounding values. Estimating footprint from decimated geolocation."
             )
-            adp = _compute_boundary_from_whole_swath(area_def)
+            adp = _compute_boundary_from_decimated_swath(area_def)
     return adp
 
 
-def _compute_boundary_from_whole_swath(swath_def: SwathDefinition):
+def _decimate_and_validate_boundary(adp: AreaBoundary, ratio: int) -> None:
+    adp.decimate(ratio)
+    if adp.contour_poly.area() < 0:
+        # https://github.com/ssec/polar2grid/issues/696
+        raise ValueError("Failed to generate valid polygon for area. Polygon has a negative area.")
+
+
+def _decimated_indexes(size: int) -> np.ndarray:
+    step = max(1, -(-size // FOOTPRINT_MAX_SAMPLES))
+    return np.unique(np.append(np.arange(0, size, step), size - 1))
+
+
+def _get_decimated_lonlats(swath_def: SwathDefinition) -> tuple:
+    lons, lats = swath_def.get_lonlats()
+    row_idx = _decimated_indexes(lons.shape[0])
+    col_idx = _decimated_indexes(lons.shape[1])
+    return lons[row_idx][:, col_idx], lats[row_idx][:, col_idx]
+
+
+def _compute_boundary_from_decimated_swath(swath_def: SwathDefinition) -> AreaBoundary:
+    """Estimate the footprint of a swath from a strided subset of its geolocation.
+
+    At most ``FOOTPRINT_MAX_SAMPLES`` rows and columns (always including the
+    first and last of each) are computed. See
+    :func:`_boundary_from_decimated_lonlats` for how the outline is traced.
+
+    """
+    lons, lats = da.compute(*_get_decimated_lonlats(swath_def))
+    return _boundary_from_decimated_lonlats(lons, lats)
+
+
+def _boundary_from_decimated_lonlats(lons, lats) -> AreaBoundary:
+    """Trace the outline of the valid (non-NaN) pixels of computed geolocation arrays.
+
+    The first and last valid row form the top and bottom sides and the first
+    and last valid column of every row in between form the left and right
+    sides. Invalid edge rows or columns (ex. AVHRR or AMSR2 fill values) are
+    skipped instead of ending up in the polygon.
+
+    """
+    lons = np.asarray(lons, dtype=np.float64)
+    lats = np.asarray(lats, dtype=np.float64)
+    valid = np.isfinite(lons) & np.isfinite(lats)
+    valid_rows = np.flatnonzero(valid.any(axis=1))
+    if valid_rows.size < 2:
+        raise ValueError("Not enough valid geolocation to estimate the swath footprint.")
+    first_cols = valid.argmax(axis=1)[valid_rows]
+    last_cols = valid.shape[1] - 1 - valid[:, ::-1].argmax(axis=1)[valid_rows]
+    top_cols = np.flatnonzero(valid[valid_rows[0]])
+    bot_cols = np.flatnonzero(valid[valid_rows[-1]])[::-1]
+    side_indexes = (
+        (np.full(top_cols.size, valid_rows[0]), top_cols),  # top
+        (valid_rows, last_cols),  # right
+        (np.full(bot_cols.size, valid_rows[-1]), bot_cols),  # bot
+        (valid_rows[::-1], first_cols[::-1]),  # left
+    )
+    boundary = _clockwise_boundary([(lons[rows, cols], lats[rows, cols]) for rows, cols in side_indexes])
+    boundary.decimate(max(1, valid_rows.size // 20))
+    return boundary
+
+
+def _clockwise_boundary(sides: list) -> AreaBoundary:
+    """Create a boundary from the four sides of a swath, reversing them if they aren't clockwise."""
+    if AreaBoundary(*sides).contour_poly.area() < 0:
+        # swath is oriented the other way (ex. descending), walk the edges in the other direction
+        sides = _reverse_sides(sides)
+    # the boundary's polygon is cached once used, a new boundary can still be decimated
+    return AreaBoundary(*sides)
+
+
+def _get_swath_edges(swath_def: SwathDefinition) -> tuple:
+    """Get the top, right, bottom, and left edges of a swath's geolocation in clockwise order."""
     lons, lats = swath_def.get_lonlats()
-    min_lon = np.nanmin(lons)
-    max_lon = np.nanmax(lons)
-    min_lat = np.nanmin(lats)
-    max_lat = np.nanmax(lats)
-    min_lon, max_lon, min_lat, max_lat = da.compute(min_lon, max_lon, min_lat, max_lat)
-    x_passes_antimeridian = (max_lon - min_lon) > 355
-    epsilon = 0.1
-    y_is_pole = (max_lat >= 90 - epsilon) or (min_lat <= -90 + epsilon)
-    if x_passes_antimeridian and not y_is_pole:
-        wrapped_lons = lons % 360
-        min_lon, max_lon = da.compute(np.nanmin(wrapped_lons), np.nanmax(wrapped_lons))
-        max_lon -= 360
-    sides = (
-        ([min_lon, max_lon], [max_lat, max_lat]),  # top
-        ([max_lon, max_lon], [max_lat, min_lat]),  # right
-        ([max_lon, min_lon], [min_lat, min_lat]),  # bot
-        ([min_lon, max_lon], [min_lat, max_lat]),  # left
+    edge_slices = (
+        (0, slice(None)),
+        (slice(None), -1),
+        (-1, slice(None, None, -1)),
+        (slice(None, None, -1), 0),
     )
+    return tuple((lons[edge_slice], lats[edge_slice]) for edge_slice in edge_slices)
+
+
+def _boundary_from_swath_edges(edges: tuple) -> AreaBoundary:
+    """Create a clockwise boundary from computed swath edges like :meth:`SwathDefinition.boundary`."""
+    sides = []
+    for side_lons, side_lats in edges:
+        side_lons = np.asarray(side_lons)
+        side_lats = np.asarray(side_lats)
+        is_valid = ~(np.isnan(side_lons) | np.isnan(side_lats))
+        if np.count_nonzero(is_valid) < 2:
+            raise ValueError("Can't compute boundary coordinates. At least one side is (almost) completely invalid.")
+        sides.append((side_lons[is_valid], side_lats[is_valid]))
+    (top_lons, top_lats), (right_lons, right_lats) = sides[:2]
+    if not _corner_is_clockwise(
+        (top_lons[-2], top_lats[-2]), (top_lons[-1], top_lats[-1]), (right_lons[1], right_lats[1])
+    ):
+        sides = _reverse_sides(sides)
     return AreaBoundary(*sides)
 
 
-@cache
+def _corner_is_clockwise(point1: tuple, corner: tuple, point2: tuple) -> bool:
+    """Check if the path from ``point1`` to ``point2`` turns clockwise at ``corner``."""
+    point1, corner, point2 = (SCoordinate(np.deg2rad(lon), np.deg2rad(lat)) for lon, lat in (point1, corner, point2))
+    angle = Arc(point1, corner).angle(Arc(corner, point2))
+    return -np.pi < angle < 0
+
+
+def _reverse_sides(sides: list) -> list:
+    return [(side_lons[::-1], side_lats[::-1]) for side_lons, side_lats in sides[::-1]]
+
+
+def _is_uncached_swath(area_def) -> bool:
+    return isinstance(area_def, SwathDefinition) and area_def.ndim == 2 and area_def not in _POLYGON_CACHE
+
+
+def prefetch_swath_polygons(area_defs: Iterable[PRGeometry]) -> None:
+    """Compute the polygons of all provided swaths at once and store them in the polygon cache.
+
+    Computing each swath's boundary on its own triggers a separate small dask
+    computation of its edge pixels which, for geolocation that isn't persisted
+    in memory, means reading the geolocation files again for every swath
+    (ex. VIIRS I, M, and DNB resolutions). This computes the edges of every
+    swath that isn't cached yet in a single :func:`dask.compute` call. Swaths
+    with invalid edges get their decimated geolocation computed in one
+    additional call. The resulting polygons are then reused by
+    :func:`polygon_for_area`.
+
+    """
+    swath_defs = list({area_def: None for area_def in area_defs if _is_uncached_swath(area_def)})
+    if not swath_defs:
+        return
+    logger.debug("Computing boundaries for %d swath(s)...", len(swath_defs))
+    all_edges = da.compute(*(_get_swath_edges(swath_def) for swath_def in swath_defs))
+    invalid_swaths = []
+    for swath_def, edges in zip(swath_defs, all_edges, strict=True):
+        try:
+            adp = _boundary_from_swath_edges(edges)
+            _decimate_and_validate_boundary(adp, int(0.05 * swath_def.shape[0]))
+        except (ValueError, IndexError):
+            invalid_swaths.append(swath_def)
+            continue
+        _POLYGON_CACHE[swath_def] = adp.contour_poly
+    if not invalid_swaths:
+        return
+    logger.warning(
+        "Geolocation data contains invalid bounding values. Estimating footprint from decimated geolocation."
+    )
+    all_lonlats = da.compute(*(_get_decimated_lonlats(swath_def) for swath_def in invalid_swaths))
+    for swath_def, (lons, lats) in zip(invalid_swaths, all_lonlats, strict=True):
+        _POLYGON_CACHE[swath_def] = _boundary_from_decimated_lonlats(lons, lats).contour_poly
+
+
 def polygon_for_area(area_def: PRGeometry) -> SphPolygon:
-    boundary = boundary_for_area(area_def)
-    return boundary.contour_poly
+    """Get the spherical polygon for an area, computing and caching it if needed."""
+    polygon = _POLYGON_CACHE.get(area_def)
+    if polygon is None:
+        polygon = boundary_for_area(area_def).contour_poly
+        _POLYGON_CACHE[area_def] = polygon
+    return polygon
+
+
+def clear_polygon_cache() -> None:
+    """Remove all cached area polygons."""
+    _POLYGON_CACHE.clear()
+
+
+def area_rows(data_arr: DataArray) -> int:
+    """Get the number of rows of the area of a DataArray or 0 if it has no area."""
+    area = data_arr.attrs.get("area")
+    return 0 if area is None else area.shape[0]
+
+
+def iter_wishlist_data_arrays(scene: Scene) -> Iterator[tuple]:
+    """Iterate over the requested products of a loaded Scene before composites are generated.
+
+    Products that haven't been generated yet are represented by a DataArray
+    without data that has the metadata of their compositor and the
+    geolocation and times of the coarsest loaded dataset they depend on.
+
+    """
+    for data_id in scene.wishlist:
+        if data_id in scene:
+            yield data_id, scene[data_id]
+            continue
+        data_arr = _get_ungenerated_metadata(scene, data_id)
+        if data_arr is not None:
+            yield data_id, data_arr
+
+
+def remove_from_wishlist(scene: Scene, data_ids: Iterable) -> None:
+    """Remove products from the Scene's wishlist so they are not generated or kept after generation."""
+    # Satpy has no public interface for this, keep Scene internals in this module
+    scene._wishlist -= set(data_ids)
+
+
+def _get_dependency_node(scene: Scene, data_id) -> tuple:
+    """Get the dependency tree node of a requested product and the names of the loaded datasets it depends on."""
+    dependency_tree = scene._dependency_tree
+    try:
+        node = dependency_tree[data_id]
+    except KeyError:
+        return None, []
+    return node, [leaf.name for leaf in dependency_tree.leaves(limit_nodes_to=[data_id])]
+
+
+def _get_ungenerated_metadata(scene: Scene, data_id) -> Optional[DataArray]:
+    """Get a data-less DataArray with the expected metadata of a product that hasn't been generated yet."""
+    node, leaf_ids = _get_dependency_node(scene, data_id)
+    if node is None:
+        return None
+    leaf_arrays = [
+        scene[leaf_id] for leaf_id in leaf_ids if leaf_id in scene and scene[leaf_id].attrs.get("area") is not None
+    ]
+    if not leaf_arrays:
+        return None
+    coarsest_arr = min(leaf_arrays, key=area_rows)
+    compositor_attrs = getattr(getattr(node, "compositor", None), "attrs", {})
+    attrs = {**coarsest_arr.attrs, **compositor_attrs, **data_id.to_dict()}
+    return DataArray(np.empty((0,)), attrs=attrs)
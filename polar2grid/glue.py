@@ -31,7 +31,7 @@ import shutil
 import sys
 import tempfile
 from collections.abc import Iterable
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, Union
 
 from satpy.node import MissingDependencies
@@ -46,20 +46,28 @@ except ImportError:
 # isort: on
 
 import dask
+import dask.array as da
+import numpy as np
 import satpy
 from dask.diagnostics import ProgressBar
-from pyresample import SwathDefinition
+from pyresample import AreaDefinition, SwathDefinition
 from satpy import DataID, Scene
 from satpy.writers.core.compute import compute_writer_results
 
 from polar2grid._glue_argparser import GlueArgumentParser, get_p2g_defaults_env_var
 from polar2grid.core.script_utils import create_exc_handler, rename_log_file, setup_logging
-from polar2grid.filters import filter_scene
+from polar2grid.enhancements.image_cache import shared_enhanced_images
+from polar2grid.filters import filter_scene, filter_scene_wishlist, remove_from_wishlist
 from polar2grid.readers._base import ReaderProxyBase
-from polar2grid.resample import resample_scene
+from polar2grid.resample import resample_scene, wishlist_without_grid_coverage
 from polar2grid.utils.config import add_polar2grid_config_paths
-from polar2grid.utils.dynamic_imports import get_reader_attr
+from polar2grid.utils.decompress import stage_input_files
+from polar2grid.utils.delivery import ProgressiveDelivery
+from polar2grid.utils.dynamic_imports import get_reader_attr, get_writer_attr
+from polar2grid.utils.memory import MemoryGovernor
+from polar2grid.utils.rolling import RollingAccumulator
 from polar2grid.utils.legacy_compat import get_sensor_alias
+from polar2grid.utils.segment_stream import SegmentAccumulator, SegmentStream
 
 LOG = logging.getLogger(__name__)
 
@@ -126,6 +134,7 @@ def _write_scene(
     writers: list[str],
     writer_args: dict[str, dict],
     data_ids: list[DataID],
+    delivery: Optional[ProgressiveDelivery] = None,
 ):
     to_save = []
     if not data_ids:
@@ -133,13 +142,35 @@ def _write_scene(
         return to_save
 
     _assign_default_native_area_id(scn, data_ids)
-    for writer_name in writers:
-        wargs = writer_args.get(writer_name, {})
-        res = _write_scene_with_writer(scn, writer_name, data_ids, wargs)
-        to_save.append(res)
+    # writers that enhance the same products use the same enhanced images
+    with shared_enhanced_images():
+        for writer_name in writers:
+            wargs = writer_args.get(writer_name, {})
+            if delivery is not None:
+                _add_scene_to_delivery(delivery, scn, writer_name, data_ids, wargs)
+                continue
+            res = _write_scene_with_writer(scn, writer_name, data_ids, wargs)
+            to_save.append(res)
     return to_save
 
 
+def _add_scene_to_delivery(
+    delivery: ProgressiveDelivery,
+    scn: Scene,
+    writer_name: str,
+    data_ids: list[DataID],
+    wargs: dict,
+) -> None:
+    if get_writer_attr(writer_name, "MULTI_PRODUCT_FILES", False):
+        product_groups = [data_ids]
+    else:
+        product_groups = [[data_id] for data_id in data_ids]
+    for product_data_ids in product_groups:
+        res = _write_scene_with_writer(scn, writer_name, product_data_ids, wargs)
+        product_names = [scn[data_id].attrs.get("p2g_name", data_id["name"]) for data_id in product_data_ids]
+        delivery.add(product_names, res)
+
+
 def _assign_default_native_area_id(scn: Scene, data_ids: list[DataID]) -> None:
     for data_id in data_ids:
         area_def = scn[data_id].attrs.get("area")
@@ -160,7 +191,9 @@ def _write_scene_with_writer(scn: Scene, writer_name: str, data_ids: list[DataID
 
 
 def _print_list_products(reader_info, is_polar2grid: bool, p2g_only: bool):
-    available_p2g_names, available_custom_names, available_satpy_names = reader_info.get_available_products()
+    available_p2g_names, available_custom_names, available_satpy_names = reader_info.get_available_products(
+        p2g_only=p2g_only
+    )
     available_satpy_names = ["*" + _sname for _sname in available_satpy_names]
     available_custom_names = ["*" + _sname for _sname in available_custom_names]
     project_name = "Polar2Grid" if is_polar2grid else "Geo2Grid"
@@ -217,6 +250,10 @@ def _resample_scene_to_grids(
     antimeridian_mode = resample_args.pop("antimeridian_mode")
     if "ewa_persist" in resample_args:
         resample_args["persist"] = resample_args.pop("ewa_persist")
+    if resample_args.get("remap_tables") is None:
+        resample_args["remap_tables"] = any(
+            get_reader_attr(reader_name, "STATIC_REMAP_TABLES", False) for reader_name in reader_names
+        )
     scenes_to_save = resample_scene(
         scn,
         areas_to_resample,
@@ -228,7 +265,12 @@ def _resample_scene_to_grids(
     return scenes_to_save
 
 
-def _save_scenes(scenes_to_save: list[tuple], reader_info, writer_args) -> list:
+def _save_scenes(
+    scenes_to_save: list[tuple],
+    reader_info,
+    writer_args,
+    delivery: Optional[ProgressiveDelivery] = None,
+) -> list:
     all_to_save = []
     for scene_to_save, products_to_save in scenes_to_save:
         _overwrite_platform_name_with_aliases(scene_to_save)
@@ -239,6 +281,7 @@ def _save_scenes(scenes_to_save: list[tuple], reader_info, writer_args) -> list:
             writer_args["writers"],
             writer_args,
             products_to_save,
+            delivery=delivery,
         )
         all_to_save.extend(this_scene_to_save)
     return all_to_save
@@ -304,6 +347,8 @@ class _GlueProcessor:
         self.tmp_config_paths = []
         self._handle_extra_config_paths(self.arg_parser._args)
         self._clean = False
+        self._memory_governor: Optional[MemoryGovernor] = None
+        self._decompress_dir: Optional[str] = None
 
     def _handle_extra_config_paths(self, args):
         if not args.extra_config_path:
@@ -328,6 +373,9 @@ class _GlueProcessor:
         for tmp_config_path in self.tmp_config_paths:
             LOG.debug(f"Deleting temporary config directory: {tmp_config_path}")
             shutil.rmtree(tmp_config_path, ignore_errors=True)
+        if self._decompress_dir is not None:
+            LOG.debug(f"Deleting temporary decompressed input directory: {self._decompress_dir}")
+            shutil.rmtree(self._decompress_dir, ignore_errors=True)
 
     def __call__(self):
         # Set up dask and the number of workers
@@ -343,12 +391,21 @@ class _GlueProcessor:
             "polar2grid" if self.is_polar2grid else "geo2grid",
             self.glue_name,
         )
-        with workers_cm, profile_cm, chunk_cm:
+        memory_cm = contextlib.nullcontext()
+        if common_args.max_memory:
+            self._memory_governor = MemoryGovernor(common_args.max_memory, num_workers=common_args.num_workers)
+            memory_cm = self._memory_governor
+        with workers_cm, profile_cm, chunk_cm, memory_cm:
+            if self.arg_parser._stream_args["watch_dir"]:
+                return self._run_streaming()
             return self._run_processing()
 
     def _run_processing(self):
-        LOG.info("Sorting and reading input files...")
         arg_parser = self.arg_parser
+        list_products = arg_parser._args.list_products or arg_parser._args.list_products_all
+        if not list_products:
+            self._stage_input_files()
+        LOG.info("Sorting and reading input files...")
         scn = _create_scene(arg_parser._scene_creation)
         if scn is None:
             return -1
@@ -359,59 +416,240 @@ class _GlueProcessor:
 
         # Load the actual data arrays and metadata (lazy loaded as dask arrays)
         LOG.info("Loading product metadata from files...")
-        load_args = arg_parser._load_args.copy()
-        user_products = load_args.pop("products")
+        user_products = arg_parser._load_args["products"]
         reader_info = ReaderProxyBase.from_reader_name(arg_parser._scene_creation["reader"], scn, user_products)
-        if arg_parser._args.list_products or arg_parser._args.list_products_all:
+        if list_products:
             _print_list_products(reader_info, self.is_polar2grid, not arg_parser._args.list_products_all)
             return 0
 
-        products = reader_info.get_satpy_products_to_load()
-        persist_geolocation = not arg_parser._reader_args.pop("no_persist_geolocation", False)
-        if not products:
-            return -1
-        try:
-            scn.load(products, **load_args, generate=False)
-        except KeyError as dep_key_error:
-            _handle_missing_deps_keyerror(dep_key_error)
+        scenes_to_save = self._load_and_resample(scn, reader_info)
+        if scenes_to_save is None:
             return -1
+        delivery = _create_progressive_delivery(arg_parser._writer_args, arg_parser._scene_creation["reader"])
+        to_save = _save_scenes(scenes_to_save, reader_info, arg_parser._writer_args, delivery=delivery)
+
+        self._compute_results(to_save, delivery)
+        LOG.info("SUCCESS")
+        return 0
+
+    def _load_and_resample(self, scn: Scene, reader_info: ReaderProxyBase) -> Optional[list[tuple[Scene, set]]]:
+        """Load, filter, generate, and resample the requested products.
+
+        Returns:
+            Resampled scenes and the products to save from each or None if
+            the products couldn't be loaded.
+
+        """
+        arg_parser = self.arg_parser
+        load_args = arg_parser._load_args.copy()
+        load_args.pop("products")
+        resample_args = arg_parser._resample_args.copy()
+        persist_geolocation = not arg_parser._reader_args.get("no_persist_geolocation", False)
+        # granules are resampled separately, don't hold the whole pass in memory
+        persist_geolocation &= not resample_args.get("granule_mosaic", False)
+        if not _load_products(scn, reader_info, load_args):
+            return None
         if persist_geolocation:
-            scn = _persist_swath_definition_in_scene(scn)
+            scn = _persist_swath_definition_in_scene(scn, self._memory_governor)
+        filter_kwargs = _get_filter_kwargs(arg_parser._reader_args)
+        _remove_filtered_products_before_generation(scn, arg_parser._reader_names, resample_args, filter_kwargs)
         scn.generate_possible_composites(True)
+        scn = _aggregate_rolling_window(scn, arg_parser._scene_creation["reader"], arg_parser._rolling_args)
+        if scn is None:
+            return None
 
-        reader_args = arg_parser._reader_args
-        filter_kwargs = {
-            "sza_threshold": reader_args["sza_threshold"],
-            "day_fraction": reader_args["filter_day_products"],
-            "night_fraction": reader_args["filter_night_products"],
-        }
-        scenes_to_save = _resample_scene_to_grids(
+        _disable_resample_persist_if_needed(resample_args, self._memory_governor)
+        return _resample_scene_to_grids(
             scn,
             arg_parser._reader_names,
-            arg_parser._resample_args,
+            resample_args,
             filter_kwargs,
             arg_parser._args.preserve_resolution,
             self.is_polar2grid,
         )
-        to_save = _save_scenes(scenes_to_save, reader_info, arg_parser._writer_args)
 
-        if arg_parser._args.progress:
+    def _compute_results(self, to_save: list, delivery) -> None:
+        if self.arg_parser._args.progress:
             pbar = ProgressBar()
             pbar.register()
 
         LOG.info("Computing products and saving data to writers...")
-        if not to_save:
+        if not to_save and not delivery:
             LOG.warning(
                 "No product files produced given available valid data and "
                 "resampling settings. This can happen if the writer "
                 "detects that no valid output will be written or the "
                 "input data does not overlap with the target grid."
             )
-        compute_writer_results(to_save)
+        if delivery is not None:
+            delivery.compute()
+        else:
+            compute_writer_results(to_save)
+
+    def _stage_input_files(self, filenames: Optional[list] = None) -> None:
+        """Replace compressed input files with decompressed copies before they are read."""
+        arg_parser = self.arg_parser
+        scene_creation = arg_parser._scene_creation
+        if filenames is not None:
+            scene_creation["filenames"] = filenames
+        if not arg_parser._decompress_inputs:
+            return
+        if self._decompress_dir is None:
+            self._decompress_dir = tempfile.mkdtemp(prefix="p2g_decompressed_")
+        scene_creation["filenames"] = stage_input_files(
+            scene_creation["filenames"],
+            scene_creation["reader"],
+            self._decompress_dir,
+            num_workers=arg_parser._args.num_workers,
+        )
+
+    def _run_streaming(self):
+        arg_parser = self.arg_parser
+        reader_name = arg_parser._scene_creation["reader"]
+        try:
+            stream = SegmentStream.from_reader(reader_name, **arg_parser._stream_args)
+        except ValueError as err:
+            LOG.error(str(err))
+            return -1
+        LOG.info("Watching %r for input segments...", arg_parser._stream_args["watch_dir"])
+        user_products = arg_parser._load_args["products"]
+        with SegmentAccumulator() as accumulator:
+            try:
+                for stream_update in stream:
+                    self._stage_input_files(stream_update.filenames)
+                    scn = _create_scene(arg_parser._scene_creation)
+                    if scn is None:
+                        return -1
+                    if self.rename_log:
+                        rename_log_file(self.glue_name + scn.start_time.strftime("_%Y%m%d_%H%M%S.log"))
+                        self.rename_log = False
+                    reader_info = ReaderProxyBase.from_reader_name(reader_name, scn, user_products)
+                    scenes_to_save = self._load_and_resample(scn, reader_info)
+                    if scenes_to_save is None:
+                        return -1
+                    accumulator.update(scenes_to_save, scn.finest_area(), stream_update.row_range)
+            except TimeoutError as err:
+                LOG.error(str(err))
+                return -1
+
+            LOG.info("Last segment processed, saving data to writers...")
+            to_save = _save_scenes(accumulator.finalize(), reader_info, arg_parser._writer_args)
+            if not to_save:
+                LOG.warning("No product files produced given available valid data and resampling settings.")
+            compute_writer_results(to_save)
         LOG.info("SUCCESS")
         return 0
 
 
+def _load_products(scn: Scene, reader_info: ReaderProxyBase, load_args: dict) -> bool:
+    products = reader_info.get_satpy_products_to_load()
+    if not products:
+        return False
+    try:
+        scn.load(products, **load_args, generate=False)
+    except KeyError as dep_key_error:
+        _handle_missing_deps_keyerror(dep_key_error)
+        return False
+    return True
+
+
+def _aggregate_rolling_window(scn: Scene, reader_name: str, rolling_args: dict) -> Optional[Scene]:
+    if not rolling_args["window"]:
+        return scn
+    statistics = get_reader_attr(reader_name, "ROLLING_STATISTICS")
+    if statistics is None:
+        LOG.error(f"Reader '{reader_name}' does not support rolling window accumulation.")
+        return None
+    store_dir = rolling_args["store_dir"]
+    if store_dir is None:
+        store_dir = os.path.join(satpy.config.get("cache_dir"), f"polar2grid_rolling_{reader_name}")
+    data_ids = [data_id for data_id in scn.keys() if scn[data_id].attrs["name"] in statistics]
+    if not data_ids:
+        LOG.warning("None of the loaded products can be accumulated over a rolling window.")
+        return scn
+    accumulator = RollingAccumulator(store_dir, timedelta(minutes=rolling_args["window"]))
+    LOG.info("Adding products to the rolling accumulation in '%s'...", store_dir)
+    all_data = dask.compute(*(scn[data_id].data for data_id in data_ids))
+    for data_id, data in zip(data_ids, all_data, strict=True):
+        data_arr = scn[data_id]
+        name = data_arr.attrs["name"]
+        accumulator.add(
+            name,
+            np.asarray(data, dtype=np.float32),
+            data_arr.attrs["start_time"],
+            statistic=statistics[name],
+            grid_id=_rolling_grid_id(data_arr.attrs["area"]),
+        )
+        new_data_arr = data_arr.copy(data=da.from_array(accumulator.get(name), chunks=data_arr.data.chunksize))
+        new_data_arr.attrs["start_time"] = accumulator.window_start_time(name)
+        scn[data_id] = new_data_arr
+    accumulator.save()
+    return scn
+
+
+def _rolling_grid_id(area_def) -> Optional[list]:
+    """Get a JSON serializable identifier of the grid of accumulated data."""
+    if not isinstance(area_def, AreaDefinition):
+        return None
+    return [area_def.area_id, area_def.crs.to_string(), list(area_def.shape), list(area_def.area_extent)]
+
+
+def _get_filter_kwargs(reader_args: dict) -> dict:
+    return {
+        "sza_threshold": reader_args["sza_threshold"],
+        "day_fraction": reader_args["filter_day_products"],
+        "night_fraction": reader_args["filter_night_products"],
+    }
+
+
+def _remove_filtered_products_before_generation(
+    scn: Scene, reader_names: list[str], resample_args: dict, filter_kwargs: dict
+) -> None:
+    """Remove products from the wishlist that would be filtered after being generated.
+
+    Day/night coverage and output grid coverage only depend on the geolocation
+    of the loaded datasets, so composites that would be filtered (ex. day-only
+    composites of a night pass) are never built.
+
+    """
+    if resample_args["ll_bbox"]:
+        # cropping changes the coverage, filter after cropping instead
+        return
+    filtered_ids = filter_scene_wishlist(scn, reader_names, **filter_kwargs)
+    filtered_ids |= wishlist_without_grid_coverage(
+        scn,
+        resample_args["grids"],
+        resample_args["grid_configs"],
+        resample_args["resampler"],
+        grid_coverage=resample_args["grid_coverage"],
+        antimeridian_mode=resample_args["antimeridian_mode"],
+    )
+    if not filtered_ids:
+        return
+    LOG.info("Skipping generation of %d products that would be filtered", len(filtered_ids))
+    LOG.debug("Products skipped before generation: %s", ", ".join(str(data_id) for data_id in filtered_ids))
+    remove_from_wishlist(scn, filtered_ids)
+
+
+def _disable_resample_persist_if_needed(resample_args: dict, memory_governor: Optional[MemoryGovernor]) -> None:
+    if memory_governor is None or not resample_args.get("ewa_persist"):
+        return
+    if memory_governor.should_spill():
+        LOG.info("Memory usage is close to '--max-memory', EWA intermediate results will not be persisted.")
+        resample_args["ewa_persist"] = False
+
+
+def _create_progressive_delivery(writer_args: dict, reader_name: str) -> Optional[ProgressiveDelivery]:
+    progressive = writer_args.pop("progressive", False)
+    priority = writer_args.pop("product_priority", None)
+    spool_filename = writer_args.pop("delivery_spool", None)
+    if not progressive:
+        return None
+    if priority is None:
+        priority = get_reader_attr(reader_name, "PRODUCT_PRIORITY", [])
+    return ProgressiveDelivery(priority=priority, spool_filename=spool_filename)
+
+
 def _prepare_initial_logging(arg_parser, glue_name: str) -> bool:
     global LOG
     LOG = logging.getLogger(glue_name)
@@ -501,7 +739,7 @@ def _handle_missing_deps_keyerror(dep_key_error: KeyError) -> None:
     LOG.debug("Unknown product requested", exc_info=True)
 
 
-def _persist_swath_definition_in_scene(scn: Scene) -> None:
+def _persist_swath_definition_in_scene(scn: Scene, memory_governor: Optional[MemoryGovernor] = None) -> Scene:
     to_persist_swath_defs = _swaths_to_persist(scn)
     if not to_persist_swath_defs:
         return scn
@@ -509,6 +747,9 @@ def _persist_swath_definition_in_scene(scn: Scene) -> None:
     to_update_data_arrays, to_persist_lonlats = zip(*to_persist_swath_defs.values(), strict=True)
     LOG.info("Loading swath geolocation into memory...")
     persisted_lonlats = dask.persist(*to_persist_lonlats)
+    if memory_governor is not None:
+        spilled = memory_governor.spill_if_needed([arr for lonlats in persisted_lonlats for arr in lonlats])
+        persisted_lonlats = list(zip(spilled[::2], spilled[1::2], strict=True))
     persisted_swath_defs = [SwathDefinition(plons, plats) for plons, plats in persisted_lonlats]
     new_scn = scn.copy()
     for arrays_to_update, persisted_swath_def in zip(to_update_data_arrays, persisted_swath_defs, strict=True):
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+# Copyright (C) 2022 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Persistent cache of longitude and latitude arrays for static grids.
+
+Computing the longitude and latitude of every pixel of a grid requires an
+inverse projection of every pixel. For static grids these arrays never change
+so they can be computed once, saved as ``.npy`` files in a ``polar2grid_lonlats``
+directory of Satpy's ``cache_dir``, and memory-mapped on later uses. Cache
+files are named by a hash of the grid's CRS, extent, and shape.
+
+Caching is disabled by default. It is enabled by setting the environment
+variable ``P2G_LONLAT_CACHE_SIZE`` to the maximum number of cache files to
+keep; the least recently used files are removed beyond that. Each cache file
+holds 64-bit floating point longitudes and latitudes so it takes 16 bytes per
+grid pixel (ex. ~1.6GB for a 10000 x 10000 grid).
+
+Only grids registered with :func:`register_static_grid` are cached. Polar2Grid
+registers the grids it loads from grid configuration files (ex. ``grids.yaml``).
+Frozen dynamic grids (ex. ``wgs84_fit``) change extents with every input and
+are never cached. The cache file is created when the returned dask arrays are
+first computed, not when they are created.
+
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+from itertools import product
+from operator import getitem
+
+import dask.array as da
+import numpy as np
+from dask.array.core import normalize_chunks, slices_from_chunks
+from dask.base import tokenize
+from dask.highlevelgraph import HighLevelGraph
+from pyresample.geometry import AreaDefinition
+
+LOG = logging.getLogger(__name__)
+
+CACHE_SUBDIR = "polar2grid_lonlats"
+FILL_CHUNK_SIZE = 2048
+
+
+_STATIC_GRID_KEYS: set[str] = set()
+
+
+def register_static_grid(area_def: AreaDefinition) -> None:
+    """Mark ``area_def`` as a static grid whose lon/lats can be cached."""
+    _STATIC_GRID_KEYS.add(get_lonlat_cache_key(area_def))
+
+
+def get_cached_lonlats(area_def, chunks=None) -> tuple[da.Array, da.Array]:
+    """Get dask arrays of longitude and latitude for ``area_def``.
+
+    Longitudes and latitudes for static grids (see
+    :func:`register_static_grid`) are read from a memory-mapped cache file
+    which is created on first use if caching is enabled. Other geometries
+    (ex. swaths or frozen dynamic grids) are passed to their ``get_lonlats``
+    method.
+
+    """
+    cache_size = _get_cache_size()
+    if not isinstance(area_def, AreaDefinition) or cache_size <= 0:
+        return area_def.get_lonlats(chunks=chunks)
+    cache_key = get_lonlat_cache_key(area_def)
+    if cache_key not in _STATIC_GRID_KEYS:
+        LOG.debug("Not caching lon/lat arrays for non-static grid %s", area_def.area_id)
+        return area_def.get_lonlats(chunks=chunks)
+
+    cache_dir = _get_cache_dir()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError as err:
+        LOG.warning("Could not use lon/lat cache for grid %s: %s", area_def.area_id, err)
+        return area_def.get_lonlats(chunks=chunks)
+    cache_fn = os.path.join(cache_dir, f"lonlats_{cache_key}.npy")
+
+    chunks = normalize_chunks(chunks if chunks is not None else "auto", area_def.shape, dtype=np.float64)
+    token = tokenize(cache_key, chunks)
+    load_name = f"load-cached-lonlats-{token}"
+    load_layer = {load_name: (_load_or_create_cache_file, area_def, cache_fn, cache_size)}
+    arrays = []
+    for var_idx, var_name in enumerate(("lons", "lats")):
+        name = f"cached-{var_name}-{token}"
+        block_indexes = product(*(range(len(dim_chunks)) for dim_chunks in chunks))
+        block_layer = {
+            (name,) + block_idx: (getitem, load_name, (var_idx,) + block_slices)
+            for block_idx, block_slices in zip(block_indexes, slices_from_chunks(chunks), strict=True)
+        }
+        graph = HighLevelGraph({load_name: load_layer, name: block_layer}, {load_name: set(), name: {load_name}})
+        arrays.append(da.Array(graph, name, chunks, dtype=np.float64))
+    lons, lats = arrays
+    return lons, lats
+
+
+def get_lonlat_cache_key(area_def: AreaDefinition) -> str:
+    """Get a unique key for the geolocation of an AreaDefinition."""
+    key_parts = (area_def.crs.to_wkt(), tuple(float(x) for x in area_def.area_extent), area_def.shape)
+    return hashlib.sha1(repr(key_parts).encode()).hexdigest()
+
+
+def _get_cache_size() -> int:
+    return int(os.environ.get("P2G_LONLAT_CACHE_SIZE", "0"))
+
+
+def _get_cache_dir() -> str:
+    import satpy
+
+    return os.path.join(satpy.config.get("cache_dir"), CACHE_SUBDIR)
+
+
+def _load_or_create_cache_file(area_def: AreaDefinition, cache_fn: str, cache_size: int) -> np.memmap:
+    if os.path.isfile(cache_fn):
+        LOG.debug("Using cached lon/lat arrays for grid %s: %s", area_def.area_id, cache_fn)
+        # mark as recently used
+        os.utime(cache_fn)
+        return np.load(cache_fn, mmap_mode="r")
+
+    LOG.info("Computing lon/lat arrays for grid %s and caching them in %s", area_def.area_id, cache_fn)
+    cache_dir = os.path.dirname(cache_fn)
+    tmp_fd, tmp_fn = tempfile.mkstemp(suffix=".npy", dir=cache_dir)
+    os.close(tmp_fd)
+    try:
+        lonlats = np.lib.format.open_memmap(tmp_fn, mode="w+", dtype=np.float64, shape=(2,) + area_def.shape)
+        # fill row strips so the full grid is never in memory at once
+        for row_start in range(0, area_def.height, FILL_CHUNK_SIZE):
+            row_slice = slice(row_start, min(row_start + FILL_CHUNK_SIZE, area_def.height))
+            lonlats[0, row_slice], lonlats[1, row_slice] = area_def.get_lonlats(data_slice=(row_slice, slice(None)))
+        lonlats.flush()
+        del lonlats
+        # another process may have created the same file, either is fine
+        os.replace(tmp_fn, cache_fn)
+    except BaseException:
+        os.remove(tmp_fn)
+        raise
+    _prune_cache_dir(cache_dir, cache_size)
+    return np.load(cache_fn, mmap_mode="r")
+
+
+def _prune_cache_dir(cache_dir: str, cache_size: int, prefix: str = "lonlats_") -> None:
+    """Remove the least recently used cache files beyond ``cache_size`` files."""
+    cache_files = [
+        os.path.join(cache_dir, fn) for fn in os.listdir(cache_dir) if fn.startswith(prefix) and fn.endswith(".npy")
+    ]
+    if len(cache_files) <= cache_size:
+        return
+    cache_files.sort(key=os.path.getmtime, reverse=True)
+    for old_fn in cache_files[cache_size:]:
+        LOG.debug("Removing old cache file: %s", old_fn)
+        try:
+            os.remove(old_fn)
+        except OSError:
+            continue
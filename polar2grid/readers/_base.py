@@ -30,12 +30,81 @@ from typing import Optional, Union
 
 import satpy
 from satpy import DataID, DataQuery, Scene
+from satpy.composites.config_loader import load_compositor_configs_for_sensors
+from satpy.dependency_tree import DependencyTree
+from satpy.node import MissingDependencies
 
 from polar2grid.utils.dynamic_imports import get_reader_attr
 from polar2grid.utils.legacy_compat import AliasHandler
 
 logger = logging.getLogger(__name__)
 
+# (reader DataIDs, sensors, config path) -> available DataIDs
+# least recently used entries are removed once the cache is full
+_AVAILABLE_IDS_CACHE: dict[tuple, list[DataID]] = {}
+_AVAILABLE_IDS_CACHE_SIZE = 8
+
+
+def _available_ids_cache_key(scn: Scene) -> tuple:
+    config_path = tuple(satpy.config.get("config_path"))
+    reader_ids = frozenset(scn.available_dataset_ids())
+    return reader_ids, frozenset(scn.sensor_names), config_path
+
+
+def get_available_dataset_ids(scn: Scene) -> list[DataID]:
+    """Get all reader and composite DataIDs available for loading.
+
+    Composite availability only depends on what the readers can load, the
+    sensors involved, and the Satpy configuration path. Results for the most
+    recently used of those values are cached so repeated calls don't rebuild
+    the composite dependency tree. Note that the current ``satpy.config``
+    ``config_path`` is part of the cache key.
+
+    """
+    cache_key = _available_ids_cache_key(scn)
+    available_ids = _AVAILABLE_IDS_CACHE.pop(cache_key, None)
+    if available_ids is None:
+        available_ids = scn.available_dataset_ids(composites=True)
+        if len(_AVAILABLE_IDS_CACHE) >= _AVAILABLE_IDS_CACHE_SIZE:
+            del _AVAILABLE_IDS_CACHE[next(iter(_AVAILABLE_IDS_CACHE))]
+    _AVAILABLE_IDS_CACHE[cache_key] = available_ids
+    return list(available_ids)
+
+
+def get_available_dataset_ids_for_names(scn: Scene, composite_names: set[str]) -> list[DataID]:
+    """Get all available reader DataIDs and only the available composites with the provided names.
+
+    This is similar to :func:`get_available_dataset_ids`, but the composite
+    dependency tree is only populated with the requested composites instead
+    of every configured composite.
+
+    """
+    reader_ids = scn.available_dataset_ids()
+    sensor_comps, mods = load_compositor_configs_for_sensors(scn.sensor_names)
+    comp_ids = {
+        comp_id for comp_dict in sensor_comps.values() for comp_id in comp_dict if comp_id["name"] in composite_names
+    }
+    if not comp_ids:
+        return reader_ids
+    dep_tree = DependencyTree(scn._readers, sensor_comps, mods, available_only=True)
+    try:
+        dep_tree.populate_with_keys(comp_ids)
+    except MissingDependencies:
+        pass
+    available_comps = set(node.name for node in dep_tree.trunk()) & comp_ids
+    return reader_ids + sorted(available_comps)
+
+
+def _composite_names_for_sensors(sensor_names: set[str]) -> set[str]:
+    sensor_comps, _ = load_compositor_configs_for_sensors(sensor_names)
+    # ignore inline compositor dependencies starting with '_'
+    return {
+        comp_id["name"]
+        for comp_dict in sensor_comps.values()
+        for comp_id in comp_dict
+        if not comp_id["name"].startswith("_")
+    }
+
 
 class ReaderProxyBase:
     """Helper to provide Polar2Grid-specific information about a reader.
@@ -97,11 +166,16 @@ class ReaderProxyBase:
         self,
         p2g_product_names: Optional[list[str]] = None,
         possible_satpy_ids: Optional[list[DataID]] = None,
+        p2g_only: bool = False,
     ) -> tuple[list[str], list[str], list[str]]:
-        """Get custom/satpy products and polar2grid products that are available for loading."""
-        if possible_satpy_ids is None:
-            possible_satpy_ids = self.scn.available_dataset_ids(composites=True)
-        available_custom_products = self.get_user_custom_products()
+        """Get custom/satpy products and polar2grid products that are available for loading.
+
+        If ``p2g_only`` is ``True`` then only the Polar2Grid and custom user
+        products are guaranteed to be complete. Composites that are neither
+        of these are not checked for availability which avoids creating
+        dependency information for every configured Satpy composite.
+
+        """
         if p2g_product_names is None:
             p2g_product_names = self.get_all_products()
             if not p2g_product_names:
@@ -109,17 +183,47 @@ class ReaderProxyBase:
                     "Provided readers are not configured in %s. All products will be listed with internal Satpy names.",
                     self._binary_name,
                 )
+                if possible_satpy_ids is None:
+                    possible_satpy_ids = get_available_dataset_ids(self.scn)
                 return sorted(set([x["name"] for x in possible_satpy_ids])), [], []
+
+        if p2g_only and possible_satpy_ids is None:
+            custom_names = self._get_custom_composite_names()
+            p2g_satpy_names = self._get_satpy_names(p2g_product_names)
+            possible_satpy_ids = get_available_dataset_ids_for_names(self.scn, p2g_satpy_names | custom_names)
+            available_custom_products = [
+                satpy_id for satpy_id in possible_satpy_ids if satpy_id["name"] in custom_names
+            ]
+        else:
+            if possible_satpy_ids is None:
+                possible_satpy_ids = get_available_dataset_ids(self.scn)
+            available_custom_products = self.get_user_custom_products()
         return self._alias_handler.available_product_names(
             p2g_product_names, available_custom_products, possible_satpy_ids
         )
 
+    def _get_satpy_names(self, p2g_product_names: list[str]) -> set[str]:
+        satpy_names = set()
+        for p2g_name in p2g_product_names:
+            satpy_query = self._aliases.get(p2g_name, p2g_name)
+            satpy_name = satpy_query if isinstance(satpy_query, str) else satpy_query.get("name")
+            if satpy_name is not None:
+                satpy_names.add(satpy_name)
+        return satpy_names
+
+    def _get_custom_composite_names(self) -> set[str]:
+        sensor_names = self.scn.sensor_names
+        satpy_and_p2g_names = _composite_names_for_sensors(sensor_names)
+        with satpy.config.set(config_path=[]):
+            satpy_only_names = _composite_names_for_sensors(sensor_names)
+        return satpy_and_p2g_names - satpy_only_names
+
     def get_user_custom_products(
         self,
     ):
-        satpy_and_p2g_ids = self.scn.available_dataset_ids(composites=True)
+        satpy_and_p2g_ids = get_available_dataset_ids(self.scn)
         with satpy.config.set(config_path=[]):
-            satpy_only_ids = self.scn.available_dataset_ids(composites=True)
+            satpy_only_ids = get_available_dataset_ids(self.scn)
         return sorted(set(satpy_and_p2g_ids) - set(satpy_only_ids))
 
     def apply_p2g_name_to_scene(
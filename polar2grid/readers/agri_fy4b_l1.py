@@ -95,6 +95,7 @@ from typing import Optional
 from ._base import ReaderProxyBase
 
 PREFERRED_CHUNK_SIZE: int = 4096
+STATIC_REMAP_TABLES: bool = True
 
 READER_PRODUCTS = ["C{:02d}".format(x) for x in range(1, 16)]
 COMPOSITE_PRODUCTS = [
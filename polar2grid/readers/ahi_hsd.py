@@ -102,6 +102,8 @@ from typing import Optional
 from ._base import ReaderProxyBase
 
 PREFERRED_CHUNK_SIZE: int = 2200  # one segment
+STATIC_REMAP_TABLES: bool = True
+SEGMENT_STREAMING: dict = {"segment_key": "segment", "group_keys": ["start_time"]}
 
 READER_PRODUCTS = ["B{:02d}".format(x) for x in range(1, 17)]
 COMPOSITE_PRODUCTS = [
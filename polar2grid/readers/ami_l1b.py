@@ -94,6 +94,8 @@ from typing import Optional
 
 from ._base import ReaderProxyBase
 
+STATIC_REMAP_TABLES: bool = True
+
 READER_PRODUCTS = [
     "VI004",
     "VI005",
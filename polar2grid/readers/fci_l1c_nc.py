@@ -81,6 +81,14 @@ from typing import Optional
 from ._base import ReaderProxyBase
 
 PREFERRED_CHUNK_SIZE: int = 1024
+STATIC_REMAP_TABLES: bool = True
+# body chunks start at the bottom (south) of the image and vary in height
+SEGMENT_STREAMING: dict = {
+    "segment_key": "count_in_repeat_cycle",
+    "group_keys": ["repeat_cycle_in_day"],
+    "from_bottom": True,
+    "variable_heights": True,
+}
 
 READER_PRODUCTS = [
     "vis_04",
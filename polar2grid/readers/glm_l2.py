@@ -56,6 +56,16 @@ using the ``-r`` option and the reader name ``glm_l2``.
 | total_energy              | Total Energy                                        |
 +---------------------------+-----------------------------------------------------+
 
+Products can be accumulated over multiple minutes by processing each new file
+with the ``--rolling-window`` option. Every execution adds the provided file
+to the accumulation kept in the ``--rolling-store`` directory and writes the
+accumulated products for the most recent window. Density and energy products
+are summed, average areas are averaged, and the minimum flash area is the
+minimum over the window. For example, to produce a 5 minute flash extent
+density every minute from the newest file, ``$FN``::
+
+    geo2grid.sh -r glm_l2 -w geotiff -p flash_extent_density --rolling-window 5 --rolling-store /data/glm_5min -f $FN
+
 """
 
 from __future__ import annotations
@@ -76,6 +86,17 @@ READER_PRODUCTS = [
     "total_energy",
 ]
 COMPOSITE_PRODUCTS = []
+# statistic used to combine observations with ``--rolling-window``
+ROLLING_STATISTICS = {
+    "flash_extent_density": "sum",
+    "group_extent_density": "sum",
+    "flash_centroid_density": "sum",
+    "group_centroid_density": "sum",
+    "average_flash_area": "mean",
+    "minimum_flash_area": "min",
+    "average_group_area": "mean",
+    "total_energy": "sum",
+}
 
 
 class ReaderProxy(ReaderProxyBase):
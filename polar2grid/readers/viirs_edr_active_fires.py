@@ -31,8 +31,11 @@ Files supported usually have the following naming schemes:
 For more information about the this CSPP product, please
 visit the CSPP LEO website: `https://cimss.ssec.wisc.edu/cspp/`.
 
-This reader's default resampling algorithm ``--method`` is
-``nearest`` for Nearest Neighbor resampling. The frontend can
+This reader's default resampling algorithm is ``point_bin``, which puts every
+fire detection in to the grid cell containing it and keeps the maximum value
+of the detections in each cell (see
+:mod:`polar2grid.resample.point_binning`). Nearest neighbor resampling can
+be used instead with ``--method nearest``. The frontend can
 be specified with the ``polar2grid.sh`` command using the
 ``viirs_edr_active_fires`` frontend name. The VIIRS Active Fire
 frontend provides the following products:
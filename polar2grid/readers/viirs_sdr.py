@@ -298,6 +298,8 @@ DEFAULT_PRODUCTS = I_ALIASES + M_ALIASES + DNB_PRODUCTS[1:] + TRUE_COLOR_PRODUCT
 P2G_PRODUCTS = I_ALIASES + M_ALIASES + DNB_PRODUCTS + I_RAD_PRODUCTS + M_RAD_PRODUCTS
 P2G_PRODUCTS += I_ANGLE_PRODUCTS + M_ANGLE_PRODUCTS + DNB_ANGLE_PRODUCTS + OTHER_COMPS
 P2G_PRODUCTS += TRUE_COLOR_PRODUCTS + FALSE_COLOR_PRODUCTS
+# order products are produced in with --progressive, anything else (angles, radiances) is produced last
+PRODUCT_PRIORITY = ["i05"] + TRUE_COLOR_PRODUCTS + FALSE_COLOR_PRODUCTS + I_ALIASES + DNB_PRODUCTS + M_ALIASES
 P2G_PRODUCTS += [
     "viirs_crefl01",
     "viirs_crefl02",
@@ -29,4 +29,4 @@
 #     david.hoese@ssec.wisc.edu
 """Functionality related to resampling data or other geolocation specific utilities."""
 
-from ._resample_scene import resample_scene  # noqa
+from ._resample_scene import resample_scene, wishlist_without_grid_coverage  # noqa
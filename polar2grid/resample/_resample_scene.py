@@ -31,14 +31,18 @@ from typing import List, Optional, Union
 import numpy as np
 from pyproj import Proj
 from pyresample import parse_area_file
-from pyresample.geometry import AreaDefinition, DynamicAreaDefinition
+from pyresample.geometry import AreaDefinition, DynamicAreaDefinition, SwathDefinition
 from satpy import Scene
 from satpy.area import get_area_def
 
 from polar2grid.filters.resample_coverage import ResampleCoverageFilter
 from polar2grid.grids import GridManager
+from polar2grid.grids.lonlat_cache import register_static_grid
 
-from ..filters._utils import PRGeometry
+from ..filters._utils import PRGeometry, iter_wishlist_data_arrays, polygon_for_area
+from . import stacking
+from .categorical import CategoricalResampler
+from .point_binning import PointBinResampler
 from .resample_decisions import ResamplerDecisionTree
 
 logger = logging.getLogger(__name__)
@@ -48,6 +52,11 @@ AreaSpecifier = Union[AreaDefinition, str, None]
 ListOfAreas = List[Union[AreaDefinition, str, None]]
 
 GRIDS_YAML_FILEPATH = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "grids", "grids.yaml"))
+# resamplers only available in polar2grid that can be used by name in resampling.yaml
+POLAR2GRID_RESAMPLERS = {
+    "point_bin": PointBinResampler,
+    "categorical": CategoricalResampler,
+}
 
 
 def _crs_equal(a, b):
@@ -137,11 +146,21 @@ def _get_area_def_from_name(
 
 
 class AreaDefResolver:
+    """Convert area names to area definitions and freeze dynamic areas for a single Scene.
+
+    Resolved areas and frozen dynamic areas are memoized so products split
+    into multiple resampling groups (ex. different resamplers) share the same
+    frozen area instead of computing the dynamic grid parameters again.
+
+    """
+
     def __init__(self, input_scene, grid_configs):
         grid_manager, yaml_areas = _get_legacy_and_yaml_areas(grid_configs)
         self.input_scene = input_scene
         self.grid_manager = grid_manager
         self.yaml_areas = yaml_areas
+        self._area_defs: dict = {}
+        self._frozen_areas: dict = {}
 
     def has_dynamic_extents(self, area_name: Optional[str]) -> bool:
         area_def = self[area_name]
@@ -149,21 +168,57 @@ class AreaDefResolver:
         return is_dynamic and area_def.area_extent is None
 
     def __getitem__(self, area_name: Optional[str]) -> Optional[PRGeometry]:
-        area_def = _get_area_def_from_name(area_name, self.input_scene, self.grid_manager, self.yaml_areas)
-        return area_def
+        if area_name not in self._area_defs:
+            area_def = _get_area_def_from_name(area_name, self.input_scene, self.grid_manager, self.yaml_areas)
+            if area_name not in ("MAX", "MIN") and isinstance(area_def, AreaDefinition):
+                # configured grids with fixed extents, not the input data's areas
+                register_static_grid(area_def)
+            self._area_defs[area_name] = area_def
+        return self._area_defs[area_name]
 
     def get_frozen_area(self, area_name: Optional[str], **kwargs) -> Optional[PRGeometry]:
         area_def = self[area_name]
-        return self._freeze_area_if_dynamic(area_def, **kwargs)
-
-    def _freeze_area_if_dynamic(self, area_def: PRGeometry, **kwargs) -> PRGeometry:
-        if isinstance(area_def, DynamicAreaDefinition):
-            logger.info("Computing dynamic grid parameters...")
-            area_def = area_def.freeze(self.input_scene.finest_area(), **kwargs)
-            logger.debug("Frozen dynamic area: %s", area_def)
+        if not isinstance(area_def, DynamicAreaDefinition):
+            return area_def
+        source_area = self.input_scene.finest_area()
+        cache_key = (area_name, source_area, tuple(sorted(kwargs.items())))
+        if cache_key not in self._frozen_areas:
+            self._frozen_areas[cache_key] = self._freeze_area(area_def, source_area, **kwargs)
+        return self._frozen_areas[cache_key]
+
+    @staticmethod
+    def _freeze_area(area_def: DynamicAreaDefinition, source_area: PRGeometry, **kwargs) -> AreaDefinition:
+        logger.info("Computing dynamic grid parameters...")
+        area_def = area_def.freeze(_get_freeze_lonlats(area_def, source_area), **kwargs)
+        logger.debug("Frozen dynamic area: %s", area_def)
         return area_def
 
 
+def _get_freeze_lonlats(area_def: DynamicAreaDefinition, source_area: PRGeometry):
+    """Get the geolocation a dynamic area should be frozen to contain.
+
+    For swaths this is the cached boundary polygon of the swath (see
+    :func:`polar2grid.filters._utils.polygon_for_area`) instead of the full
+    longitude and latitude arrays. The projected extents of a swath are found
+    on its edges unless the swath covers a pole or the area's projection is
+    optimized for the data, in which case the swath itself is used.
+
+    """
+    if not isinstance(source_area, SwathDefinition) or area_def.optimize_projection:
+        return source_area
+    boundary_lons, boundary_lats = np.rad2deg(polygon_for_area(source_area).vertices.T)
+    if _encloses_pole(boundary_lons):
+        return source_area
+    return boundary_lons, boundary_lats
+
+
+def _encloses_pole(boundary_lons: np.ndarray) -> bool:
+    """Check if a closed polygon winds around one of the poles."""
+    lon_steps = np.diff(np.append(boundary_lons, boundary_lons[:1]))
+    lon_steps = (lon_steps + 180.0) % 360.0 - 180.0
+    return bool(abs(lon_steps.sum()) > 180.0)
+
+
 def resample_scene(
     input_scene: Scene,
     areas_to_resample: ListOfAreas,
@@ -173,14 +228,28 @@ def resample_scene(
     preserve_resolution: bool = True,
     grid_coverage: Optional[float] = None,
     is_polar2grid: bool = True,
+    remap_tables: bool = False,
+    granule_mosaic: bool = False,
+    accumulator_store: Optional[str] = None,
     **resample_kwargs,
 ) -> list[tuple[Scene, set]]:
-    """Resample a single Scene to multiple target areas."""
+    """Resample a single Scene to multiple target areas.
+
+    If ``remap_tables`` is True, nearest neighbor resampling between static
+    grids uses precomputed remap tables (see
+    :mod:`polar2grid.resample.remap_tables`). If ``granule_mosaic`` is True,
+    nearest neighbor resampling of swaths resamples each granule separately
+    (see :mod:`polar2grid.resample.granule_mosaic`). If ``accumulator_store``
+    is a directory, EWA and nearest neighbor resampling of swaths to static
+    grids add the data to the pass accumulated in that directory (see
+    :mod:`polar2grid.resample.accumulator_store`).
+
+    """
     area_resolver = AreaDefResolver(input_scene, grid_configs)
     resampling_groups = _get_groups_to_resample(resampler, input_scene, is_polar2grid, resample_kwargs)
     wishlist: set = input_scene.wishlist.copy()
     scenes_to_save = []
-    for (resampler, _resample_kwargs, default_target), data_ids in resampling_groups.items():
+    for (resampler, _resample_kwargs, default_target, stack_products), data_ids in resampling_groups.items():
         areas = _areas_to_resample(areas_to_resample, resampler, default_target)
         scene_to_resample: Scene = input_scene.copy(datasets=data_ids)
         preserve_resolution = _get_preserve_resolution(preserve_resolution, resampler, areas)
@@ -199,6 +268,16 @@ def resample_scene(
             area_def = area_resolver.get_frozen_area(area_name, antimeridian_mode=antimeridian_mode)
             has_dynamic_extents = area_resolver.has_dynamic_extents(area_name)
             rs = _get_default_resampler(resampler, area_name, area_def, input_scene)
+            rs = POLAR2GRID_RESAMPLERS.get(rs, rs)
+            if remap_tables:
+                rs = _use_remap_table_if_possible(rs, area_def, scene_to_resample)
+            if granule_mosaic:
+                rs = _use_granule_mosaic_if_possible(rs, area_def, scene_to_resample)
+            area_resample_kwargs = _resample_kwargs
+            if accumulator_store is not None:
+                rs, area_resample_kwargs = _use_accumulator_store_if_possible(
+                    rs, area_def, has_dynamic_extents, scene_to_resample, _resample_kwargs, accumulator_store
+                )
             new_scn = _filter_and_resample_scene_to_single_area(
                 area_name,
                 area_def,
@@ -207,8 +286,9 @@ def resample_scene(
                 scene_to_resample,
                 data_ids,
                 rs,
-                _resample_kwargs,
+                area_resample_kwargs,
                 preserve_resolution,
+                stack_products=stack_products,
             )
             if new_scn is None:
                 continue
@@ -224,6 +304,66 @@ def resample_scene(
     return scenes_to_save
 
 
+def wishlist_without_grid_coverage(
+    input_scene: Scene,
+    areas_to_resample: ListOfAreas,
+    grid_configs: list[str, ...],
+    resampler: Optional[str],
+    grid_coverage: Optional[float] = None,
+    antimeridian_mode: str = "modify_crs",
+) -> set:
+    """Get the requested products of a loaded Scene that :func:`resample_scene` would skip for every target area.
+
+    Only the geolocation of the loaded datasets is used so this can be run
+    before composites are generated. Products are only checked when all
+    target areas are static grids; dynamic grids always contain the data.
+
+    """
+    if not areas_to_resample:
+        return set()
+    area_resolver = AreaDefResolver(input_scene, grid_configs)
+    if any(
+        area_name in ("MIN", "MAX") or area_resolver.has_dynamic_extents(area_name) for area_name in areas_to_resample
+    ):
+        return set()
+    area_defs = {
+        area_name: area_resolver.get_frozen_area(area_name, antimeridian_mode=antimeridian_mode)
+        for area_name in areas_to_resample
+    }
+
+    resampling_dtree = ResamplerDecisionTree.from_configs()
+    coverage_groups: dict[tuple, list] = {}
+    for data_id, data_arr in iter_wishlist_data_arrays(input_scene):
+        resampling_args = resampling_dtree.find_match(**data_arr.attrs)
+        product_resampler = resampler if resampler is not None else resampling_args.get("resampler")
+        product_coverage = resampling_args.get("kwargs", {}).get("grid_coverage", grid_coverage)
+        if product_coverage is None:
+            product_coverage = 0.1
+        coverage_groups.setdefault((product_resampler, product_coverage), []).append(data_id)
+
+    uncovered_ids = set()
+    for (product_resampler, product_coverage), data_ids in coverage_groups.items():
+        uncovered_ids |= _data_ids_without_coverage(
+            input_scene, data_ids, area_defs, product_resampler, product_coverage
+        )
+    return uncovered_ids
+
+
+def _data_ids_without_coverage(
+    input_scene: Scene, data_ids: list, area_defs: dict, resampler: Optional[str], coverage_threshold: float
+) -> set:
+    uncovered_ids = set(data_ids)
+    for area_name, area_def in area_defs.items():
+        rs = _get_default_resampler(resampler, area_name, area_def, input_scene)
+        if area_def is None or rs == "native" or coverage_threshold <= 0.0:
+            return set()
+        coverage_filter = ResampleCoverageFilter(target_area=area_def, coverage_fraction=coverage_threshold)
+        uncovered_ids &= coverage_filter.filtered_wishlist(input_scene, data_ids=uncovered_ids)
+        if not uncovered_ids:
+            break
+    return uncovered_ids
+
+
 def _get_groups_to_resample(
     resampler: str,
     input_scene: Scene,
@@ -238,11 +378,13 @@ def _get_groups_to_resample(
         resampler_kwargs = resampling_args.get("kwargs", {}).copy()
         resampler_kwargs.update(user_resample_kwargs)
         default_target = resampling_args.get("default_target", None)
+        stack_products = resampling_args.get("stack_products", False)
         resampler = resampler if resampler is not None else default_resampler
         if default_target is None:
             default_target = _default_grid(resampler, is_polar2grid)
         hashable_kwargs = _hashable_kwargs(resampler_kwargs)
-        resampling_groups.setdefault((resampler, hashable_kwargs, default_target), []).append(data_id)
+        group_key = (resampler, hashable_kwargs, default_target, stack_products)
+        resampling_groups.setdefault(group_key, []).append(data_id)
     return resampling_groups
 
 
@@ -275,6 +417,59 @@ def _get_default_resampler(resampler, area_name, area_def, input_scene):
     return rs
 
 
+def _use_remap_table_if_possible(resampler: Optional[str], area_def: Optional[PRGeometry], scene_to_resample: Scene):
+    """Replace nearest neighbor resampling between static grids with remap table resampling."""
+    if resampler != "nearest" or not isinstance(area_def, AreaDefinition):
+        return resampler
+    source_areas = [data_arr.attrs.get("area") for data_arr in scene_to_resample]
+    if not all(isinstance(source_area, AreaDefinition) for source_area in source_areas):
+        return resampler
+    # imported here so the remap tables module can be run as a script
+    from .remap_tables import RemapTableResampler
+
+    return RemapTableResampler
+
+
+def _use_granule_mosaic_if_possible(resampler: Optional[str], area_def: Optional[PRGeometry], scene_to_resample: Scene):
+    """Replace nearest neighbor resampling of swaths with resampling each granule separately."""
+    if resampler != "nearest" or not isinstance(area_def, AreaDefinition):
+        return resampler
+    source_areas = [data_arr.attrs.get("area") for data_arr in scene_to_resample]
+    if not all(isinstance(source_area, SwathDefinition) for source_area in source_areas):
+        return resampler
+    from .granule_mosaic import GranuleNearestResampler
+
+    return GranuleNearestResampler
+
+
+def _use_accumulator_store_if_possible(
+    resampler,
+    area_def: Optional[PRGeometry],
+    has_dynamic_extents: bool,
+    scene_to_resample: Scene,
+    resample_kwargs: dict,
+    store_dir: str,
+) -> tuple:
+    """Replace EWA and nearest neighbor resampling of swaths with resampling that accumulates the pass."""
+    from .accumulator_store import AccumulatingEWAResampler, AccumulatingNearestResampler
+    from .granule_mosaic import GranuleNearestResampler
+
+    accumulating_resamplers = {
+        "ewa": AccumulatingEWAResampler,
+        "nearest": AccumulatingNearestResampler,
+        GranuleNearestResampler: AccumulatingNearestResampler,
+    }
+    if resampler not in accumulating_resamplers or not isinstance(area_def, AreaDefinition):
+        return resampler, resample_kwargs
+    source_areas = [data_arr.attrs.get("area") for data_arr in scene_to_resample]
+    if not all(isinstance(source_area, SwathDefinition) for source_area in source_areas):
+        return resampler, resample_kwargs
+    if has_dynamic_extents:
+        logger.warning("Can't accumulate products on grid '%s' with dynamic extents.", area_def.area_id)
+        return resampler, resample_kwargs
+    return accumulating_resamplers[resampler], {**resample_kwargs, "store_dir": store_dir}
+
+
 def _filter_and_resample_scene_to_single_area(
     area_name: str,
     area_def: Optional[PRGeometry],
@@ -285,6 +480,7 @@ def _filter_and_resample_scene_to_single_area(
     rs: str,
     resample_kwargs: dict,
     preserve_resolution: bool,
+    stack_products: bool = False,
 ) -> Optional[Scene]:
     filtered_data_ids, filtered_scn = _filter_scene_with_grid_coverage(
         area_name,
@@ -305,6 +501,7 @@ def _filter_and_resample_scene_to_single_area(
         filtered_data_ids,
         resample_kwargs,
         preserve_resolution,
+        stack_products=stack_products,
     )
     return new_scn
 
@@ -354,11 +551,16 @@ def _resample_scene_to_single_area(
     data_ids: list,
     resample_kwargs: dict,
     preserve_resolution: bool,
+    stack_products: bool = False,
 ) -> Optional[Scene]:
     if area_def is not None:
-        logger.info("Resampling to '%s' using '%s' resampling...", area_name, rs)
-        logger.debug("Resampling to '%s' using resampler '%s' with %s", area_name, rs, resample_kwargs)
-        new_scn = scene_to_resample.resample(area_def, resampler=rs, datasets=data_ids, **resample_kwargs)
+        rs_name = getattr(rs, "__name__", rs)
+        logger.info("Resampling to '%s' using '%s' resampling...", area_name, rs_name)
+        logger.debug("Resampling to '%s' using resampler '%s' with %s", area_name, rs_name, resample_kwargs)
+        if stack_products and rs in stacking.STACKABLE_RESAMPLERS:
+            new_scn = _resample_stacked_products(scene_to_resample, area_def, rs, data_ids, resample_kwargs)
+        else:
+            new_scn = scene_to_resample.resample(area_def, resampler=rs, datasets=data_ids, **resample_kwargs)
     elif not preserve_resolution:
         # the user didn't want to resample to any areas
         # the user also requested that we don't preserve resolution
@@ -371,6 +573,18 @@ def _resample_scene_to_single_area(
     return new_scn
 
 
+def _resample_stacked_products(
+    scene_to_resample: Scene, area_def: PRGeometry, rs: str, data_ids: Optional[list], resample_kwargs: dict
+) -> Scene:
+    """Resample products with the same geolocation together (see :mod:`polar2grid.resample.stacking`)."""
+    if data_ids is None:
+        data_ids = list(scene_to_resample.keys())
+    stacked_scene, ids_to_resample, stacks = stacking.stack_products(scene_to_resample, data_ids)
+    new_scn = stacked_scene.resample(area_def, resampler=rs, datasets=ids_to_resample, **resample_kwargs)
+    stacking.unstack_products(scene_to_resample, new_scn, stacks)
+    return new_scn
+
+
 def _areas_to_resample(
     areas_to_resample: Optional[ListOfAreas], resampler: Optional[str], default_target: Optional[AreaSpecifier]
 ) -> ListOfAreas:
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Helpers shared by polar2grid's custom resamplers."""
+
+from __future__ import annotations
+
+import xarray as xr
+from pyresample.geometry import AreaDefinition
+
+try:
+    from satpy.resample.base import _update_resampled_coords
+except ImportError:
+    _update_resampled_coords = None
+
+
+def update_resampled_coords(old_data: xr.DataArray, new_data: xr.DataArray, new_area: AreaDefinition) -> xr.DataArray:
+    """Add the target area's coordinates and the non-spatial coordinates of the source to resampled data.
+
+    Uses Satpy's implementation of its own resamplers when available so the
+    results of polar2grid's resamplers match Satpy's.
+
+    """
+    if _update_resampled_coords is not None:
+        return _update_resampled_coords(old_data, new_data, new_area)
+    from satpy.coords import add_crs_xy_coords
+
+    # coordinates along the old x/y dimensions don't apply to the new grid
+    ignore_coords = ("y", "x", "crs")
+    new_coords = {
+        cname: cval
+        for cname, cval in old_data.coords.items()
+        if cname not in ignore_coords and not any(dim in cval.dims for dim in ignore_coords)
+    }
+    new_data = new_data.assign_coords(**new_coords)
+    return add_crs_xy_coords(new_data, new_area)
@@ -0,0 +1,475 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Accumulate resampled granules of a pass over multiple executions.
+
+Direct broadcast passes are received one granule at a time. Instead of waiting
+for the entire pass or resampling every granule of the pass again each time a
+new granule arrives, the state of EWA and nearest neighbor resampling can be
+kept in an accumulator store directory between executions:
+
+* ``ewa``: the sum of the weights and of the weighted values of every grid
+  cell (the maximum weight and its value in maximum weight mode).
+* ``nearest``: the distance to the nearest source pixel found so far and its
+  value for every grid cell.
+
+Each execution adds the contribution of its granules to the stored arrays and
+produces the products normalized over everything accumulated so far, so the
+time spent on each execution only depends on the new granules. The state of
+every product and grid is kept as memory-mapped ``.npy`` files in its own
+sub-directory of the store.
+
+A granule from a different platform or starting more than ``PASS_GAP`` after
+the end of the stored pass starts a new pass and the stored arrays are reset.
+Every row chunk of the swath is treated as one granule, identified by its
+start time estimated from the times of the swath, so granules that were
+already added to the pass by an earlier execution, for example when the
+granules of consecutive executions overlap, are not added again. The new
+state is written to pending arrays that only replace the stored arrays, and
+the added granules are only recorded, once all of them have been written. An
+execution that fails before that point leaves the store unchanged. Only grids
+with static extents can be accumulated.
+
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+import dask
+import dask.array as da
+import numpy as np
+import xarray as xr
+from dask.base import tokenize
+from dask.highlevelgraph import HighLevelGraph
+from pyresample.ewa._fornav import write_grid_image_single
+from pyresample.ewa.dask_ewa import DaskEWAResampler
+from pyresample.geometry import AreaDefinition, SwathDefinition
+
+from polar2grid.grids.lonlat_cache import get_lonlat_cache_key
+
+from .granule_mosaic import GranuleNearestResampler, merge_granules
+
+LOG = logging.getLogger(__name__)
+
+PASS_GAP = timedelta(minutes=10)
+GRANULE_TIME_TOLERANCE = timedelta(seconds=1)
+STATE_FILENAME = "accumulator_state.json"
+
+
+class StoredProduct:
+    """Accumulated resampling state of one product on one grid.
+
+    Args:
+        product_dir: Directory holding the state of the product.
+        arrays: Mapping of array name to ``(shape, dtype, initial_value)``
+            for every array making up the state.
+
+    """
+
+    def __init__(self, product_dir: str, arrays: dict):
+        self.product_dir = product_dir
+        self._arrays = {name: (tuple(shape), np.dtype(dtype), init) for name, (shape, dtype, init) in arrays.items()}
+        self.filenames = {name: os.path.join(product_dir, f"{name}.npy") for name in arrays}
+        self.pending_filenames = {name: os.path.join(product_dir, f"{name}.pending.npy") for name in arrays}
+        self._state = self._load_state()
+
+    @classmethod
+    def from_data_array(cls, store_dir: str, kind: str, data_arr: xr.DataArray, target_area: AreaDefinition, arrays):
+        """Get the stored state of the product in ``data_arr`` resampled to ``target_area``."""
+        grid_dirname = f"{target_area.area_id}_{get_lonlat_cache_key(target_area)[:12]}"
+        product_dir = os.path.join(store_dir, grid_dirname, f"{_product_dirname(data_arr)}_{kind}")
+        return cls(product_dir, arrays)
+
+    @property
+    def start_time(self) -> Optional[datetime]:
+        """Start time of the first granule of the stored pass."""
+        start_time = self._state.get("start_time")
+        return None if start_time is None else datetime.fromisoformat(start_time)
+
+    def _load_state(self) -> dict:
+        state_fn = os.path.join(self.product_dir, STATE_FILENAME)
+        if not os.path.isfile(state_fn):
+            return {}
+        with open(state_fn) as state_file:
+            state = json.load(state_file)
+        if state.get("arrays") != self._array_descriptions():
+            LOG.warning("Accumulated arrays in %s don't match the current product, starting over.", self.product_dir)
+            return {}
+        return state
+
+    def _save_state(self) -> None:
+        state_fn = os.path.join(self.product_dir, STATE_FILENAME)
+        tmp_fn = state_fn + ".tmp"
+        with open(tmp_fn, "w") as state_file:
+            json.dump(self._state, state_file)
+        os.replace(tmp_fn, state_fn)
+
+    def _array_descriptions(self) -> dict:
+        return {name: [list(shape), dtype.str] for name, (shape, dtype, _) in self._arrays.items()}
+
+    def is_new_pass(self, platform_name: Optional[str], start_time: datetime, end_time: datetime) -> bool:
+        """Check if granules between ``start_time`` and ``end_time`` don't belong to the stored pass."""
+        if not self._state or self._state["platform_name"] != platform_name:
+            return True
+        pass_start = datetime.fromisoformat(self._state["start_time"])
+        pass_end = datetime.fromisoformat(self._state["end_time"])
+        return start_time > pass_end + PASS_GAP or end_time < pass_start - PASS_GAP
+
+    def pass_start_time(self, attrs: dict) -> datetime:
+        """Start time of the pass once the granules of the data with metadata ``attrs`` are added."""
+        start_time = attrs["start_time"]
+        end_time = attrs.get("end_time") or start_time
+        if self.is_new_pass(attrs.get("platform_name"), start_time, end_time):
+            return start_time
+        return min(start_time, self.start_time)
+
+    def plan_update(self, platform_name: Optional[str], granule_times: list) -> Optional[tuple]:
+        """Determine which granules have to be added to the stored pass.
+
+        Args:
+            platform_name: Platform that observed the granules.
+            granule_times: Start and end time of every granule.
+
+        Returns:
+            None if all granules were already added to the stored pass,
+            otherwise the update to pass to :meth:`commit` once the pending
+            arrays are written: the current state, whether the granules start
+            a new pass, the platform name, and the indexes of the granules to
+            add.
+
+        """
+        start_time = min(granule_start for granule_start, _ in granule_times)
+        end_time = max(granule_end for _, granule_end in granule_times)
+        new_pass = self.is_new_pass(platform_name, start_time, end_time)
+        granule_indexes = []
+        for granule_idx, (granule_start, granule_end) in enumerate(granule_times):
+            if not new_pass and self._has_granule(granule_start, granule_end):
+                LOG.info("Granule starting at %s was already accumulated in %s", granule_start, self.product_dir)
+                continue
+            granule_indexes.append(granule_idx)
+        if not granule_indexes:
+            return None
+        return copy.deepcopy(self._state), new_pass, platform_name, granule_indexes
+
+    def _has_granule(self, granule_start: datetime, granule_end: datetime) -> bool:
+        tolerance = max((granule_end - granule_start) / 4, GRANULE_TIME_TOLERANCE)
+        return any(
+            abs(datetime.fromisoformat(stored_start) - granule_start) <= tolerance
+            for stored_start in self._state["granules"]
+        )
+
+    def read(self, name: str, index, new_pass: bool) -> np.ndarray:
+        """Read part of a stored array or of its initial values if starting a new pass."""
+        shape, dtype, init = self._arrays[name]
+        if new_pass:
+            return np.broadcast_to(np.array(init, dtype=dtype), shape)[index].copy()
+        return np.array(np.load(self.filenames[name], mmap_mode="r")[index])
+
+    def create_pending(self) -> None:
+        """Create the pending arrays the updated state is written to."""
+        os.makedirs(self.product_dir, exist_ok=True)
+        for name, (shape, dtype, _) in self._arrays.items():
+            arr = np.lib.format.open_memmap(self.pending_filenames[name], mode="w+", dtype=dtype, shape=shape)
+            del arr
+
+    def write_pending(self, name: str, index, values: np.ndarray) -> None:
+        """Write part of the updated state to a pending array."""
+        arr = np.load(self.pending_filenames[name], mmap_mode="r+")
+        arr[index] = values
+        arr.flush()
+
+    def commit(self, update: tuple, granule_times: list) -> None:
+        """Replace the stored arrays with the pending arrays and record the granules added to them.
+
+        Must only be called once the pending arrays have been written
+        completely. If the stored state changed since the update was planned,
+        for example because the same result is computed twice, the pending
+        arrays are discarded instead.
+
+        """
+        base_state, new_pass, platform_name, granule_indexes = update
+        if self._load_state() != base_state:
+            LOG.debug("Accumulated state in %s changed, discarding pending arrays.", self.product_dir)
+            for pending_fn in self.pending_filenames.values():
+                if os.path.isfile(pending_fn):
+                    os.remove(pending_fn)
+            return
+        if new_pass and base_state:
+            LOG.info("Starting new accumulated pass in %s", self.product_dir)
+        for name, pending_fn in self.pending_filenames.items():
+            os.replace(pending_fn, self.filenames[name])
+        state = self._new_state(platform_name) if new_pass else copy.deepcopy(base_state)
+        for granule_idx in granule_indexes:
+            granule_start, granule_end = granule_times[granule_idx]
+            state["granules"].append(granule_start.isoformat())
+            if state["start_time"] is None or granule_start < datetime.fromisoformat(state["start_time"]):
+                state["start_time"] = granule_start.isoformat()
+            if state["end_time"] is None or granule_end > datetime.fromisoformat(state["end_time"]):
+                state["end_time"] = granule_end.isoformat()
+        self._state = state
+        self._save_state()
+
+    def _new_state(self, platform_name: Optional[str]) -> dict:
+        return {
+            "arrays": self._array_descriptions(),
+            "platform_name": platform_name,
+            "start_time": None,
+            "end_time": None,
+            "granules": [],
+        }
+
+
+def granule_times(attrs: dict, row_chunks: tuple) -> list[tuple[datetime, datetime]]:
+    """Estimate the start and end time of every row chunk (granule) of a swath from the times of the swath."""
+    start_time = attrs["start_time"]
+    end_time = attrs.get("end_time") or start_time
+    row_edges = np.cumsum((0,) + tuple(row_chunks)) / max(sum(row_chunks), 1)
+    duration = end_time - start_time
+    return [
+        (start_time + duration * float(row_start), start_time + duration * float(row_end))
+        for row_start, row_end in zip(row_edges[:-1], row_edges[1:], strict=True)
+    ]
+
+
+def _product_dirname(data_arr: xr.DataArray) -> str:
+    name = str(data_arr.attrs.get("name", data_arr.name))
+    if "bands" in data_arr.coords and data_arr.coords["bands"].ndim == 0:
+        name += "_" + str(data_arr.coords["bands"].item())
+    return name
+
+
+def _check_geometries(source_geo_def, target_geo_def) -> None:
+    if not isinstance(source_geo_def, SwathDefinition) or not isinstance(target_geo_def, AreaDefinition):
+        raise TypeError("Accumulating requires a SwathDefinition source and an AreaDefinition target.")
+
+
+def _check_store_dir(store_dir: Optional[str]) -> str:
+    if store_dir is None:
+        raise ValueError("Accumulating resamplers require a 'store_dir'.")
+    return store_dir
+
+
+class AccumulatingEWAResampler(DaskEWAResampler):
+    """EWA resampler adding every execution's granules to the weights and accumulations in a store."""
+
+    def __init__(self, source_geo_def: SwathDefinition, target_geo_def: AreaDefinition):
+        """Initialize resampler and check that the source is a swath and the target a grid."""
+        _check_geometries(source_geo_def, target_geo_def)
+        super().__init__(source_geo_def, target_geo_def)
+        self.store_dir: Optional[str] = None
+        self._product: Optional[tuple[StoredProduct, dict]] = None
+
+    def resample(self, data, store_dir: Optional[str] = None, **kwargs):
+        """Resample the data and add it to the accumulated state in ``store_dir``."""
+        self.store_dir = _check_store_dir(store_dir)
+        return super().resample(data, **kwargs)
+
+    def compute(self, data: xr.DataArray, cache_id=None, **kwargs) -> xr.DataArray:
+        """Add the data to the stored state and produce the normalized output for the entire pass."""
+        if "bands" in data.dims:
+            bands = [self.compute(data.sel(bands=band), cache_id=cache_id, **kwargs) for band in data["bands"].values]
+            return xr.concat(bands, dim="bands").transpose(*data.dims)
+        product = StoredProduct.from_data_array(
+            self.store_dir,
+            "ewa",
+            data,
+            self.target_geo_def,
+            {
+                "weights": (self.target_geo_def.shape, np.float32, 0),
+                "accums": (self.target_geo_def.shape, np.float32, 0),
+            },
+        )
+        self._product = (product, data.attrs)
+        res = super().compute(data, cache_id=cache_id, **kwargs)
+        res.attrs["start_time"] = product.pass_start_time(data.attrs)
+        return res
+
+    def _run_fornav_single(self, data, out_chunks, target_geo_def, fill_value, **kwargs):
+        product, attrs = self._product
+        maximum_weight_mode = kwargs.setdefault("maximum_weight_mode", False)
+        weight_sum_min = kwargs.setdefault("weight_sum_min", -1.0)
+        ll2cr_result = self.cache["ll2cr_result"]
+        fornav_task_name = f"fornav-{data.name}-{ll2cr_result.name}"
+        times = granule_times(attrs, data.chunks[-2])
+        update = product.plan_update(attrs.get("platform_name"), times)
+        ll2cr_blocks = []
+        if update is not None:
+            # only the ll2cr blocks, keyed by (name, row chunk, column chunk), of granules not added yet
+            ll2cr_blocks = [item for item in self.cache["ll2cr_blocks"].items() if item[0][1] in update[3]]
+        tasks = self._generate_fornav_dask_tasks(
+            out_chunks, ll2cr_blocks, fornav_task_name, data.name, target_geo_def, fill_value, kwargs
+        )
+        token = tokenize(fornav_task_name, product.product_dir, update)
+        task_name = "accumulate-ewa-" + token
+        commit_key = None
+        if update is not None:
+            commit_key = ("accumulate-ewa-commit-" + token,)
+            create_key = ("accumulate-ewa-create-" + token,)
+            tasks[create_key] = (product.create_pending,)
+            add_keys = []
+            for out_row_idx, out_col_idx, y_slice, x_slice in _iter_chunk_slices(out_chunks):
+                add_key = ("accumulate-ewa-add-" + token, out_row_idx, out_col_idx)
+                granule_keys = [
+                    (fornav_task_name, z_idx, out_row_idx, out_col_idx) for z_idx in range(len(ll2cr_blocks))
+                ]
+                tasks[add_key] = (
+                    _add_fornav_chunk,
+                    product,
+                    update[1],
+                    (y_slice, x_slice),
+                    granule_keys,
+                    maximum_weight_mode,
+                    create_key,
+                )
+                add_keys.append(add_key)
+            tasks[commit_key] = (_commit_update, product, update, times, add_keys)
+        filenames = (product.filenames["weights"], product.filenames["accums"])
+        for out_row_idx, out_col_idx, y_slice, x_slice in _iter_chunk_slices(out_chunks):
+            tasks[(task_name, out_row_idx, out_col_idx)] = (
+                _normalize_stored_chunk,
+                filenames,
+                y_slice,
+                x_slice,
+                fill_value,
+                data.dtype,
+                weight_sum_min,
+                maximum_weight_mode,
+                commit_key,
+            )
+        dsk_graph = HighLevelGraph.from_collections(task_name, tasks, dependencies=[data, ll2cr_result])
+        return da.Array(dsk_graph, task_name, out_chunks, data.dtype)
+
+
+def _iter_chunk_slices(out_chunks: tuple):
+    row_starts = np.cumsum((0,) + out_chunks[0])
+    col_starts = np.cumsum((0,) + out_chunks[1])
+    for out_row_idx in range(len(out_chunks[0])):
+        y_slice = slice(int(row_starts[out_row_idx]), int(row_starts[out_row_idx + 1]))
+        for out_col_idx in range(len(out_chunks[1])):
+            x_slice = slice(int(col_starts[out_col_idx]), int(col_starts[out_col_idx + 1]))
+            yield out_row_idx, out_col_idx, y_slice, x_slice
+
+
+def _add_fornav_chunk(
+    product: StoredProduct,
+    new_pass: bool,
+    index: tuple[slice, slice],
+    granule_results: list,
+    maximum_weight_mode: bool,
+    _pending_created,
+) -> None:
+    """Add the weights and accumulations of the granules to one chunk of the state and write it as pending."""
+    weights = product.read("weights", index, new_pass)
+    accums = product.read("accums", index, new_pass)
+    for granule_weights, granule_accums in granule_results:
+        if isinstance(granule_weights, tuple):
+            # granule doesn't overlap this chunk
+            continue
+        if maximum_weight_mode:
+            is_max = granule_weights > weights
+            weights[is_max] = granule_weights[is_max]
+            accums[is_max] = granule_accums[is_max]
+        else:
+            weights += granule_weights
+            accums += granule_accums
+    product.write_pending("weights", index, weights)
+    product.write_pending("accums", index, accums)
+
+
+def _commit_update(product: StoredProduct, update: tuple, times: list, _written_chunks: list) -> None:
+    """Commit the pending state once every chunk of it has been written."""
+    product.commit(update, times)
+
+
+def _normalize_stored_chunk(
+    filenames: tuple[str, str],
+    y_slice: slice,
+    x_slice: slice,
+    fill_value,
+    dtype,
+    weight_sum_min: float,
+    maximum_weight_mode: bool,
+    _committed,
+) -> np.ndarray:
+    """Normalize one chunk of the stored accumulations by the stored weights."""
+    weights = np.array(np.load(filenames[0], mmap_mode="r")[y_slice, x_slice])
+    accums = np.array(np.load(filenames[1], mmap_mode="r")[y_slice, x_slice])
+    out = np.full(weights.shape, fill_value, dtype=dtype)
+    write_grid_image_single(
+        out, weights, accums, fill_value, weight_sum_min=weight_sum_min, maximum_weight_mode=maximum_weight_mode
+    )
+    return out
+
+
+class AccumulatingNearestResampler(GranuleNearestResampler):
+    """Nearest neighbor resampler merging every execution's granules with the nearest pixels in a store."""
+
+    def __init__(self, source_geo_def: SwathDefinition, target_geo_def: AreaDefinition):
+        """Initialize resampler and check that the source is a swath and the target a grid."""
+        _check_geometries(source_geo_def, target_geo_def)
+        super().__init__(source_geo_def, target_geo_def)
+        self.store_dir: Optional[str] = None
+        self._start_time: Optional[datetime] = None
+
+    def compute(self, data: xr.DataArray, cache_id=None, fill_value=np.nan, store_dir=None, **kwargs) -> xr.DataArray:
+        """Merge the data with the stored state and produce the output for the entire pass."""
+        self.store_dir = _check_store_dir(store_dir)
+        res = super().compute(data, cache_id=cache_id, fill_value=fill_value, **kwargs)
+        res.attrs["start_time"] = self._start_time
+        return res
+
+    def _mosaic(self, data: xr.DataArray, out_shape: tuple, dtype, fill_value, granule_values: list):
+        product = StoredProduct.from_data_array(
+            self.store_dir,
+            "nearest",
+            data,
+            self.target_geo_def,
+            {
+                "distance": (out_shape[-2:], np.float64, np.inf),
+                "values": (out_shape, dtype, fill_value),
+            },
+        )
+        self._start_time = product.pass_start_time(data.attrs)
+        times = granule_times(data.attrs, self._granule_rows)
+        update = product.plan_update(data.attrs.get("platform_name"), times)
+        granule_values = [] if update is None else [granule_values[granule_idx] for granule_idx in update[3]]
+        return dask.delayed(_mosaic_into_store, pure=True)(product, update, times, *granule_values)
+
+
+def _mosaic_into_store(product: StoredProduct, update: Optional[tuple], times: list, *granule_values) -> np.ndarray:
+    """Merge the nearest pixels of the granules with the stored nearest pixels and commit the result."""
+    new_pass = update is not None and update[1]
+    best_distance = product.read("distance", Ellipsis, new_pass)
+    result = product.read("values", Ellipsis, new_pass)
+    if update is not None:
+        merge_granules(result, best_distance, granule_values)
+        product.create_pending()
+        product.write_pending("distance", Ellipsis, best_distance)
+        product.write_pending("values", Ellipsis, result)
+        product.commit(update, times)
+    return result
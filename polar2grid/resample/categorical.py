@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Resample categorical (class or flag) swath products by majority vote.
+
+Products like CLAVR-x ``cloud_type`` and ``cloud_phase`` or the VIIRS EDR
+``CloudPhase`` contain category values where averaging makes no sense. EWA
+resampling with ``maximum_weight_mode`` handles these but carries a floating
+point weight for every category of every output pixel. The
+:class:`CategoricalResampler` instead maps every swath pixel to the grid cell
+containing its center using the same ``ll2cr`` step as EWA, counts the
+occurrences of every category per cell with integer reductions, and keeps the
+most frequent category of each cell. Ties are won by the smallest category
+value. The data type of the input is kept.
+
+Grid cells that are finer than the swath pixels (ex. at the edge of a scan)
+may not contain any pixel center. Such a cell is only filled if it is inside
+the swath: it must have cells containing pixel centers on opposite sides
+within ``gap_distance`` cells. It then gets the most frequent category of its
+neighbors with a valid category. Cells containing only invalid pixels and
+cells outside of the swath stay invalid like with EWA's
+``maximum_weight_mode``. Grids more than about twice as fine as the swath
+pixels have gaps wider than the default ``gap_distance`` of 1 cell and will
+show holes unless ``gap_distance`` is increased.
+
+Use the resampler by setting ``resampler: categorical`` in
+``resampling.yaml``.
+
+"""
+
+from __future__ import annotations
+
+import logging
+
+import dask
+import dask.array as da
+import numpy as np
+import xarray as xr
+from pyresample.ewa import ll2cr
+from pyresample.geometry import AreaDefinition, SwathDefinition
+from pyresample.resampler import BaseResampler
+
+from polar2grid.resample._utils import update_resampled_coords
+
+LOG = logging.getLogger(__name__)
+
+NEIGHBOR_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+# one direction of every axis through a cell: vertical, horizontal, and both diagonals
+AXIS_OFFSETS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+class CategoricalResampler(BaseResampler):
+    """Resampler keeping the most frequent category of the swath pixels in every target grid cell."""
+
+    def __init__(self, source_geo_def: SwathDefinition, target_geo_def: AreaDefinition):
+        """Initialize resampler and check that the source is a swath and the target a grid."""
+        if not isinstance(source_geo_def, SwathDefinition):
+            raise TypeError("Categorical resampling requires a SwathDefinition source.")
+        if not isinstance(target_geo_def, AreaDefinition):
+            raise TypeError("Categorical resampling requires an AreaDefinition target.")
+        super().__init__(source_geo_def, target_geo_def)
+        self._cell_indexes = None
+
+    def precompute(self, **kwargs):
+        """Find the flattened index of the target grid cell containing every swath pixel."""
+        del kwargs
+        if self._cell_indexes is None:
+            lons = _as_dask(self.source_geo_def.lons)
+            lats = _as_dask(self.source_geo_def.lats)
+            self._cell_indexes = da.map_blocks(
+                _get_cell_indexes, lons, lats, self.target_geo_def, dtype=np.int64, meta=np.array((), dtype=np.int64)
+            )
+        return None
+
+    def compute(self, data: xr.DataArray, cache_id=None, fill_value=None, gap_distance: int = 1, **kwargs):
+        """Keep the most frequent valid category of every target grid cell."""
+        del cache_id, kwargs
+        if data.ndim != 2:
+            raise ValueError("Categorical resampling only supports 2D (y, x) data.")
+        in_fill_value = data.attrs.get("_FillValue")
+        if fill_value is None:
+            fill_value = _get_default_fill(data.dtype, in_fill_value)
+        values = _as_dask(data).rechunk(self._cell_indexes.chunks)
+        block_counts = [
+            dask.delayed(_count_block_categories, pure=True)(cell_block, value_block, in_fill_value)
+            for cell_block, value_block in zip(
+                self._cell_indexes.to_delayed().ravel(), values.to_delayed().ravel(), strict=True
+            )
+        ]
+        out_shape = self.target_geo_def.shape
+        majority = dask.delayed(_majority_categories, pure=True)(
+            block_counts, out_shape, fill_value, data.dtype, gap_distance
+        )
+        res = da.from_delayed(majority, out_shape, dtype=data.dtype).rechunk(values.chunksize)
+        res = xr.DataArray(res, dims=data.dims)
+        return update_resampled_coords(data, res, self.target_geo_def)
+
+
+def _as_dask(data_arr) -> da.Array:
+    data = getattr(data_arr, "data", data_arr)
+    return data if isinstance(data, da.Array) else da.from_array(data)
+
+
+def _get_default_fill(dtype: np.dtype, in_fill_value):
+    if in_fill_value is not None:
+        return in_fill_value
+    if np.issubdtype(dtype, np.integer):
+        return np.iinfo(dtype).max
+    return np.nan
+
+
+def _get_cell_indexes(lons: np.ndarray, lats: np.ndarray, target_area: AreaDefinition) -> np.ndarray:
+    """Get the flattened index of the grid cell containing each pixel center or -1 if it isn't in the grid."""
+    _, cols, rows = ll2cr(SwathDefinition(lons, lats), target_area)
+    # ll2cr columns and rows are whole numbers at the center of the grid cells
+    with np.errstate(invalid="ignore"):
+        cols = np.floor(cols + 0.5)
+        rows = np.floor(rows + 0.5)
+        in_grid = (cols >= 0) & (cols < target_area.width) & (rows >= 0) & (rows < target_area.height)
+    cell_indexes = np.full(lons.shape, -1, dtype=np.int64)
+    cell_indexes[in_grid] = rows[in_grid].astype(np.int64) * target_area.width + cols[in_grid].astype(np.int64)
+    return cell_indexes
+
+
+def _count_block_categories(cell_indexes: np.ndarray, values: np.ndarray, in_fill_value) -> tuple:
+    """Count the valid pixels of every (grid cell, category) pair of one swath block.
+
+    Returns:
+        Grid cell, category, and number of pixels of every pair, and every
+        grid cell containing any (valid or invalid) pixel of the block.
+
+    """
+    valid = cell_indexes >= 0
+    covered_cells = np.unique(cell_indexes[valid])
+    if np.issubdtype(values.dtype, np.floating):
+        valid &= np.isfinite(values)
+    if in_fill_value is not None:
+        valid &= values != in_fill_value
+    categories, category_codes = np.unique(values[valid], return_inverse=True)
+    num_categories = max(categories.size, 1)
+    pair_keys = cell_indexes[valid] * num_categories + category_codes.ravel()
+    unique_keys, counts = np.unique(pair_keys, return_counts=True)
+    return unique_keys // num_categories, categories[unique_keys % num_categories], counts, covered_cells
+
+
+def _majority_categories(block_counts: list, out_shape: tuple, fill_value, dtype: np.dtype, gap_distance: int):
+    """Combine the per-block counts and keep the most frequent category of every grid cell."""
+    cells = np.concatenate([block[0] for block in block_counts])
+    categories = np.concatenate([block[1] for block in block_counts]).astype(dtype, copy=False)
+    counts = np.concatenate([block[2] for block in block_counts])
+    # the same (cell, category) pair may be counted in multiple blocks
+    category_values, category_codes = np.unique(categories, return_inverse=True)
+    num_categories = max(category_values.size, 1)
+    unique_keys, pair_indexes = np.unique(cells * num_categories + category_codes.ravel(), return_inverse=True)
+    pair_counts = np.bincount(pair_indexes.ravel(), weights=counts).astype(np.int64)
+    pair_cells = unique_keys // num_categories
+    pair_categories = category_values[unique_keys % num_categories]
+
+    # sort by cell, then by descending count, so the first pair of each cell is its majority
+    order = np.lexsort((-pair_counts, pair_cells))
+    pair_cells = pair_cells[order]
+    is_first = np.ones(pair_cells.shape, dtype=bool)
+    is_first[1:] = pair_cells[1:] != pair_cells[:-1]
+
+    result = np.full(out_shape[0] * out_shape[1], fill_value, dtype=dtype)
+    result[pair_cells[is_first]] = pair_categories[order][is_first]
+    result = result.reshape(out_shape)
+    filled = np.zeros(result.size, dtype=bool)
+    filled[pair_cells] = True
+    filled = filled.reshape(out_shape)
+    covered = np.zeros(result.size, dtype=bool)
+    covered[np.concatenate([block[3] for block in block_counts])] = True
+    covered = covered.reshape(out_shape)
+    if gap_distance > 0:
+        fillable = _interior_gaps(covered, gap_distance)
+        for _ in range(gap_distance):
+            if not _fill_gaps(result, filled, fillable):
+                break
+    return result
+
+
+def _interior_gaps(covered: np.ndarray, gap_distance: int) -> np.ndarray:
+    """Find cells without pixels that have cells with pixels on opposite sides within ``gap_distance`` cells."""
+    padded_covered = np.pad(covered, gap_distance)
+    interior = np.zeros(covered.shape, dtype=bool)
+    for row_offset, col_offset in AXIS_OFFSETS:
+        forward = np.zeros(covered.shape, dtype=bool)
+        backward = np.zeros(covered.shape, dtype=bool)
+        for distance in range(1, gap_distance + 1):
+            forward |= _shifted(padded_covered, row_offset * distance, col_offset * distance, gap_distance)
+            backward |= _shifted(padded_covered, -row_offset * distance, -col_offset * distance, gap_distance)
+        interior |= forward & backward
+    return interior & ~covered
+
+
+def _fill_gaps(result: np.ndarray, filled: np.ndarray, fillable: np.ndarray) -> bool:
+    """Set fillable empty cells next to filled cells to the most frequent category of their filled neighbors."""
+    padded_filled = np.pad(filled, 1)
+    has_neighbor = np.zeros(filled.shape, dtype=bool)
+    for row_offset, col_offset in NEIGHBOR_OFFSETS:
+        has_neighbor |= _shifted(padded_filled, row_offset, col_offset)
+    gap_rows, gap_cols = np.nonzero(has_neighbor & ~filled & fillable)
+    if gap_rows.size == 0:
+        return False
+
+    padded_result = np.pad(result, 1)
+    neighbor_rows = gap_rows[:, None] + 1 + np.array([offset[0] for offset in NEIGHBOR_OFFSETS])
+    neighbor_cols = gap_cols[:, None] + 1 + np.array([offset[1] for offset in NEIGHBOR_OFFSETS])
+    neighbor_values = padded_result[neighbor_rows, neighbor_cols]
+    neighbor_filled = padded_filled[neighbor_rows, neighbor_cols]
+    # number of filled neighbors sharing the category of each neighbor
+    same_category = neighbor_values[:, :, None] == neighbor_values[:, None, :]
+    votes = (same_category & neighbor_filled[:, None, :]).sum(axis=2)
+    votes = np.where(neighbor_filled, votes, -1)
+    # prefer the smallest category between neighbors with the same number of votes
+    is_candidate = votes == votes.max(axis=1, keepdims=True)
+    candidates = np.where(is_candidate, neighbor_values, neighbor_values[neighbor_filled].max())
+    result[gap_rows, gap_cols] = candidates.min(axis=1)
+    filled[gap_rows, gap_cols] = True
+    return True
+
+
+def _shifted(padded: np.ndarray, row_offset: int, col_offset: int, pad_width: int = 1) -> np.ndarray:
+    rows, cols = padded.shape[0] - 2 * pad_width, padded.shape[1] - 2 * pad_width
+    row_start = pad_width + row_offset
+    col_start = pad_width + col_offset
+    return padded[row_start : row_start + rows, col_start : col_start + cols]
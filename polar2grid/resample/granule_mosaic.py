@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Nearest neighbor resampling of long swaths one granule at a time.
+
+Satpy's ``nearest`` resampler builds a single KDTree from the geolocation of
+the entire swath and needs all of the swath's data in memory to gather the
+output pixels. For a long pass of many granules concatenated together this
+means memory usage grows with the length of the pass and most of the work
+happens in one task.
+
+:class:`GranuleNearestResampler` treats every row chunk of the swath, usually
+one granule, separately:
+
+1. A KDTree is built from the granule's valid geolocation and queried for the
+   target pixels in the granule's bounding box on the target grid, resulting
+   in a distance and source pixel for each of those target pixels.
+2. The distance and data value pairs of every granule are merged in to one
+   output grid by keeping the value of the nearest source pixel.
+
+The nearest source pixel over the whole swath is also the nearest of the
+nearest pixels of each granule so the result is the same as using Satpy's
+``nearest`` resampler on the concatenated swath.
+
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+import dask
+import dask.array as da
+import numpy as np
+import xarray as xr
+from pykdtree.kdtree import KDTree
+from pyproj import Transformer
+from pyresample.geometry import AreaDefinition, SwathDefinition
+from pyresample.kd_tree import XArrayResamplerNN, lonlat2xyz
+from pyresample.resampler import BaseResampler
+
+from polar2grid.resample._utils import update_resampled_coords
+
+LOG = logging.getLogger(__name__)
+
+
+class GranuleNearestResampler(BaseResampler):
+    """Nearest neighbor resampler processing every row chunk (granule) of a swath independently.
+
+    Produces the same result as Satpy's ``nearest`` resampler.
+
+    """
+
+    def __init__(self, source_geo_def: SwathDefinition, target_geo_def: AreaDefinition):
+        """Initialize resampler and check that the source is a swath and the target a grid."""
+        if not isinstance(source_geo_def, SwathDefinition) or not isinstance(target_geo_def, AreaDefinition):
+            raise TypeError("Granule mosaicking requires a SwathDefinition source and an AreaDefinition target.")
+        super().__init__(source_geo_def, target_geo_def)
+        self._neighbours: dict = {}
+        self._granule_rows: tuple = ()
+
+    def precompute(self, mask=None, radius_of_influence=None, epsilon=0, **kwargs):
+        """Query the nearest source pixel of every granule for the target pixels the granule overlaps."""
+        del kwargs
+        if radius_of_influence is None:
+            radius_of_influence = XArrayResamplerNN(self.source_geo_def, self.target_geo_def).radius_of_influence
+        lons = _as_dask(self.source_geo_def.lons)
+        lons = lons.rechunk((lons.chunks[0], -1))
+        self._granule_rows = lons.chunks[0]
+        mask = None if mask is None else _as_dask(mask).rechunk(lons.chunks)
+        cache_key = (dask.base.tokenize(mask), radius_of_influence, epsilon)
+        if cache_key not in self._neighbours:
+            self._neighbours[cache_key] = _query_granules(
+                lons,
+                _as_dask(self.source_geo_def.lats).rechunk(lons.chunks),
+                mask,
+                self.target_geo_def,
+                radius_of_influence,
+                epsilon,
+            )
+        return cache_key
+
+    def compute(self, data: xr.DataArray, cache_id=None, fill_value=np.nan, **kwargs) -> xr.DataArray:
+        """Gather the nearest pixel of every granule and mosaic them on the target grid."""
+        del kwargs
+        LOG.debug("Resampling %s one granule at a time", data.name)
+        if fill_value is not None and np.isnan(fill_value) and np.issubdtype(data.dtype, np.integer):
+            fill_value = data.attrs.get("_FillValue", np.iinfo(data.dtype).max)
+        granule_neighbours = self._neighbours[cache_id]
+        src = _as_dask(data)
+        src = src.rechunk(src.chunks[:-2] + (self._granule_rows, -1))
+        granule_values = [
+            dask.delayed(_gather_granule, pure=True)(neighbours, src.blocks[..., granule_idx, 0])
+            for granule_idx, neighbours in enumerate(granule_neighbours)
+        ]
+        out_shape = src.shape[:-2] + self.target_geo_def.shape
+        mosaic = self._mosaic(data, out_shape, src.dtype, fill_value, granule_values)
+        res = da.from_delayed(mosaic, out_shape, dtype=src.dtype).rechunk(src.chunksize[:-2] + ("auto", "auto"))
+        res = xr.DataArray(res, dims=data.dims)
+        return update_resampled_coords(data, res, self.target_geo_def)
+
+    def _mosaic(self, data: xr.DataArray, out_shape: tuple, dtype, fill_value, granule_values: list):
+        """Create the delayed task merging the gathered values of every granule."""
+        del data
+        return dask.delayed(_mosaic_granules, pure=True)(out_shape, dtype, fill_value, *granule_values)
+
+
+def _as_dask(data_arr) -> da.Array:
+    data = getattr(data_arr, "data", data_arr)
+    return data if isinstance(data, da.Array) else da.from_array(data)
+
+
+def _query_granules(lons, lats, mask, target_area, radius_of_influence, epsilon) -> list:
+    target_res = target_area.geocentric_resolution()
+    neighbours = []
+    for granule_idx in range(lons.numblocks[0]):
+        granule_mask = None if mask is None else mask.blocks[granule_idx, 0]
+        neighbours.append(
+            dask.delayed(_query_granule, pure=True)(
+                lons.blocks[granule_idx, 0],
+                lats.blocks[granule_idx, 0],
+                granule_mask,
+                target_area,
+                target_res,
+                radius_of_influence,
+                epsilon,
+            )
+        )
+    return neighbours
+
+
+def _query_granule(lons, lats, mask, target_area, target_res, radius_of_influence, epsilon) -> Optional[tuple]:
+    """Get the distance to and index of the nearest valid granule pixel for target pixels around the granule."""
+    valid_input = (lons >= -180) & (lons <= 180) & (lats >= -90) & (lats <= 90)
+    if mask is not None:
+        valid_input &= ~mask
+    if not valid_input.any():
+        return None
+    window = _target_window(lons[valid_input], lats[valid_input], target_area, target_res, radius_of_influence)
+    if window is None:
+        return None
+    target_lons, target_lats = target_area[window].get_lonlats()
+    valid_output = (target_lons >= -180) & (target_lons <= 180) & (target_lats >= -90) & (target_lats <= 90)
+    kdtree = KDTree(lonlat2xyz(lons[valid_input], lats[valid_input]).astype(np.float64))
+    distances, valid_indexes = kdtree.query(
+        lonlat2xyz(target_lons[valid_output], target_lats[valid_output]).astype(np.float64),
+        k=1,
+        eps=epsilon,
+        distance_upper_bound=radius_of_influence,
+    )
+    found = valid_indexes < kdtree.n
+    window_distances = np.full(target_lons.shape, np.inf)
+    window_indexes = np.full(target_lons.shape, -1, dtype=np.int64)
+    window_distances[valid_output] = np.where(found, distances, np.inf)
+    window_indexes[valid_output] = np.where(
+        found, np.flatnonzero(valid_input)[np.minimum(valid_indexes, kdtree.n - 1)], -1
+    )
+    return window, window_distances, window_indexes
+
+
+def _target_window(lons, lats, target_area, target_res, radius_of_influence) -> Optional[tuple[slice, slice]]:
+    """Get the target rows and columns that may be within the radius of influence of the granule."""
+    transformer = Transformer.from_crs("EPSG:4326", target_area.crs, always_xy=True)
+    xs, ys = transformer.transform(lons, lats)
+    valid = np.isfinite(xs) & np.isfinite(ys)
+    if not valid.any():
+        return None
+    x_min, y_min, x_max, y_max = target_area.area_extent
+    cols = (xs[valid] - x_min) / target_area.pixel_size_x
+    rows = (y_max - ys[valid]) / target_area.pixel_size_y
+    # pixel sizes vary across most grids, be generous
+    margin = int(np.ceil(2 * radius_of_influence / target_res)) + 1
+    row_start = max(int(np.floor(rows.min())) - margin, 0)
+    row_end = min(int(np.ceil(rows.max())) + margin + 1, target_area.height)
+    col_start = max(int(np.floor(cols.min())) - margin, 0)
+    col_end = min(int(np.ceil(cols.max())) + margin + 1, target_area.width)
+    if row_start >= row_end or col_start >= col_end:
+        return None
+    return slice(row_start, row_end), slice(col_start, col_end)
+
+
+def _gather_granule(neighbours: Optional[tuple], granule_data: np.ndarray) -> Optional[tuple]:
+    if neighbours is None:
+        return None
+    window, distances, indexes = neighbours
+    found = indexes >= 0
+    flat_data = granule_data.reshape(granule_data.shape[:-2] + (-1,))
+    values = flat_data[..., indexes[found]]
+    return window, distances, found, values
+
+
+def _mosaic_granules(out_shape: tuple, dtype, fill_value, *granule_values) -> np.ndarray:
+    """Keep the value of the nearest source pixel of all granules for every target pixel."""
+    result = np.full(out_shape, fill_value, dtype=dtype)
+    best_distance = np.full(out_shape[-2:], np.inf)
+    merge_granules(result, best_distance, granule_values)
+    return result
+
+
+def merge_granules(result: np.ndarray, best_distance: np.ndarray, granule_values) -> None:
+    """Replace pixels of ``result`` in place where a granule has a nearer source pixel than ``best_distance``."""
+    for granule_value in granule_values:
+        if granule_value is None:
+            continue
+        window, distances, found, values = granule_value
+        window_distance = best_distance[window]
+        window_result = result[(Ellipsis,) + window]
+        granule_distances = distances[found]
+        is_nearer = granule_distances < window_distance[found]
+        nearer_pixels = tuple(idx[is_nearer] for idx in np.nonzero(found))
+        window_distance[nearer_pixels] = granule_distances[is_nearer]
+        window_result[(Ellipsis,) + nearer_pixels] = values[..., is_nearer]
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Resample sparse 1D point data by binning it in to target grid cells.
+
+Point products (ex. ``viirs_edr_active_fires`` detections) are 1D "swaths"
+of unrelated points. Instead of building a KDTree of the points and querying
+it for every target pixel, :class:`PointBinResampler` projects all points to
+the target projection with a single pyproj transform, finds the grid cell
+containing every point, and reduces the values of the points in every cell
+with one of the following statistics:
+
+* ``max`` (default): largest value in the cell (ex. maximum fire radiative
+  power or confidence).
+* ``min``: smallest value in the cell.
+* ``sum``: sum of the values in the cell.
+* ``mean``: average of the values in the cell.
+* ``count``: number of valid points in the cell.
+
+Cells without any valid points are set to the fill value, the product's
+``_FillValue`` for integer products or the largest value of the integer data
+type if the product has no ``_FillValue``. Integer products keep their data
+type for ``max`` and ``min`` while ``sum`` and ``mean`` produce floats. Use
+the resampler by setting ``resampler: point_bin`` in ``resampling.yaml`` and
+the statistic with ``kwargs: {statistic: max}``.
+
+Binning is done in a single dask task that loads every point of the product
+and fills the entire target grid, which is only rechunked afterwards. This
+is meant for sparse point products where the number of points is small. The
+memory used is that of all the points plus the full output grid.
+
+"""
+
+from __future__ import annotations
+
+import logging
+
+import dask
+import dask.array as da
+import numpy as np
+import xarray as xr
+from pyproj import Transformer
+from pyresample.geometry import AreaDefinition, SwathDefinition
+from pyresample.resampler import BaseResampler
+
+from polar2grid.resample._utils import update_resampled_coords
+
+LOG = logging.getLogger(__name__)
+
+STATISTICS = ("max", "min", "sum", "mean", "count")
+
+
+class PointBinResampler(BaseResampler):
+    """Resampler reducing 1D point data in to the target grid cells containing each point."""
+
+    def __init__(self, source_geo_def: SwathDefinition, target_geo_def: AreaDefinition):
+        """Initialize resampler and check that the source is 1D points and the target a grid."""
+        if not isinstance(source_geo_def, SwathDefinition) or source_geo_def.ndim != 1:
+            raise TypeError("Point binning requires a 1D SwathDefinition source.")
+        if not isinstance(target_geo_def, AreaDefinition):
+            raise TypeError("Point binning requires an AreaDefinition target.")
+        super().__init__(source_geo_def, target_geo_def)
+        self._cell_indexes = None
+
+    def precompute(self, **kwargs):
+        """Find the flattened index of the target grid cell containing every point."""
+        del kwargs
+        if self._cell_indexes is None:
+            lons = _as_dask(self.source_geo_def.lons)
+            lats = _as_dask(self.source_geo_def.lats)
+            self._cell_indexes = da.map_blocks(
+                _get_cell_indexes, lons, lats, self.target_geo_def, dtype=np.int64, meta=np.array((), dtype=np.int64)
+            )
+        return None
+
+    def compute(self, data: xr.DataArray, cache_id=None, fill_value=np.nan, statistic: str = "max", **kwargs):
+        """Reduce the valid values of the points in every target grid cell.
+
+        All points are loaded and the full grid is binned by one dask task.
+
+        """
+        del cache_id, kwargs
+        if statistic not in STATISTICS:
+            raise ValueError(f"Unknown point binning statistic '{statistic}'. Must be one of {STATISTICS}.")
+        out_dtype = _get_output_dtype(data.dtype, statistic)
+        if np.issubdtype(out_dtype, np.integer):
+            if fill_value is None or np.isnan(fill_value):
+                fill_value = data.attrs.get("_FillValue", np.iinfo(out_dtype).max)
+        elif fill_value is None or out_dtype != data.dtype:
+            fill_value = np.nan
+        values = _as_dask(data)
+        out_shape = values.shape[:-1] + self.target_geo_def.shape
+        binned = dask.delayed(_bin_points, pure=True)(
+            self._cell_indexes,
+            values,
+            out_shape,
+            statistic,
+            data.attrs.get("_FillValue"),
+            fill_value,
+            out_dtype,
+        )
+        res = da.from_delayed(binned, out_shape, dtype=out_dtype).rechunk(values.chunksize[:-1] + ("auto", "auto"))
+        res = xr.DataArray(res, dims=data.dims[:-1] + ("y", "x"))
+        if statistic != "count":
+            # the input's fill value doesn't apply to float results of integer products
+            res.attrs["_FillValue"] = fill_value
+        return update_resampled_coords(data, res, self.target_geo_def)
+
+
+def _as_dask(data_arr) -> da.Array:
+    data = getattr(data_arr, "data", data_arr)
+    return data if isinstance(data, da.Array) else da.from_array(data)
+
+
+def _get_output_dtype(in_dtype: np.dtype, statistic: str) -> np.dtype:
+    if statistic == "count":
+        return np.dtype(np.int32)
+    if statistic in ("sum", "mean") and np.issubdtype(in_dtype, np.integer):
+        return np.dtype(np.float32)
+    return np.dtype(in_dtype)
+
+
+def _get_cell_indexes(lons: np.ndarray, lats: np.ndarray, target_area: AreaDefinition) -> np.ndarray:
+    """Get the flattened index of the grid cell containing each point or -1 if it isn't in the grid."""
+    transformer = Transformer.from_crs("EPSG:4326", target_area.crs, always_xy=True)
+    with np.errstate(invalid="ignore"):
+        xs, ys = transformer.transform(lons, lats, errcheck=False)
+        x_min, _, _, y_max = target_area.area_extent
+        cols = np.floor((xs - x_min) / target_area.pixel_size_x)
+        rows = np.floor((y_max - ys) / target_area.pixel_size_y)
+        in_grid = (cols >= 0) & (cols < target_area.width) & (rows >= 0) & (rows < target_area.height)
+    cell_indexes = np.full(lons.shape, -1, dtype=np.int64)
+    cell_indexes[in_grid] = rows[in_grid].astype(np.int64) * target_area.width + cols[in_grid].astype(np.int64)
+    return cell_indexes
+
+
+def _bin_points(cell_indexes, values, out_shape, statistic, in_fill_value, fill_value, out_dtype) -> np.ndarray:
+    num_cells = out_shape[-2] * out_shape[-1]
+    flat_values = values.reshape((-1, values.shape[-1]))
+    binned = np.stack(
+        [
+            _bin_single(cell_indexes, single_values, num_cells, statistic, in_fill_value, fill_value, out_dtype)
+            for single_values in flat_values
+        ]
+    )
+    return binned.reshape(out_shape)
+
+
+def _bin_single(cell_indexes, values, num_cells, statistic, in_fill_value, fill_value, out_dtype) -> np.ndarray:
+    if np.issubdtype(values.dtype, np.integer):
+        valid = cell_indexes >= 0
+        if in_fill_value is not None:
+            valid &= values != in_fill_value
+    else:
+        valid = (cell_indexes >= 0) & np.isfinite(values)
+    cell_indexes = cell_indexes[valid]
+    values = values[valid]
+    counts = np.bincount(cell_indexes, minlength=num_cells)
+    if statistic == "count":
+        result = counts.astype(out_dtype)
+    elif statistic in ("sum", "mean"):
+        result = np.bincount(cell_indexes, weights=values, minlength=num_cells)
+        if statistic == "mean":
+            result[counts > 0] /= counts[counts > 0]
+        result = result.astype(out_dtype)
+    else:
+        reduce_ufunc = np.maximum if statistic == "max" else np.minimum
+        result = np.zeros(num_cells, dtype=out_dtype)
+        # any value of the cell is a valid start for the reduction
+        result[cell_indexes] = values
+        reduce_ufunc.at(result, cell_indexes, values)
+    if statistic != "count":
+        result[counts == 0] = fill_value
+    return result
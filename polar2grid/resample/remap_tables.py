@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Precomputed nearest neighbor remap tables for static grids.
+
+The fixed grid of a geostationary instrument sector never changes so
+nearest neighbor resampling to a static target grid produces the same
+neighbor mapping for every time step. Instead of searching a KDTree for every
+new frame the mapping is computed once and saved as a "remap table": an
+``.npy`` file holding the source row and column of every target pixel (``-1``
+where no source pixel is within the radius of influence). Tables are stored
+as the smallest integer type able to index the source grid and are
+memory-mapped when used so applying them to new data is a pure gather.
+
+Tables are keyed by the source grid, the target grid, and the nearest
+neighbor parameters and are saved in a ``polar2grid_remap_tables`` directory
+of Satpy's ``cache_dir`` or in the directory specified with ``--cache-dir``.
+Only the most recently used tables are kept (see
+``P2G_REMAP_TABLE_CACHE_SIZE``, default 32).
+
+Tables are created on first use by Geo2Grid readers that enable them or can
+be created ahead of time for every configured sector with this module's
+command line interface::
+
+    python -m polar2grid.resample.remap_tables -s goes_east_abi_c_1km -g lcc_conus_1km
+
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+from typing import Optional
+
+import dask
+import dask.array as da
+import numpy as np
+import xarray as xr
+from pyresample.geometry import AreaDefinition
+from pyresample.resampler import BaseResampler
+
+from polar2grid.grids.lonlat_cache import _prune_cache_dir, get_lonlat_cache_key
+from polar2grid.resample._utils import update_resampled_coords
+
+LOG = logging.getLogger(__name__)
+
+CACHE_SUBDIR = "polar2grid_remap_tables"
+TABLE_PREFIX = "remap_"
+
+
+class RemapTableResampler(BaseResampler):
+    """Nearest neighbor resampler applying a precomputed remap table.
+
+    Produces the same result as Satpy's ``nearest`` resampler for
+    :class:`~pyresample.geometry.AreaDefinition` sources and targets. The
+    remap table is created on first use and reused for all future data on
+    the same source grid.
+
+    """
+
+    def __init__(self, source_geo_def: AreaDefinition, target_geo_def: AreaDefinition):
+        """Initialize resampler and check that both geometries are static grids."""
+        if not isinstance(source_geo_def, AreaDefinition) or not isinstance(target_geo_def, AreaDefinition):
+            raise TypeError("Remap tables can only be used between two AreaDefinitions.")
+        super().__init__(source_geo_def, target_geo_def)
+        self._table_filename: Optional[str] = None
+        self._block_bounds: dict = {}
+
+    def precompute(self, radius_of_influence=None, epsilon=0, cache_dir=None, **kwargs):
+        """Load the remap table for this resampler's geometries, creating it if needed."""
+        del kwargs
+        self._table_filename = get_remap_table(
+            self.source_geo_def,
+            self.target_geo_def,
+            radius_of_influence=radius_of_influence,
+            epsilon=epsilon,
+            cache_dir=cache_dir,
+        )
+        return self._table_filename
+
+    def compute(self, data: xr.DataArray, fill_value=np.nan, **kwargs) -> xr.DataArray:
+        """Gather ``data`` pixels to the target grid using the remap table."""
+        del kwargs
+        LOG.debug("Resampling %s with remap table %s", data.name, self._table_filename)
+        if data.dims[-2:] != ("y", "x"):
+            raise ValueError("Remap table resampling requires 'y' and 'x' as the last data dimensions.")
+        src = data.data if isinstance(data.data, da.Array) else da.from_array(data.data)
+        chunks = (src.chunks[-2][0], src.chunks[-1][0])
+        block_bounds = self._get_block_bounds(chunks)
+        if np.issubdtype(src.dtype, np.integer):
+            # like Satpy's nearest resampler, keep integer data integers
+            if fill_value is None or np.isnan(fill_value):
+                fill_value = data.attrs.get("_FillValue", np.iinfo(src.dtype).max)
+            dtype = src.dtype
+        else:
+            dtype = np.result_type(src.dtype, fill_value)
+        res = _gather_with_remap_table(src, self._table_filename, block_bounds, fill_value, dtype)
+        res = xr.DataArray(res, dims=data.dims)
+        return update_resampled_coords(data, res, self.target_geo_def)
+
+    def _get_block_bounds(self, chunks: tuple[int, int]) -> list[list[tuple]]:
+        if chunks not in self._block_bounds:
+            table = np.load(self._table_filename, mmap_mode="r")
+            self._block_bounds[chunks] = _compute_block_bounds(table, chunks)
+        return self._block_bounds[chunks]
+
+
+def get_remap_table(
+    source_area: AreaDefinition,
+    target_area: AreaDefinition,
+    radius_of_influence: Optional[float] = None,
+    epsilon: float = 0,
+    cache_dir: Optional[str] = None,
+) -> str:
+    """Get the filename of the remap table between two areas, creating the table if needed."""
+    if cache_dir is None:
+        cache_dir = _get_cache_dir()
+    cache_key = get_remap_table_key(source_area, target_area, radius_of_influence=radius_of_influence, epsilon=epsilon)
+    table_fn = os.path.join(cache_dir, f"{TABLE_PREFIX}{cache_key}.npy")
+    if os.path.isfile(table_fn):
+        LOG.debug("Using remap table for %s -> %s: %s", source_area.area_id, target_area.area_id, table_fn)
+        # mark as recently used
+        os.utime(table_fn)
+        return table_fn
+
+    LOG.info("Creating remap table for %s -> %s in %s", source_area.area_id, target_area.area_id, table_fn)
+    os.makedirs(cache_dir, exist_ok=True)
+    source_indexes = _compute_nearest_source_indexes(source_area, target_area, radius_of_influence, epsilon)
+    _save_remap_table(source_indexes, source_area.shape, table_fn)
+    _prune_cache_dir(cache_dir, _get_cache_size(), prefix=TABLE_PREFIX)
+    return table_fn
+
+
+def get_remap_table_key(
+    source_area: AreaDefinition,
+    target_area: AreaDefinition,
+    radius_of_influence: Optional[float] = None,
+    epsilon: float = 0,
+) -> str:
+    """Get a unique key for the remap table between two areas."""
+    key_parts = (
+        get_lonlat_cache_key(source_area),
+        get_lonlat_cache_key(target_area),
+        None if radius_of_influence is None else float(radius_of_influence),
+        float(epsilon),
+    )
+    return hashlib.sha1(repr(key_parts).encode()).hexdigest()
+
+
+def _get_cache_size() -> int:
+    return int(os.environ.get("P2G_REMAP_TABLE_CACHE_SIZE", "32"))
+
+
+def _get_cache_dir() -> str:
+    import satpy
+
+    return os.path.join(satpy.config.get("cache_dir"), CACHE_SUBDIR)
+
+
+def _compute_nearest_source_indexes(
+    source_area: AreaDefinition,
+    target_area: AreaDefinition,
+    radius_of_influence: Optional[float],
+    epsilon: float,
+) -> da.Array:
+    """Resample the flat index of every source pixel with Satpy's nearest neighbor resampler."""
+    from satpy.resample.kdtree import KDTreeResampler
+
+    src_chunks = "auto"
+    flat_indexes = da.arange(source_area.size, dtype=np.float64, chunks=src_chunks).reshape(source_area.shape)
+    flat_indexes = xr.DataArray(flat_indexes.rechunk(src_chunks), dims=("y", "x"))
+    resampler = KDTreeResampler(source_area, target_area)
+    dst_indexes = resampler.resample(
+        flat_indexes, radius_of_influence=radius_of_influence, epsilon=epsilon, fill_value=np.nan
+    )
+    return dst_indexes.data
+
+
+def _table_dtype(source_shape: tuple[int, int]) -> np.dtype:
+    return np.dtype(np.int16) if max(source_shape) <= np.iinfo(np.int16).max else np.dtype(np.int32)
+
+
+def _save_remap_table(source_indexes: da.Array, source_shape: tuple[int, int], table_fn: str) -> None:
+    dtype = _table_dtype(source_shape)
+    invalid = da.isnan(source_indexes)
+    flat_indexes = da.where(invalid, 0, source_indexes).astype(np.int64)
+    rows = da.where(invalid, -1, flat_indexes // source_shape[1]).astype(dtype)
+    cols = da.where(invalid, -1, flat_indexes % source_shape[1]).astype(dtype)
+
+    cache_dir = os.path.dirname(table_fn)
+    tmp_fd, tmp_fn = tempfile.mkstemp(suffix=".npy", dir=cache_dir)
+    os.close(tmp_fd)
+    try:
+        table = np.lib.format.open_memmap(tmp_fn, mode="w+", dtype=dtype, shape=(2,) + source_indexes.shape)
+        da.store([rows, cols], [table[0], table[1]], lock=False)
+        table.flush()
+        del table
+        # another process may have created the same file, either is fine
+        os.replace(tmp_fn, table_fn)
+    except BaseException:
+        os.remove(tmp_fn)
+        raise
+
+
+def _compute_block_bounds(table: np.ndarray, chunks: tuple[int, int]) -> list[list[tuple]]:
+    """Get the target slices and the source row/column range needed for every target block.
+
+    The source range is ``None`` for target blocks without any valid source
+    pixel.
+
+    """
+    block_bounds = []
+    for y_start in range(0, table.shape[1], chunks[0]):
+        y_slice = slice(y_start, min(y_start + chunks[0], table.shape[1]))
+        block_row = []
+        for x_start in range(0, table.shape[2], chunks[1]):
+            x_slice = slice(x_start, min(x_start + chunks[1], table.shape[2]))
+            rows = table[0, y_slice, x_slice]
+            cols = table[1, y_slice, x_slice]
+            valid = rows >= 0
+            src_bounds = None
+            if valid.any():
+                rows = rows[valid]
+                cols = cols[valid]
+                src_bounds = (int(rows.min()), int(rows.max()) + 1, int(cols.min()), int(cols.max()) + 1)
+            block_row.append((y_slice, x_slice, src_bounds))
+        block_bounds.append(block_row)
+    return block_bounds
+
+
+def _gather_with_remap_table(
+    src: da.Array, table_filename: str, block_bounds: list[list[tuple]], fill_value, dtype: np.dtype
+) -> da.Array:
+    """Create target blocks that only depend on the part of the source data they use."""
+    extra_shape = src.shape[:-2]
+    blocks = []
+    for block_row in block_bounds:
+        new_row = []
+        for y_slice, x_slice, src_bounds in block_row:
+            block_shape = extra_shape + (y_slice.stop - y_slice.start, x_slice.stop - x_slice.start)
+            if src_bounds is None:
+                new_row.append(da.full(block_shape, fill_value, dtype=dtype))
+                continue
+            row_start, row_stop, col_start, col_stop = src_bounds
+            src_subset = src[..., row_start:row_stop, col_start:col_stop]
+            block = dask.delayed(_gather_block, pure=True)(
+                src_subset, table_filename, y_slice, x_slice, row_start, col_start, fill_value, dtype
+            )
+            new_row.append(da.from_delayed(block, block_shape, dtype=dtype))
+        blocks.append(new_row)
+    return da.block(blocks)
+
+
+def _gather_block(
+    src_subset: np.ndarray,
+    table_filename: str,
+    y_slice: slice,
+    x_slice: slice,
+    row_offset: int,
+    col_offset: int,
+    fill_value,
+    dtype: np.dtype,
+) -> np.ndarray:
+    table = np.load(table_filename, mmap_mode="r")
+    rows = np.asarray(table[0, y_slice, x_slice], dtype=np.intp)
+    cols = np.asarray(table[1, y_slice, x_slice], dtype=np.intp)
+    invalid = rows < 0
+    rows = np.where(invalid, 0, rows - row_offset)
+    cols = np.where(invalid, 0, cols - col_offset)
+    res = src_subset[..., rows, cols].astype(dtype, copy=False)
+    res[..., invalid] = fill_value
+    return res
+
+
+def get_parser():
+    from argparse import ArgumentParser
+
+    prog = os.getenv("PROG_NAME", sys.argv[0])
+    parser = ArgumentParser(
+        prog=prog,
+        description="Create nearest neighbor remap tables between fixed source grids (ex. geostationary "
+        "instrument sectors) and static target grids so future processing can skip neighbor searches.",
+    )
+    parser.add_argument(
+        "-s",
+        "--source-areas",
+        nargs="+",
+        required=True,
+        help="Source grid names. Names are searched for in the grid configuration files "
+        "and Satpy's builtin areas (ex. 'goes_east_abi_c_1km').",
+    )
+    parser.add_argument(
+        "-g",
+        "--grids",
+        nargs="+",
+        help="Target grid names. Defaults to every static grid in the grid configuration files.",
+    )
+    parser.add_argument(
+        "--grid-configs",
+        nargs="+",
+        default=tuple(),
+        help="Additional grid configuration files. (.conf for legacy CSV grids, .yaml for SatPy-style areas)",
+    )
+    parser.add_argument(
+        "--radius-of-influence",
+        type=float,
+        help="Search radius in geocentric meters. Must match the value used during processing.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory to store remap tables in. Must match the '--cache-dir' used during processing. "
+        "Defaults to a directory in Satpy's cache directory.",
+    )
+    return parser
+
+
+def _static_area_names(grid_manager, yaml_areas: dict) -> list[str]:
+    area_names = [name for name, area in yaml_areas.items() if isinstance(area, AreaDefinition)]
+    for grid_name in getattr(grid_manager, "grid_information", {}):
+        is_static = isinstance(grid_manager[grid_name].to_satpy_area(), AreaDefinition)
+        if is_static and grid_name not in area_names:
+            area_names.append(grid_name)
+    return area_names
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    from satpy import Scene
+
+    from polar2grid.resample._resample_scene import _get_area_def_from_name, _get_legacy_and_yaml_areas
+
+    grid_manager, yaml_areas = _get_legacy_and_yaml_areas(list(args.grid_configs))
+    grid_names = args.grids or _static_area_names(grid_manager, yaml_areas)
+    empty_scene = Scene()
+    for source_name in args.source_areas:
+        source_area = _get_area_def_from_name(source_name, empty_scene, grid_manager, yaml_areas)
+        for grid_name in grid_names:
+            target_area = _get_area_def_from_name(grid_name, empty_scene, grid_manager, yaml_areas)
+            if not isinstance(target_area, AreaDefinition):
+                LOG.warning("Skipping '%s': remap tables require a static target grid.", grid_name)
+                continue
+            get_remap_table(
+                source_area,
+                target_area,
+                radius_of_influence=args.radius_of_influence,
+                cache_dir=args.cache_dir,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
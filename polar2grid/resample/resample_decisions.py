@@ -24,6 +24,7 @@
 
 import logging
 import os
+from functools import lru_cache
 
 import yaml
 from pyresample.geometry import SwathDefinition
@@ -39,6 +40,8 @@ from polar2grid.utils.config import recursive_dict_update
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
 
 class ResamplerDecisionTree(DecisionTree):
     """Helper class to determine resampler algorithm and other options."""
@@ -59,15 +62,24 @@ class ResamplerDecisionTree(DecisionTree):
         )
         self.prefix = kwargs.pop("config_section", "resampling")
         multival_keys = kwargs.pop("multival_keys", ["sensor"])
+        self._match_cache = {}
         super(ResamplerDecisionTree, self).__init__(decision_dicts, match_keys, multival_keys)
 
     @classmethod
     def from_configs(cls, config_filename="resampling.yaml"):
+        """Get a decision tree for all found configuration files.
+
+        The parsed tree is cached and reused as long as the same
+        configuration files are found and they have not been modified.
+
+        """
         config_paths = config_search_paths(config_filename)
-        return cls(*config_paths)
+        config_mtimes = tuple(os.path.getmtime(config_path) for config_path in config_paths)
+        return _cached_decision_tree(cls, tuple(config_paths), config_mtimes)
 
     def add_config_to_tree(self, *config_files):
         """Add configuration to tree."""
+        self._match_cache.clear()
         conf = {}
         for config_file in config_files:
             if os.path.isfile(config_file):
@@ -95,11 +107,43 @@ class ResamplerDecisionTree(DecisionTree):
         """Find a match."""
         query_dict["area_type"] = "swath" if isinstance(query_dict["area"], SwathDefinition) else "area"
         query_dict["sensor"] = get_sensor_alias(query_dict.get("sensor"))
+        cache_key = self._get_match_cache_key(query_dict)
+        if cache_key is not None and cache_key in self._match_cache:
+            return self._match_cache[cache_key].copy()
 
         try:
-            return super().find_match(**query_dict)
+            match = super().find_match(**query_dict)
         except KeyError as err:
             # give a more understandable error message
             raise KeyError(
                 f"No resampling configuration found for {query_dict['area_type']=} | {query_dict['name']=}"
             ) from err
+        if cache_key is not None:
+            # callers get copies so changes to a match don't leak into the cache
+            self._match_cache[cache_key] = match.copy()
+        return match
+
+    def _get_match_cache_key(self, query_dict: dict) -> tuple | None:
+        """Get a hashable key for the query values used for matching.
+
+        Returns ``None`` if any of the values used for matching can't be
+        hashed and therefore the match result can't be cached.
+
+        """
+        cache_key = []
+        for match_key in self._match_keys:
+            match_val = query_dict.get(match_key, _MISSING)
+            if isinstance(match_val, set):
+                match_val = frozenset(match_val)
+            cache_key.append(match_val)
+        cache_key = tuple(cache_key)
+        try:
+            hash(cache_key)
+        except TypeError:
+            return None
+        return cache_key
+
+
+@lru_cache(maxsize=8)
+def _cached_decision_tree(cls, config_paths: tuple[str, ...], config_mtimes: tuple[float, ...]):
+    return cls(*config_paths)
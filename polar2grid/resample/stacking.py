@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Resample products sharing the same geolocation as a single stacked array.
+
+Profile readers like ``nucaps`` and ``mirs`` produce one product per pressure
+level or channel, all with the same geolocation. Resampled one at a time,
+every product repeats the same work: ``nearest`` resampling queries the
+neighbours of every target pixel again for each product because the valid
+source pixels may differ between products and ``ewa`` adds the overhead of
+one more resampling call.
+
+Resampling decisions (see ``resampling.yaml``) with ``stack_products: true``
+instead stack all products with the same geolocation, shape, and data type in
+to one 3D array with a leading ``bands`` dimension, resample that array once,
+and split the result back in to the original products.
+
+``ewa`` resampling handles the invalid pixels of every product of a stack
+separately so the result is the same as resampling each product alone and the
+``mirs`` defaults stack products. Like for multi-band images, ``nearest``
+resampling of a stack uses the source pixels that are valid for any product of
+the stack so a target pixel whose nearest source pixel is invalid for one
+product is set to the fill value instead of using the next nearest valid
+source pixel. It should only be enabled for products whose invalid pixels are
+the same, which is not the case for ``nucaps`` levels below the surface, so it
+is not enabled for any ``nearest`` defaults.
+
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Iterable
+
+import dask.array as da
+import xarray as xr
+from satpy import Scene
+
+LOG = logging.getLogger(__name__)
+
+STACK_DIM = "bands"
+STACKABLE_RESAMPLERS = ("nearest", "ewa")
+
+
+def stack_products(input_scene: Scene, data_ids: Iterable) -> tuple[Scene, list, dict]:
+    """Replace products sharing the same geolocation with one stacked product per geolocation.
+
+    Returns:
+        Scene with the stacked products, the products to resample in that
+        Scene, and a mapping of stacked product name to the original products
+        in the stack.
+
+    """
+    groups: dict[tuple, list] = {}
+    for data_id in data_ids:
+        groups.setdefault(_stack_key(input_scene[data_id]), []).append(data_id)
+
+    stacked_scene = input_scene.copy()
+    ids_to_resample = []
+    stacks = {}
+    for group_ids in groups.values():
+        if len(group_ids) < 2:
+            ids_to_resample.extend(group_ids)
+            continue
+        stack_name = f"_stacked_{len(stacks)}"
+        LOG.debug("Stacking %d products for resampling as %s", len(group_ids), stack_name)
+        first_arr = input_scene[group_ids[0]]
+        stacked_data = da.stack([input_scene[data_id].data for data_id in group_ids])
+        stacked_scene[stack_name] = xr.DataArray(
+            stacked_data,
+            dims=(STACK_DIM,) + first_arr.dims,
+            attrs={**first_arr.attrs, "name": stack_name},
+        )
+        for data_id in group_ids:
+            del stacked_scene[data_id]
+        ids_to_resample.append(stack_name)
+        stacks[stack_name] = group_ids
+    return stacked_scene, ids_to_resample, stacks
+
+
+def _stack_key(data_arr: xr.DataArray) -> tuple:
+    area = data_arr.attrs.get("area")
+    lons = getattr(getattr(area, "lons", None), "data", None)
+    lats = getattr(getattr(area, "lats", None), "data", None)
+    if data_arr.ndim > 2:
+        return (id(data_arr),)
+    if not isinstance(lons, da.Array) or not isinstance(lats, da.Array):
+        # only stack products whose geolocation can be identified without computing it
+        LOG.debug("Not stacking %s, its geolocation isn't a dask array", data_arr.attrs.get("name"))
+        return (id(data_arr),)
+    return lons.name, lats.name, data_arr.dims, data_arr.shape, data_arr.dtype, getattr(data_arr.data, "chunks", None)
+
+
+def unstack_products(input_scene: Scene, resampled_scene: Scene, stacks: dict) -> None:
+    """Replace the resampled stacked products with the original products they contain.
+
+    Each product keeps its own metadata plus any metadata the resampler added
+    or changed on the stack (ex. ``area`` or ``_FillValue``).
+
+    """
+    for stack_name, data_ids in stacks.items():
+        if stack_name not in resampled_scene:
+            continue
+        stacked_arr = resampled_scene[stack_name]
+        del resampled_scene[stack_name]
+        resampler_attrs = _get_resampler_attrs(input_scene[data_ids[0]].attrs, stacked_arr.attrs)
+        for stack_idx, data_id in enumerate(data_ids):
+            product_arr = stacked_arr.isel({STACK_DIM: stack_idx}, drop=True)
+            product_arr.attrs = {**input_scene[data_id].attrs, **resampler_attrs}
+            resampled_scene[data_id] = product_arr
+
+
+def _get_resampler_attrs(stacked_attrs: dict, resampled_attrs: dict) -> dict:
+    """Get the metadata added or replaced by resampling a stack whose metadata was ``stacked_attrs``."""
+    return {
+        key: val
+        for key, val in resampled_attrs.items()
+        if key != "name" and (key not in stacked_attrs or stacked_attrs[key] is not val)
+    }
@@ -48,11 +48,15 @@ def pytest_configure(config):
 
 @pytest.fixture(autouse=True)
 def clear_cached_functions():
-    from polar2grid.filters._utils import polygon_for_area
+    from polar2grid.enhancements.shared import clear_colormap_cache
+    from polar2grid.filters._utils import clear_polygon_cache
     from polar2grid.filters.day_night import _get_sunlight_coverage
+    from polar2grid.readers._base import _AVAILABLE_IDS_CACHE
 
     _get_sunlight_coverage.cache_clear()
-    polygon_for_area.cache_clear()
+    clear_polygon_cache()
+    _AVAILABLE_IDS_CACHE.clear()
+    clear_colormap_cache()
 
 
 @pytest.fixture
@@ -83,6 +87,15 @@ def ensure_logging_framework_not_altered():
     root_logger.handlers = before_handlers
 
 
+@pytest.fixture(autouse=True, scope="session")
+def _isolate_satpy_cache_dir(tmp_path_factory):
+    """Keep files cached by tests (ex. grid lon/lats) out of the user's cache directory."""
+    import satpy
+
+    with satpy.config.set(cache_dir=str(tmp_path_factory.mktemp("satpy_cache"))):
+        yield
+
+
 @pytest.fixture(autouse=True, scope="session")
 def _forbid_pyspectral_downloads():
     from pyspectral.testing import forbid_pyspectral_downloads
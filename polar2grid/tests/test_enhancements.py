@@ -115,3 +115,65 @@ class TestP2GEnhancements:
             assert out_ds.count == num_bands
             if is_palette:
                 assert out_ds.colormap(1) is not None
+
+
+def test_shared_enhanced_images(abi_l1b_c01_data_array):
+    """Test that enhanced images are shared between writers' enhancers."""
+    from satpy.enhancements.enhancer import Enhancer
+
+    from polar2grid.enhancements.image_cache import get_enhanced_image, shared_enhanced_images
+
+    img1 = get_enhanced_image(abi_l1b_c01_data_array, enhance=Enhancer())
+    img2 = get_enhanced_image(abi_l1b_c01_data_array, enhance=Enhancer())
+    assert img1.data is not img2.data
+
+    with shared_enhanced_images():
+        img1 = get_enhanced_image(abi_l1b_c01_data_array, enhance=Enhancer())
+        img2 = get_enhanced_image(abi_l1b_c01_data_array, enhance=Enhancer())
+        img_no_enh = get_enhanced_image(abi_l1b_c01_data_array, enhance=False)
+    assert img1 is not img2
+    assert img1.data is img2.data
+    assert img_no_enh.data is not img1.data
+
+
+@pytest.mark.parametrize(
+    ("input_data", "mode"),
+    [
+        (np.linspace(180.0, 280.0, 100 * 120).reshape((1, 100, 120)), "L"),
+        (np.arange(100 * 120, dtype=np.uint16).reshape((1, 100, 120)) % 300, "L"),
+        (
+            np.concatenate(
+                [np.linspace(170.0, 290.0, 100 * 120).reshape((1, 100, 120)), np.full((1, 100, 120), 0.5)], axis=0
+            ),
+            "LA",
+        ),
+    ],
+)
+def test_p2g_colorize_cached_colormap(input_data, mode):
+    """Test that colorizing with a cached colormap matches Satpy's colorize."""
+    import xarray as xr
+    from satpy.enhancements.colormap import colorize as satpy_colorize
+    from trollimage.xrimage import XRImage
+
+    from polar2grid.enhancements.shared import _COLORMAP_CACHE, colorize
+
+    data = input_data.astype(np.float64) if mode == "LA" else input_data.copy()
+    if data.dtype.kind == "f":
+        data[0, :2] = np.nan
+    data_arr = xr.DataArray(da.from_array(data, chunks=(len(mode), 50, 60)), dims=("bands", "y", "x"))
+    data_arr = data_arr.assign_coords(bands=list(mode))
+    palettes = [{"colors": "rainbow", "min_value": 180, "max_value": 280}]
+
+    exp_img = XRImage(data_arr.copy())
+    satpy_colorize(exp_img, palettes=[palette.copy() for palette in palettes])
+    img = XRImage(data_arr.copy())
+    colorize(img, palettes=[palette.copy() for palette in palettes])
+
+    assert img.mode == exp_img.mode
+    assert img.data.dtype == exp_img.data.dtype
+    assert img.data.chunks == exp_img.data.chunks
+    np.testing.assert_array_equal(img.data.values, exp_img.data.values)
+    assert len(_COLORMAP_CACHE) == 1
+
+    colorize(XRImage(data_arr.copy()), palettes=[palette.copy() for palette in palettes])
+    assert len(_COLORMAP_CACHE) == 1
@@ -113,3 +113,27 @@ def test_daynight_filter_basic_composite_case(viirs_sdr_i04_data_array):
 
     resampled_scn = new_scn.resample(resampler="native")
     assert "ifog" not in resampled_scn
+
+
+def test_daynight_filter_wishlist_before_generation(viirs_sdr_i04_data_array):
+    """Test that composites are found to be filtered before they are generated."""
+    from polar2grid.filters import filter_scene_wishlist
+    from polar2grid.utils.config import add_polar2grid_config_paths
+
+    add_polar2grid_config_paths()
+
+    scn = Scene()
+    scn["I04"] = viirs_sdr_i04_data_array
+    i05_data_arr = viirs_sdr_i04_data_array.copy(deep=True)
+    i05_data_arr.attrs["name"] = "I05"
+    scn["I05"] = i05_data_arr
+    scn.load(["ifog"], generate=False)
+    assert "ifog" not in scn
+
+    filtered_ids = filter_scene_wishlist(scn, ["viirs_sdr"], night_fraction=0.2)
+    assert [data_id["name"] for data_id in filtered_ids] == ["ifog"]
+    assert filter_scene_wishlist(scn, ["viirs_sdr"], night_fraction=False) == set()
+
+    scn._wishlist -= filtered_ids
+    scn.generate_possible_composites(True)
+    assert "ifog" not in scn
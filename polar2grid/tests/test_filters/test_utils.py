@@ -92,20 +92,20 @@ def _swath_def_nans_in_right_column() -> SwathDefinition:
 
 def _exp_boundary_nan_rows():
     exp_boundary = AreaBoundary(
-        ([-71.5, -40.907036], [60.5, 60.5]),
-        ([-40.907036, -40.907036], [60.5, 23.721106]),
-        ([-40.907036, -71.5], [23.721106, 23.721106]),
-        ([-71.5, -40.907036], [23.721106, 60.5]),
+        ([-40.907036, -59.087940], [23.721106, 28.992462]),
+        ([-59.087940, -71.5], [28.992462, 60.5]),
+        ([-71.5, -49.5], [60.5, 49.5]),
+        ([-49.5, -41.314072, -40.907036], [49.5, 24.942211, 23.721106]),
     )
     return exp_boundary
 
 
 def _exp_boundary_antimeridian_nan_rows():
     exp_boundary = AreaBoundary(
-        ([-71.5 - 115.0 + 360.0, -40.907036 - 115.0], [60.5, 60.5]),
-        ([-40.907036 - 115.0, -40.907036 - 115.0], [60.5, 23.721106]),
-        ([-40.907036 - 115.0, -71.5 - 115.0 + 360.0], [23.721106, 23.721106]),
-        ([-71.5 - 115.0 + 360.0, -40.907036 - 115.0 + 360.0], [23.721106, 60.5]),
+        ([-40.907036 - 115.0, -59.087940 - 115.0], [23.721106, 28.992462]),
+        ([-59.087940 - 115.0, -71.5 - 115.0 + 360.0], [28.992462, 60.5]),
+        ([-71.5 - 115.0 + 360.0, -49.5 - 115.0], [60.5, 49.5]),
+        ([-49.5 - 115.0, -41.314072 - 115.0, -40.907036 - 115.0], [49.5, 24.942211, 23.721106]),
     )
     return exp_boundary
 
@@ -151,3 +151,66 @@ def test_boundary_area_for_descending_orbit():
     # if the polgyon is not clockwise then area is poorly calculated at ~12.4
     # if clockwise then it should be less than 0.2
     assert boundary.contour_poly.area() < 0.2
+
+
+def test_boundary_for_area_decimated_footprint():
+    """Test that the fallback footprint is tight without computing every geolocation pixel."""
+    lons, lats = generate_lonlat_data((2000, 400))
+    exp_area = SwathDefinition(lons[10:], lats[10:]).boundary(force_clockwise=True).contour_poly.area()
+    lons[:10] = np.nan
+    lats[:10] = np.nan
+    lons_da = da.from_array(lons, chunks=500)
+    lats_da = da.from_array(lats, chunks=500)
+    geom_obj = SwathDefinition(lons_da, lats_da)
+    with dask.config.set(scheduler=CustomScheduler(1)):
+        boundary = boundary_for_area(geom_obj)
+    assert isinstance(boundary, AreaBoundary)
+    np.testing.assert_allclose(boundary.contour_poly.area(), exp_area, rtol=0.01)
+
+
+def _xarray_swath_def(lons: np.ndarray, lats: np.ndarray) -> SwathDefinition:
+    import xarray as xr
+
+    lons_xr = xr.DataArray(da.from_array(lons, chunks=50), dims=("y", "x"))
+    lats_xr = xr.DataArray(da.from_array(lats, chunks=50), dims=("y", "x"))
+    return SwathDefinition(lons_xr, lats_xr)
+
+
+def test_prefetch_swath_polygons():
+    """Test that all swath polygons are computed together and reused."""
+    from polar2grid.filters._utils import _POLYGON_CACHE, polygon_for_area, prefetch_swath_polygons
+
+    lons, lats = generate_lonlat_data((200, 100))
+    valid_swaths = [
+        _xarray_swath_def(lons, lats),
+        _xarray_swath_def(lons[::2, ::2], lats[::2, ::2]),
+        _xarray_swath_def(lons - 115.0, lats[::-1]),
+    ]
+    nan_lons = lons.copy()
+    nan_lons[:9] = np.nan
+    swath_defs = valid_swaths + [_xarray_swath_def(nan_lons, lats)]
+    exp_polygons = [boundary_for_area(swath_def).contour_poly for swath_def in swath_defs]
+
+    # one computation for the edges of every swath and one for the swath with invalid edges
+    with dask.config.set(scheduler=CustomScheduler(2)):
+        prefetch_swath_polygons(swath_defs + [None, swath_defs[0]])
+    assert len(_POLYGON_CACHE) == len(swath_defs)
+
+    with dask.config.set(scheduler=CustomScheduler(0)):
+        for swath_def, exp_polygon in zip(swath_defs, exp_polygons, strict=True):
+            np.testing.assert_allclose(polygon_for_area(swath_def).vertices, exp_polygon.vertices)
+        prefetch_swath_polygons(valid_swaths)
+
+
+def test_prefetch_swath_polygons_sparse_edge():
+    """Test that a swath edge with a single valid pixel falls back to the decimated footprint."""
+    from polar2grid.filters._utils import _POLYGON_CACHE, polygon_for_area, prefetch_swath_polygons
+
+    lons, lats = generate_lonlat_data((200, 100))
+    lons[1:, -1] = np.nan
+    swath_def = _xarray_swath_def(lons, lats)
+    exp_polygon = boundary_for_area(swath_def).contour_poly
+    with dask.config.set(scheduler=CustomScheduler(2)):
+        prefetch_swath_polygons([swath_def])
+    assert swath_def in _POLYGON_CACHE
+    np.testing.assert_allclose(polygon_for_area(swath_def).vertices, exp_polygon.vertices)
@@ -23,15 +23,22 @@
 """Basic usability tests for the main glue script."""
 
 import contextlib
+import json
 import os
+from datetime import datetime, timedelta
 from glob import glob
 from tempfile import gettempdir
 from unittest import mock
 
 import dask
+import dask.array as da
+import numpy as np
 import pytest
+import xarray as xr
 import yaml
+from pyresample.geometry import AreaDefinition
 from pytest_lazy_fixtures import lf as lazy_fixture
+from satpy import Scene
 from satpy.tests.utils import CustomScheduler
 
 from polar2grid.utils.config import get_polar2grid_etc
@@ -311,6 +318,38 @@ class TestGlueFakeScene:
         assert len(output_files) == num_outputs
         assert ret == 0
 
+    def test_viirs_sdr_scene_all_night(self, viirs_sdr_i01_scene, chtmpdir, caplog):
+        from polar2grid.glue import main
+
+        # I01 is day-only and removed before generation, nothing is left to write
+        with (
+            prepare_glue_exec(viirs_sdr_i01_scene, max_computes=2),
+            mock.patch("polar2grid.filters.day_night._get_sunlight_coverage", return_value=0.0),
+        ):
+            args = ["-r", "viirs_sdr", "-w", "geotiff", "-f", str(chtmpdir)]
+            ret = main(args)
+        assert ret == 0
+        assert not glob(str(chtmpdir / "*.tif"))
+        assert "Skipping generation of" in caplog.text
+        assert "No remaining products after filtering" in caplog.text
+
+    def test_viirs_sdr_scene_progressive(self, viirs_sdr_full_scene, chtmpdir):
+        from polar2grid.glue import main
+
+        spool_fn = chtmpdir / "delivery.jsonl"
+        # lon/lat persist -> day/night check (x2 = I band + M band) -> dynamic grid -> one compute per product
+        with prepare_glue_exec(viirs_sdr_full_scene, max_computes=5 + 3):
+            args = ["-r", "viirs_sdr", "-w", "binary", "-f", str(chtmpdir), "-p", "m01", "i01", "i05"]
+            args += ["--progressive", "--product-priority", "i05", "--delivery-spool", str(spool_fn)]
+            ret = main(args)
+        assert ret == 0
+        records = [json.loads(line) for line in spool_fn.read_text().splitlines()]
+        assert records[0]["products"] == ["i05"]
+        assert sorted(record["products"][0] for record in records[1:]) == ["i01", "m01"]
+        for record in records:
+            assert len(record["files"]) == 1
+            assert os.path.isfile(record["files"][0])
+
     def test_polar2grid_viirs_sdr_unknown_writer(self, viirs_sdr_i01_scene, tmp_path):
         from polar2grid.glue import main
 
@@ -365,9 +404,13 @@ class TestGlueFakeScene:
         """Test list products includes expected products."""
         from polar2grid.glue import main
 
-        with prepare_glue_exec(avhrr_l1b_1_scene, max_computes=0):
+        with (
+            prepare_glue_exec(avhrr_l1b_1_scene, max_computes=0),
+            mock.patch("polar2grid.glue.stage_input_files") as stage_input_files,
+        ):
             args = ["-r", "avhrr_l1b_aapp", "-w", "geotiff", "--list-products", "-f", str(chtmpdir)]
             ret = main(args)
+        stage_input_files.assert_not_called()
         output_files = glob(str(chtmpdir / "*.tif"))
         assert len(output_files) == 0
         assert ret == 0
@@ -376,3 +419,134 @@ class TestGlueFakeScene:
         print(stdout)
         for exp_product in ("band1_vis", "band2_vis", "band3a_vis", "band4_bt", "band5_bt"):
             assert exp_product in stdout
+
+    def test_decompressed_inputs_removed(self, abi_l1b_c01_scene, chtmpdir):
+        from polar2grid.glue import main
+
+        output_dirs = []
+
+        def _stage_input_files(filenames, reader_name, output_dir, num_workers=None):
+            output_dirs.append(output_dir)
+            return filenames
+
+        with (
+            prepare_glue_exec(abi_l1b_c01_scene, max_computes=1, use_polar2grid=False),
+            mock.patch("polar2grid.glue.stage_input_files", side_effect=_stage_input_files),
+        ):
+            ret = main(["-r", "abi_l1b", "-w", "binary", "-p", "C01", "-f", "/fake/filename.bz2"])
+        assert ret == 0
+        assert len(output_dirs) == 1
+        assert not os.path.exists(output_dirs[0])
+
+    def test_abi_scene_streaming(self, abi_l1b_c01_scene, chtmpdir):
+        from polar2grid.glue import main
+        from polar2grid.utils.segment_stream import StreamUpdate
+
+        updates = [
+            StreamUpdate(["/fake/filename"], (0.0, 0.5), False),
+            StreamUpdate(["/fake/filename"], (0.0, 1.0), True),
+        ]
+        with (
+            prepare_glue_exec(abi_l1b_c01_scene, max_computes=3, use_polar2grid=False),
+            mock.patch("polar2grid.glue.SegmentStream.from_reader", return_value=updates) as from_reader,
+        ):
+            ret = main(["-r", "abi_l1b", "-w", "binary", "--watch-dir", str(chtmpdir), "-p", "C01"])
+        assert ret == 0
+        from_reader.assert_called_once_with("abi_l1b", watch_dir=str(chtmpdir), interval=2.0, timeout=600.0)
+        assert len(glob(str(chtmpdir / "*.dat"))) == 1
+
+    def test_streaming_timeout(self, abi_l1b_c01_scene, chtmpdir, caplog):
+        from polar2grid.glue import main
+
+        def _no_segments():
+            raise TimeoutError(f"No input files found in '{chtmpdir}'.")
+            yield
+
+        with (
+            prepare_glue_exec(abi_l1b_c01_scene, max_computes=0, use_polar2grid=False),
+            mock.patch("polar2grid.glue.SegmentStream.from_reader", return_value=_no_segments()),
+        ):
+            ret = main(["-r", "abi_l1b", "-w", "binary", "--watch-dir", str(chtmpdir), "-p", "C01"])
+        assert ret == -1
+        assert "No input files found" in caplog.text
+
+    def test_streaming_unsupported_reader(self, abi_l1b_c01_scene, chtmpdir):
+        from polar2grid.glue import main
+
+        with prepare_glue_exec(abi_l1b_c01_scene, use_polar2grid=False):
+            ret = main(["-r", "abi_l1b", "-w", "binary", "--watch-dir", str(chtmpdir)])
+        assert ret == -1
+
+    def test_glm_rolling_window(self, chtmpdir):
+        from polar2grid.glue import main
+        from polar2grid.utils.rolling import RollingAccumulator
+
+        store_dir = chtmpdir / "rolling"
+        area_def = AreaDefinition(
+            "small_goes",
+            "",
+            "",
+            "+proj=geos +lon_0=-75.0 +h=35786023.0 +a=6378137.0 +b=6356752.31414 +sweep=x +units=m +no_defs",
+            50,
+            30,
+            (-3627271.2913, 1583173.6575, 1382771.9287, 4589199.5895),
+        )
+        for minute, value in enumerate((1.0, 2.0)):
+            scn = Scene()
+            scn["flash_extent_density"] = xr.DataArray(
+                da.full((30, 50), value, dtype=np.float32, chunks=10),
+                dims=("y", "x"),
+                attrs={
+                    "area": area_def,
+                    "platform_name": "goes16",
+                    "sensor": "glm",
+                    "name": "flash_extent_density",
+                    "start_time": datetime(2025, 10, 25, 15, minute),
+                    "end_time": datetime(2025, 10, 25, 15, minute + 1),
+                    "reader": "glm_l2",
+                },
+            )
+            args = ["-r", "glm_l2", "-w", "binary", "-p", "flash_extent_density", "-f", str(chtmpdir)]
+            args += [
+                "--rolling-window",
+                "5",
+                "--rolling-store",
+                str(store_dir),
+                "--output-filename",
+                f"fed_{minute}.dat",
+            ]
+            with prepare_glue_exec(scn, max_computes=2, use_polar2grid=False):
+                ret = main(args)
+            assert ret == 0
+        assert (chtmpdir / "fed_1.dat").is_file()
+        accumulator = RollingAccumulator(str(store_dir), timedelta(minutes=5))
+        np.testing.assert_array_equal(accumulator.get("flash_extent_density"), 3.0)
+        assert accumulator.window_start_time("flash_extent_density") == datetime(2025, 10, 25, 15, 0)
+
+    def test_rolling_window_skips_products_without_statistic(self, chtmpdir):
+        from polar2grid.glue import _aggregate_rolling_window
+
+        area_def = AreaDefinition("small", "", "", "EPSG:4326", 5, 3, (-10.0, -10.0, 10.0, 10.0))
+        scn = Scene()
+        for name in ("flash_extent_density", "not_accumulated"):
+            scn[name] = xr.DataArray(
+                da.full((3, 5), 1.0, dtype=np.float32, chunks=3),
+                dims=("y", "x"),
+                attrs={"area": area_def, "name": name, "start_time": datetime(2025, 10, 25, 15, 0)},
+            )
+        orig_data = scn["not_accumulated"].data
+        rolling_args = {"window": 5, "store_dir": str(chtmpdir / "rolling")}
+        with dask.config.set(scheduler=CustomScheduler(max_computes=1)):
+            new_scn = _aggregate_rolling_window(scn, "glm_l2", rolling_args)
+        assert new_scn["not_accumulated"].data is orig_data
+        assert sorted(os.listdir(chtmpdir / "rolling")) == [
+            "flash_extent_density_count.npy",
+            "flash_extent_density_slots.npy",
+            "flash_extent_density_total.npy",
+            "rolling_state.json",
+        ]
+
+        # nothing to accumulate, nothing computed
+        del scn["flash_extent_density"]
+        with dask.config.set(scheduler=CustomScheduler(max_computes=0)):
+            assert _aggregate_rolling_window(scn, "glm_l2", rolling_args) is scn
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+# Copyright (C) 2015-2021 Space Science and Engineering Center (SSEC),
+# University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Test the grid lon/lat cache."""
+
+import os
+from unittest import mock
+
+import numpy as np
+import pytest
+from pyresample import AreaDefinition
+
+
+def _create_area(area_id: str = "test_lcc", width: int = 100) -> AreaDefinition:
+    return AreaDefinition(
+        area_id,
+        area_id,
+        area_id,
+        "+proj=lcc +datum=WGS84 +ellps=WGS84 +lon_0=-95. +lat_0=25 +lat_1=25 +units=m +no_defs",
+        width,
+        80,
+        (-1000000.0, -800000.0, 1000000.0, 800000.0),
+    )
+
+
+@pytest.fixture
+def _enable_cache(monkeypatch):
+    monkeypatch.setenv("P2G_LONLAT_CACHE_SIZE", "16")
+    monkeypatch.setattr("polar2grid.grids.lonlat_cache._STATIC_GRID_KEYS", set())
+
+
+@pytest.mark.usefixtures("_enable_cache")
+def test_cached_lonlats_match_area(tmp_path):
+    """Test that cached lon/lats are created once and match the area's lon/lats."""
+    import satpy
+
+    from polar2grid.grids.lonlat_cache import CACHE_SUBDIR, get_cached_lonlats, register_static_grid
+
+    area_def = _create_area()
+    register_static_grid(area_def)
+    exp_lons, exp_lats = area_def.get_lonlats()
+    with satpy.config.set(cache_dir=str(tmp_path)):
+        lons, lats = get_cached_lonlats(area_def, chunks=32)
+        assert lons.chunks[0][0] == 32
+        # cache file is only created on compute
+        assert not os.listdir(tmp_path / CACHE_SUBDIR)
+        np.testing.assert_allclose(lons.compute(), exp_lons)
+        np.testing.assert_allclose(lats.compute(), exp_lats)
+        assert len(os.listdir(tmp_path / CACHE_SUBDIR)) == 1
+
+        with mock.patch.object(AreaDefinition, "get_lonlats") as get_lonlats:
+            lons, lats = get_cached_lonlats(_create_area(), chunks=32)
+            get_lonlats.assert_not_called()
+        np.testing.assert_allclose(lats.compute(), exp_lats)
+
+
+@pytest.mark.usefixtures("_enable_cache")
+@pytest.mark.parametrize("cache_size", [None, "0", "2"])
+def test_cache_size(cache_size, tmp_path, monkeypatch):
+    """Test that old cache files are removed and that the cache is disabled by default."""
+    import satpy
+
+    from polar2grid.grids.lonlat_cache import CACHE_SUBDIR, get_cached_lonlats, register_static_grid
+
+    if cache_size is None:
+        monkeypatch.delenv("P2G_LONLAT_CACHE_SIZE")
+    else:
+        monkeypatch.setenv("P2G_LONLAT_CACHE_SIZE", cache_size)
+    with satpy.config.set(cache_dir=str(tmp_path)):
+        for width in range(100, 104):
+            area_def = _create_area(width=width)
+            register_static_grid(area_def)
+            lons, lats = get_cached_lonlats(area_def, chunks=50)
+            lons.compute()
+    cache_dir = tmp_path / CACHE_SUBDIR
+    num_files = len(os.listdir(cache_dir)) if os.path.isdir(cache_dir) else 0
+    assert num_files == int(cache_size or 0)
+
+
+@pytest.mark.usefixtures("_enable_cache")
+def test_dynamic_grids_not_cached(tmp_path):
+    """Test that grids not registered as static (ex. frozen dynamic grids) are not cached."""
+    import satpy
+
+    from polar2grid.grids.lonlat_cache import CACHE_SUBDIR, get_cached_lonlats
+
+    area_def = _create_area()
+    exp_lons, _ = area_def.get_lonlats()
+    with satpy.config.set(cache_dir=str(tmp_path)):
+        lons, _ = get_cached_lonlats(area_def, chunks=32)
+        np.testing.assert_allclose(lons.compute(), exp_lons)
+    assert not os.path.isdir(tmp_path / CACHE_SUBDIR)
+
+
+def test_resolver_registers_static_grids(monkeypatch):
+    """Test that grids from grid configuration files are registered as static and dynamic grids are not."""
+    from satpy import Scene
+
+    from polar2grid.grids.lonlat_cache import get_lonlat_cache_key
+    from polar2grid.resample._resample_scene import AreaDefResolver
+
+    static_keys = set()
+    monkeypatch.setattr("polar2grid.grids.lonlat_cache._STATIC_GRID_KEYS", static_keys)
+    resolver = AreaDefResolver(Scene(), [])
+    static_area = resolver["goes_east_1km"]
+    assert resolver.has_dynamic_extents("wgs84_fit")
+    assert static_keys == {get_lonlat_cache_key(static_area)}
@@ -48,3 +48,60 @@ def test_reader_parser_arguments(reader_name):
     parser = argparse.ArgumentParser()
     groups = mod.add_reader_argument_groups(parser)
     assert len(groups) == 2
+
+
+def test_available_products_p2g_only_matches_full(viirs_sdr_full_scene):
+    from unittest import mock
+
+    from polar2grid.readers._base import ReaderProxyBase
+
+    reader_info = ReaderProxyBase.from_reader_name("viirs_sdr", viirs_sdr_full_scene, [])
+    full_p2g, full_custom, _ = reader_info.get_available_products()
+    with mock.patch.object(viirs_sdr_full_scene, "available_composite_ids", side_effect=AssertionError):
+        fast_p2g, fast_custom, _ = reader_info.get_available_products(p2g_only=True)
+    assert full_p2g
+    assert sorted(fast_p2g) == sorted(full_p2g)
+    assert sorted(fast_custom) == sorted(full_custom)
+
+
+def test_available_dataset_ids_cached(viirs_sdr_full_scene):
+    from unittest import mock
+
+    from polar2grid.readers._base import ReaderProxyBase
+
+    reader_info = ReaderProxyBase.from_reader_name("viirs_sdr", viirs_sdr_full_scene, [])
+    with mock.patch.object(
+        viirs_sdr_full_scene, "available_composite_ids", wraps=viirs_sdr_full_scene.available_composite_ids
+    ) as comp_ids:
+        reader_info.get_available_products()
+        reader_info.get_available_products()
+    # once with the polar2grid configuration and once with only builtin Satpy configuration
+    assert comp_ids.call_count == 2
+
+
+def test_available_dataset_ids_cache_bounded(viirs_sdr_full_scene):
+    from unittest import mock
+
+    from polar2grid.readers import _base
+
+    with mock.patch.object(_base, "_AVAILABLE_IDS_CACHE_SIZE", 2):
+        for config_path in (["a"], ["b"], ["c"], ["b"]):
+            with mock.patch.dict(_base.satpy.config.config, {"config_path": config_path}):
+                _base.get_available_dataset_ids(viirs_sdr_full_scene)
+    cached_paths = [cache_key[-1] for cache_key in _base._AVAILABLE_IDS_CACHE]
+    # 'a' was least recently used, 'b' was used last
+    assert cached_paths == [("c",), ("b",)]
+
+
+def test_satpy_names_nameless_query(viirs_sdr_full_scene):
+    from unittest import mock
+
+    from satpy import DataQuery
+
+    from polar2grid.readers._base import ReaderProxyBase
+
+    reader_info = ReaderProxyBase.from_reader_name("viirs_sdr", viirs_sdr_full_scene, [])
+    aliases = {"p2g_wavelength": DataQuery(wavelength=0.64), "p2g_name": DataQuery(name="I01")}
+    with mock.patch.object(type(reader_info), "_aliases", new_callable=mock.PropertyMock, return_value=aliases):
+        satpy_names = reader_info._get_satpy_names(["p2g_wavelength", "p2g_name", "I02"])
+    assert satpy_names == {"I01", "I02"}
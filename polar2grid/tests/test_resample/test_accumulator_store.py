@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for accumulating resampled granules of a pass over multiple executions."""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+
+import dask.array as da
+import numpy as np
+import pytest
+import xarray as xr
+from pyresample.ewa import DaskEWAResampler
+from pyresample.geometry import AreaDefinition, SwathDefinition
+from satpy import Scene
+
+from polar2grid.resample.accumulator_store import AccumulatingEWAResampler, AccumulatingNearestResampler
+from polar2grid.resample.granule_mosaic import GranuleNearestResampler
+
+ROWS_PER_GRANULE = 16
+NUM_GRANULES = 3
+START_TIME = datetime(2025, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def small_lcc_area() -> AreaDefinition:
+    return AreaDefinition(
+        "small_lcc",
+        "",
+        "",
+        {"proj": "lcc", "lat_0": 35.0, "lat_1": 35.0, "lon_0": -95.0, "datum": "WGS84"},
+        60,
+        50,
+        (-800000.0, -600000.0, 700000.0, 1200000.0),
+    )
+
+
+def _pass_arrays() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rows, cols = ROWS_PER_GRANULE * NUM_GRANULES, 40
+    y, x = np.mgrid[0:rows, 0:cols]
+    lons = -100 + x * 0.25 + y * 0.05
+    lats = 30 + y * 0.2 - x * 0.02
+    rng = np.random.default_rng(0)
+    data = (rng.random((rows, cols)) * 1000).astype(np.float32)
+    data[rng.random((rows, cols)) < 0.2] = np.nan
+    return lons, lats, data
+
+
+def _granule_data_array(granule_indexes, platform_name: str = "npp", start_time: datetime = START_TIME):
+    lons, lats, data = _pass_arrays()
+    rows = slice(granule_indexes[0] * ROWS_PER_GRANULE, (granule_indexes[-1] + 1) * ROWS_PER_GRANULE)
+    chunks = (ROWS_PER_GRANULE, lons.shape[1])
+    geo_attrs = {"rows_per_scan": ROWS_PER_GRANULE}
+    swath_def = SwathDefinition(
+        xr.DataArray(da.from_array(lons[rows], chunks=chunks), dims=("y", "x"), attrs=geo_attrs),
+        xr.DataArray(da.from_array(lats[rows], chunks=chunks), dims=("y", "x"), attrs=geo_attrs),
+    )
+    granule_start = start_time + timedelta(minutes=granule_indexes[0])
+    attrs = {
+        "area": swath_def,
+        "name": "test",
+        "platform_name": platform_name,
+        "start_time": granule_start,
+        "end_time": start_time + timedelta(minutes=granule_indexes[-1] + 1),
+    }
+    return xr.DataArray(da.from_array(data[rows], chunks=chunks), dims=("y", "x"), attrs=attrs)
+
+
+@pytest.mark.parametrize("maximum_weight_mode", [False, True])
+def test_accumulated_ewa_matches_full_pass(small_lcc_area, tmp_path, maximum_weight_mode):
+    full_pass = _granule_data_array(range(NUM_GRANULES))
+    exp = DaskEWAResampler(full_pass.attrs["area"], small_lcc_area).resample(
+        full_pass, maximum_weight_mode=maximum_weight_mode
+    )
+
+    for granule_idx in range(NUM_GRANULES):
+        granule = _granule_data_array([granule_idx])
+        res = AccumulatingEWAResampler(granule.attrs["area"], small_lcc_area).resample(
+            granule, store_dir=str(tmp_path), maximum_weight_mode=maximum_weight_mode
+        )
+        assert isinstance(res.data, da.Array)
+        res_values = res.values
+    np.testing.assert_array_equal(res_values, exp.values)
+    assert res.attrs["start_time"] == START_TIME
+
+    # adding the same granule again doesn't change the result
+    granule = _granule_data_array([1])
+    res = AccumulatingEWAResampler(granule.attrs["area"], small_lcc_area).resample(
+        granule, store_dir=str(tmp_path), maximum_weight_mode=maximum_weight_mode
+    )
+    np.testing.assert_array_equal(res.values, exp.values)
+
+
+@pytest.mark.parametrize("resampler_class", [AccumulatingEWAResampler, AccumulatingNearestResampler])
+def test_accumulated_overlapping_executions(small_lcc_area, tmp_path, resampler_class):
+    full_pass = _granule_data_array(range(NUM_GRANULES))
+    exp = resampler_class(full_pass.attrs["area"], small_lcc_area).resample(full_pass, store_dir=str(tmp_path / "exp"))
+    exp_values = exp.values
+
+    for granule_indexes in ([0, 1], [1, 2]):
+        granules = _granule_data_array(granule_indexes)
+        res = resampler_class(granules.attrs["area"], small_lcc_area).resample(
+            granules, store_dir=str(tmp_path / "store")
+        )
+        res_values = res.values
+    np.testing.assert_array_equal(res_values, exp_values)
+
+
+def test_accumulated_granules_recorded_after_compute(small_lcc_area, tmp_path):
+    full_pass = _granule_data_array(range(NUM_GRANULES))
+    exp = DaskEWAResampler(full_pass.attrs["area"], small_lcc_area).resample(full_pass)
+
+    # the result of the first execution is never computed (ex. a writer failed before computing)
+    granule = _granule_data_array([0])
+    AccumulatingEWAResampler(granule.attrs["area"], small_lcc_area).resample(granule, store_dir=str(tmp_path))
+    assert not any(filenames for _, _, filenames in os.walk(tmp_path))
+
+    res = AccumulatingEWAResampler(full_pass.attrs["area"], small_lcc_area).resample(full_pass, store_dir=str(tmp_path))
+    np.testing.assert_array_equal(res.values, exp.values)
+    # computing the same result again doesn't add the granules again
+    np.testing.assert_array_equal(res.values, exp.values)
+
+
+def test_accumulated_ewa_bands(small_lcc_area, tmp_path):
+    granule = _granule_data_array([0])
+    rgb_arr = xr.concat([granule, granule * 2], dim="bands").transpose("bands", "y", "x")
+    rgb_arr = rgb_arr.assign_coords(bands=["R", "G"])
+    rgb_arr.attrs = granule.attrs
+    res = AccumulatingEWAResampler(granule.attrs["area"], small_lcc_area).resample(rgb_arr, store_dir=str(tmp_path))
+    assert res.dims == ("bands", "y", "x")
+    np.testing.assert_array_equal(res.coords["bands"].values, ["R", "G"])
+    np.testing.assert_allclose(res.values[1], res.values[0] * 2, rtol=1e-6)
+    grid_dir = os.path.join(tmp_path, os.listdir(tmp_path)[0])
+    assert sorted(os.listdir(grid_dir)) == ["test_G_ewa", "test_R_ewa"]
+
+
+def test_accumulated_nearest_matches_full_pass(small_lcc_area, tmp_path):
+    full_pass = _granule_data_array(range(NUM_GRANULES))
+    exp = GranuleNearestResampler(full_pass.attrs["area"], small_lcc_area).resample(full_pass)
+
+    # granules may arrive out of order
+    for granule_idx in (2, 0, 1):
+        granule = _granule_data_array([granule_idx])
+        res = AccumulatingNearestResampler(granule.attrs["area"], small_lcc_area).resample(
+            granule, store_dir=str(tmp_path)
+        )
+        res_values = res.values
+    np.testing.assert_array_equal(res_values, exp.values)
+    assert res.attrs["start_time"] == START_TIME
+
+
+@pytest.mark.parametrize(
+    ("platform_name", "start_time"),
+    [
+        ("noaa20", START_TIME + timedelta(minutes=1)),
+        ("npp", START_TIME + timedelta(minutes=100)),
+    ],
+)
+def test_accumulated_new_pass(small_lcc_area, tmp_path, platform_name, start_time):
+    first = _granule_data_array([0])
+    first_res = AccumulatingNearestResampler(first.attrs["area"], small_lcc_area).resample(
+        first, store_dir=str(tmp_path)
+    )
+    first_res.compute()
+
+    second = _granule_data_array([1], platform_name=platform_name, start_time=start_time)
+    exp = GranuleNearestResampler(second.attrs["area"], small_lcc_area).resample(second)
+    res = AccumulatingNearestResampler(second.attrs["area"], small_lcc_area).resample(second, store_dir=str(tmp_path))
+    np.testing.assert_array_equal(res.values, exp.values)
+    assert res.attrs["start_time"] == second.attrs["start_time"]
+
+
+def test_accumulated_requires_store_dir(small_lcc_area):
+    granule = _granule_data_array([0])
+    with pytest.raises(ValueError):
+        AccumulatingEWAResampler(granule.attrs["area"], small_lcc_area).resample(granule)
+    with pytest.raises(TypeError):
+        AccumulatingNearestResampler(small_lcc_area, small_lcc_area)
+
+
+def test_resample_scene_uses_accumulator_store(tmp_path, builtin_grids_yaml):
+    from polar2grid.resample._resample_scene import resample_scene
+
+    scn = Scene()
+    granule = _granule_data_array([0])
+    granule.attrs.update({"reader": "viirs_sdr", "sensor": "viirs"})
+    scn["I01"] = granule
+    store_dir = str(tmp_path / "store")
+    scenes_to_save = resample_scene(
+        scn,
+        ["211e_10km"],
+        builtin_grids_yaml,
+        "ewa",
+        is_polar2grid=True,
+        grid_coverage=0.0,
+        accumulator_store=store_dir,
+    )
+    new_scn, _ = scenes_to_save[0]
+    new_scn["I01"].compute()
+    assert new_scn["I01"].attrs["area"].area_id == "211e_10km"
+    assert [grid_dir.split("_")[0] for grid_dir in os.listdir(store_dir)] == ["211e"]
+
+
+def test_accumulator_store_dynamic_grid(small_lcc_area, caplog):
+    from polar2grid.resample._resample_scene import _use_accumulator_store_if_possible
+
+    scn = Scene()
+    scn["I01"] = _granule_data_array([0])
+    rs, kwargs = _use_accumulator_store_if_possible("ewa", small_lcc_area, True, scn, {}, "store")
+    assert rs == "ewa"
+    assert kwargs == {}
+    assert "dynamic extents" in caplog.text
+    rs, kwargs = _use_accumulator_store_if_possible("ewa", small_lcc_area, False, scn, {}, "store")
+    assert rs is AccumulatingEWAResampler
+    assert kwargs == {"store_dir": "store"}
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for resampling categorical products by majority vote."""
+
+from __future__ import annotations
+
+from unittest import mock
+
+import dask.array as da
+import numpy as np
+import pytest
+import xarray as xr
+from pyresample.geometry import AreaDefinition, SwathDefinition
+from satpy import Scene
+
+from polar2grid.resample.categorical import CategoricalResampler
+
+FILL_VALUE = -128
+
+
+@pytest.fixture
+def global_area() -> AreaDefinition:
+    return AreaDefinition("global_1deg", "", "", "EPSG:4326", 360, 180, (-180.0, -90.0, 180.0, 90.0))
+
+
+@pytest.fixture
+def cloud_swath() -> SwathDefinition:
+    # 4 swath pixels in every 1 degree grid cell between 0-20E and 0-10N
+    rows, cols = 40, 80
+    y, x = np.mgrid[0:rows, 0:cols]
+    lons = 0.125 + x * 0.25
+    lats = 9.875 - y * 0.25
+    chunks = (20, 40)
+    return SwathDefinition(
+        xr.DataArray(da.from_array(lons, chunks=chunks), dims=("y", "x")),
+        xr.DataArray(da.from_array(lats, chunks=chunks), dims=("y", "x")),
+    )
+
+
+def _cloud_type_data_array(swath_def: SwathDefinition, dtype=np.int8) -> xr.DataArray:
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 4, swath_def.shape).astype(dtype)
+    attrs = {"area": swath_def, "name": "cloud_type"}
+    if np.issubdtype(dtype, np.integer):
+        data[::7, ::3] = FILL_VALUE
+        attrs["_FillValue"] = FILL_VALUE
+    else:
+        data[::7, ::3] = np.nan
+    return xr.DataArray(da.from_array(data, chunks=(20, 40)), dims=("y", "x"), attrs=attrs)
+
+
+def _expected(data_arr: xr.DataArray, fill_value) -> np.ndarray:
+    values = data_arr.values.astype(np.float64)
+    if "_FillValue" in data_arr.attrs:
+        values[values == data_arr.attrs["_FillValue"]] = np.nan
+    exp = np.full((180, 360), fill_value, dtype=np.float64)
+    for row in range(10):
+        for col in range(20):
+            cell_values = values[row * 4 : (row + 1) * 4, col * 4 : (col + 1) * 4]
+            cell_values = cell_values[np.isfinite(cell_values)]
+            if cell_values.size == 0:
+                continue
+            categories, counts = np.unique(cell_values, return_counts=True)
+            exp[80 + row, 180 + col] = categories[np.argmax(counts)]
+    return exp
+
+
+@pytest.mark.parametrize(("dtype", "fill_value"), [(np.int8, FILL_VALUE), (np.float32, np.nan)])
+def test_categorical_majority(global_area, cloud_swath, dtype, fill_value):
+    data_arr = _cloud_type_data_array(cloud_swath, dtype=dtype)
+    res = CategoricalResampler(cloud_swath, global_area).resample(data_arr, gap_distance=0)
+    assert isinstance(res.data, da.Array)
+    assert res.dims == ("y", "x")
+    assert res.dtype == dtype
+    assert "crs" in res.coords
+    np.testing.assert_array_equal(res.values, _expected(data_arr, fill_value))
+
+
+def test_categorical_gap_filling(global_area, cloud_swath):
+    # remove one grid cell from the swath, the first cell of the second row of
+    # cells is surrounded by cells of category 1, 1, 2, 2, and 3
+    lons = cloud_swath.lons.values.copy()
+    lons[4:8, :4] = np.nan
+    chunks = (20, 40)
+    swath_def = SwathDefinition(
+        xr.DataArray(da.from_array(lons, chunks=chunks), dims=("y", "x")),
+        xr.DataArray(da.from_array(cloud_swath.lats.values, chunks=chunks), dims=("y", "x")),
+    )
+    values = np.full(swath_def.shape, 3, dtype=np.int8)
+    values[:4, :8] = 1
+    values[8:12, :8] = 2
+    # a grid cell containing only invalid pixels
+    values[12:16, 8:12] = FILL_VALUE
+    data_arr = xr.DataArray(
+        da.from_array(values, chunks=chunks),
+        dims=("y", "x"),
+        attrs={"area": swath_def, "name": "cloud_type", "_FillValue": FILL_VALUE},
+    )
+    res = CategoricalResampler(swath_def, global_area).resample(data_arr, gap_distance=0)
+    assert res.values[81, 180] == FILL_VALUE
+
+    res = CategoricalResampler(swath_def, global_area).resample(data_arr)
+    # neighbors 1 and 2 tie, smallest category wins
+    assert res.values[81, 180] == 1
+    # cells with invalid pixels and cells outside of the swath aren't filled
+    assert res.values[83, 182] == FILL_VALUE
+    assert res.values[79, 185] == FILL_VALUE
+    assert res.values[85, 179] == FILL_VALUE
+
+
+def test_categorical_bad_args(global_area, cloud_swath):
+    with pytest.raises(TypeError):
+        CategoricalResampler(global_area, global_area)
+    data_arr = _cloud_type_data_array(cloud_swath)
+    rgb_arr = xr.concat([data_arr, data_arr], dim="bands")
+    with pytest.raises(ValueError):
+        CategoricalResampler(cloud_swath, global_area).resample(rgb_arr)
+
+
+def test_resample_scene_uses_categorical(global_area, cloud_swath):
+    from polar2grid.resample._resample_scene import resample_scene
+
+    scn = Scene()
+    data_arr = _cloud_type_data_array(cloud_swath)
+    data_arr.attrs.update({"reader": "clavrx", "sensor": "viirs"})
+    scn["cloud_type"] = data_arr
+    with mock.patch("polar2grid.resample._resample_scene.AreaDefResolver") as resolver_cls:
+        resolver_cls.return_value.get_frozen_area.return_value = global_area
+        resolver_cls.return_value.has_dynamic_extents.return_value = False
+        scenes_to_save = resample_scene(scn, ["global_1deg"], [], None, grid_coverage=0.0)
+    new_scn, _ = scenes_to_save[0]
+    assert new_scn["cloud_type"].dtype == np.int8
+    res = new_scn["cloud_type"].values
+    exp = _expected(data_arr, FILL_VALUE)
+    np.testing.assert_array_equal(res[80:90, 180:200], exp[80:90, 180:200])
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for per-granule nearest neighbor resampling."""
+
+from __future__ import annotations
+
+from unittest import mock
+
+import dask.array as da
+import numpy as np
+import pytest
+import xarray as xr
+from pyresample.geometry import AreaDefinition, SwathDefinition
+from satpy import Scene
+from satpy.resample.kdtree import KDTreeResampler
+
+from polar2grid.resample import granule_mosaic
+from polar2grid.resample.granule_mosaic import GranuleNearestResampler
+
+ROWS_PER_GRANULE = 16
+
+
+@pytest.fixture
+def three_granule_swath() -> SwathDefinition:
+    rows, cols = ROWS_PER_GRANULE * 3, 40
+    y, x = np.mgrid[0:rows, 0:cols]
+    lons = -100 + x * 0.25 + y * 0.05
+    lats = 30 + y * 0.2 - x * 0.02
+    # missing geolocation in the middle granule
+    lons[20:22, 5:10] = np.nan
+    lats[20:22, 5:10] = np.nan
+    chunks = (ROWS_PER_GRANULE, cols)
+    lons = xr.DataArray(da.from_array(lons, chunks=chunks), dims=("y", "x"))
+    lats = xr.DataArray(da.from_array(lats, chunks=chunks), dims=("y", "x"))
+    return SwathDefinition(lons, lats)
+
+
+@pytest.fixture
+def small_lcc_area() -> AreaDefinition:
+    return AreaDefinition(
+        "small_lcc",
+        "",
+        "",
+        {"proj": "lcc", "lat_0": 35.0, "lat_1": 35.0, "lon_0": -95.0, "datum": "WGS84"},
+        60,
+        50,
+        (-800000.0, -600000.0, 700000.0, 1200000.0),
+    )
+
+
+def _test_data_array(swath_def: SwathDefinition, dtype=np.float32) -> xr.DataArray:
+    rng = np.random.default_rng(0)
+    data = (rng.random(swath_def.shape) * 1000).astype(dtype)
+    if np.issubdtype(dtype, np.floating):
+        data[rng.random(swath_def.shape) < 0.2] = np.nan
+    data = da.from_array(data, chunks=swath_def.lons.data.chunks)
+    return xr.DataArray(data, dims=("y", "x"), attrs={"area": swath_def, "name": "test"})
+
+
+@pytest.mark.parametrize(
+    ("dtype", "fill_value"),
+    [
+        (np.float32, np.nan),
+        (np.uint16, 65535),
+    ],
+)
+def test_granule_mosaic_matches_nearest(three_granule_swath, small_lcc_area, dtype, fill_value):
+    data_arr = _test_data_array(three_granule_swath, dtype=dtype)
+    exp = KDTreeResampler(three_granule_swath, small_lcc_area).resample(data_arr, fill_value=fill_value)
+
+    res = GranuleNearestResampler(three_granule_swath, small_lcc_area).resample(data_arr, fill_value=fill_value)
+    assert isinstance(res.data, da.Array)
+    assert res.dtype == exp.dtype
+    assert res.dims == ("y", "x")
+    np.testing.assert_array_equal(res.values, exp.values)
+    # swath covers part of the grid
+    assert (res.values == fill_value).any() or np.isnan(res.values).any()
+    assert (res.values != fill_value).any()
+
+
+def test_granule_mosaic_integer_fill_value(three_granule_swath, small_lcc_area):
+    data_arr = _test_data_array(three_granule_swath, dtype=np.uint16)
+    data_arr.attrs["_FillValue"] = 1000
+    scn = Scene()
+    scn["test"] = data_arr
+    # satpy's nearest fills integer products with their _FillValue
+    exp = scn.resample(small_lcc_area, resampler="nearest", reduce_data=False)["test"]
+
+    res = GranuleNearestResampler(three_granule_swath, small_lcc_area).resample(data_arr)
+    assert res.dtype == exp.dtype
+    np.testing.assert_array_equal(res.values, exp.values)
+    # swath covers part of the grid
+    assert (res.values == 1000).any()
+    assert not (res.values == np.iinfo(np.uint16).max).any()
+
+
+def test_granule_mosaic_extra_dims(three_granule_swath, small_lcc_area):
+    data_arr = _test_data_array(three_granule_swath)
+    rgb_arr = xr.concat([data_arr, data_arr * 2, data_arr * 3], dim="bands").transpose("bands", "y", "x")
+    rgb_arr = rgb_arr.assign_coords(bands=["R", "G", "B"])
+    resampler = GranuleNearestResampler(three_granule_swath, small_lcc_area)
+    res = resampler.resample(rgb_arr)
+    single = resampler.resample(data_arr)
+    assert res.dims == ("bands", "y", "x")
+    np.testing.assert_array_equal(res.coords["bands"].values, ["R", "G", "B"])
+    np.testing.assert_allclose(res.values[2], single.values * 3)
+
+
+def test_granule_mosaic_requires_swath(small_lcc_area):
+    with pytest.raises(TypeError):
+        GranuleNearestResampler(small_lcc_area, small_lcc_area)
+
+
+def test_resample_scene_uses_granule_mosaic(three_granule_swath, builtin_grids_yaml):
+    from polar2grid.resample._resample_scene import resample_scene
+
+    scn = Scene()
+    data_arr = _test_data_array(three_granule_swath)
+    data_arr.attrs.update({"reader": "viirs_sdr", "sensor": "viirs", "platform_name": "npp"})
+    scn["I01"] = data_arr
+    with mock.patch.object(
+        granule_mosaic, "_mosaic_granules", wraps=granule_mosaic._mosaic_granules
+    ) as mosaic_granules:
+        scenes_to_save = resample_scene(
+            scn,
+            ["211e_10km"],
+            builtin_grids_yaml,
+            "nearest",
+            is_polar2grid=True,
+            grid_coverage=0.0,
+            granule_mosaic=True,
+        )
+        new_scn, _ = scenes_to_save[0]
+        new_scn["I01"].compute()
+    mosaic_granules.assert_called_once()
+    assert new_scn["I01"].attrs["area"].area_id == "211e_10km"
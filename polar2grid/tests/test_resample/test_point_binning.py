@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for binning point data in to grid cells."""
+
+from __future__ import annotations
+
+from unittest import mock
+
+import dask.array as da
+import numpy as np
+import pytest
+import xarray as xr
+from pyresample.geometry import AreaDefinition, SwathDefinition
+from satpy import Scene
+
+from polar2grid.resample.point_binning import PointBinResampler
+
+NUM_POINTS = 5000
+
+
+@pytest.fixture
+def global_area() -> AreaDefinition:
+    return AreaDefinition("global_1deg", "", "", "EPSG:4326", 360, 180, (-180.0, -90.0, 180.0, 90.0))
+
+
+@pytest.fixture
+def fire_points() -> SwathDefinition:
+    rng = np.random.default_rng(0)
+    # clustered points so most cells have multiple points
+    lons = rng.uniform(-20.0, 20.0, NUM_POINTS)
+    lats = rng.uniform(-10.0, 10.0, NUM_POINTS)
+    lons[:10] = np.nan
+    lons = xr.DataArray(da.from_array(lons, chunks=1000), dims=("y",))
+    lats = xr.DataArray(da.from_array(lats, chunks=1000), dims=("y",))
+    return SwathDefinition(lons, lats)
+
+
+def _fire_data_array(swath_def: SwathDefinition, dtype=np.float32) -> xr.DataArray:
+    rng = np.random.default_rng(1)
+    if np.issubdtype(dtype, np.integer):
+        data = rng.integers(0, 100, NUM_POINTS).astype(dtype)
+        data[::10] = 255
+        attrs = {"_FillValue": 255}
+    else:
+        data = (rng.random(NUM_POINTS) * 500).astype(dtype)
+        data[::10] = np.nan
+        attrs = {}
+    attrs.update({"area": swath_def, "name": "power"})
+    return xr.DataArray(da.from_array(data, chunks=1000), dims=("y",), attrs=attrs)
+
+
+def _expected(swath_def: SwathDefinition, data_arr: xr.DataArray, statistic: str, fill_value) -> np.ndarray:
+    lons = swath_def.lons.values
+    lats = swath_def.lats.values
+    values = data_arr.values
+    valid = np.isfinite(lons) & np.isfinite(values.astype(np.float64))
+    if "_FillValue" in data_arr.attrs:
+        valid &= values != data_arr.attrs["_FillValue"]
+    rows = np.floor(90.0 - lats[valid]).astype(int)
+    cols = np.floor(lons[valid] + 180.0).astype(int)
+    cells = {}
+    for row, col, value in zip(rows, cols, values[valid], strict=True):
+        cells.setdefault((row, col), []).append(value)
+    funcs = {"max": np.max, "min": np.min, "sum": np.sum, "mean": np.mean, "count": len}
+    exp = np.full((180, 360), 0 if statistic == "count" else fill_value, dtype=np.float64)
+    for (row, col), cell_values in cells.items():
+        exp[row, col] = funcs[statistic](np.array(cell_values, dtype=np.float64))
+    return exp
+
+
+@pytest.mark.parametrize("statistic", ["max", "min", "sum", "mean", "count"])
+@pytest.mark.parametrize(("dtype", "fill_value"), [(np.float32, np.nan), (np.uint8, 255)])
+def test_point_binning(global_area, fire_points, statistic, dtype, fill_value):
+    data_arr = _fire_data_array(fire_points, dtype=dtype)
+    res = PointBinResampler(fire_points, global_area).resample(data_arr, fill_value=fill_value, statistic=statistic)
+    assert isinstance(res.data, da.Array)
+    assert res.dims == ("y", "x")
+    assert "crs" in res.coords
+    if statistic == "count":
+        assert res.dtype == np.int32
+    elif statistic in ("sum", "mean") and dtype == np.uint8:
+        assert res.dtype == np.float32
+    else:
+        assert res.dtype == dtype
+    exp_fill = np.nan if res.dtype == np.float32 else fill_value
+    exp = _expected(fire_points, data_arr, statistic, exp_fill)
+    np.testing.assert_allclose(res.values, exp, rtol=1e-5)
+
+
+@pytest.mark.parametrize(("statistic", "exp_fill"), [("max", 254), ("mean", np.nan)])
+def test_point_binning_integer_fill_value(global_area, fire_points, statistic, exp_fill):
+    data_arr = _fire_data_array(fire_points, dtype=np.uint8)
+    data_arr = data_arr.copy(data=da.where(data_arr.data == 255, np.uint8(254), data_arr.data))
+    data_arr.attrs["_FillValue"] = 254
+    res = PointBinResampler(fire_points, global_area).resample(data_arr, statistic=statistic)
+    np.testing.assert_equal(res.attrs["_FillValue"], exp_fill)
+    exp = _expected(fire_points, data_arr, statistic, exp_fill)
+    np.testing.assert_allclose(res.values, exp, rtol=1e-5)
+
+
+def test_point_binning_integer_no_fill_value(global_area, fire_points):
+    """Test that empty cells of integer products without a _FillValue use the data type's maximum."""
+    rng = np.random.default_rng(2)
+    # fire confidence categories
+    data = rng.integers(7, 10, NUM_POINTS).astype(np.uint8)
+    data_arr = xr.DataArray(
+        da.from_array(data, chunks=1000), dims=("y",), attrs={"area": fire_points, "name": "confidence_cat"}
+    )
+    res = PointBinResampler(fire_points, global_area).resample(data_arr, statistic="max")
+    assert res.dtype == np.uint8
+    assert res.attrs["_FillValue"] == 255
+    exp = _expected(fire_points, data_arr, "max", 255)
+    np.testing.assert_array_equal(res.values, exp)
+    assert set(np.unique(res.values)) == {7, 8, 9, 255}
+
+
+def test_point_binning_bad_args(global_area, fire_points):
+    data_arr = _fire_data_array(fire_points)
+    with pytest.raises(ValueError):
+        PointBinResampler(fire_points, global_area).resample(data_arr, statistic="median")
+    lons = xr.DataArray(da.zeros((10, 10)), dims=("y", "x"))
+    with pytest.raises(TypeError):
+        PointBinResampler(SwathDefinition(lons, lons), global_area)
+
+
+def test_resample_scene_uses_point_binning(global_area, fire_points):
+    from polar2grid.resample._resample_scene import resample_scene
+
+    scn = Scene()
+    data_arr = _fire_data_array(fire_points)
+    data_arr.attrs.update({"reader": "viirs_edr_active_fires", "sensor": "viirs"})
+    scn["power"] = data_arr
+    with mock.patch("polar2grid.resample._resample_scene.AreaDefResolver") as resolver_cls:
+        resolver_cls.return_value.get_frozen_area.return_value = global_area
+        resolver_cls.return_value.has_dynamic_extents.return_value = False
+        scenes_to_save = resample_scene(scn, ["global_1deg"], [], None, grid_coverage=0.0)
+    new_scn, _ = scenes_to_save[0]
+    exp = _expected(fire_points, data_arr, "max", np.nan)
+    np.testing.assert_allclose(new_scn["power"].values, exp)
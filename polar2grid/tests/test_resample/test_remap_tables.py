@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for precomputed nearest neighbor remap tables."""
+
+from __future__ import annotations
+
+import os
+from unittest import mock
+
+import dask
+import dask.array as da
+import numpy as np
+import pytest
+import xarray as xr
+from pyresample.geometry import AreaDefinition
+from satpy import Scene
+from satpy.resample.kdtree import KDTreeResampler
+from satpy.tests.utils import CustomScheduler
+
+from polar2grid.resample.remap_tables import RemapTableResampler, get_remap_table
+
+pytestmark = pytest.mark.filterwarnings("ignore:invalid value encountered:RuntimeWarning")
+
+
+@pytest.fixture
+def small_goes_area() -> AreaDefinition:
+    return AreaDefinition(
+        "small_goes",
+        "",
+        "",
+        "+proj=geos +lon_0=-75.0 +h=35786023.0 +a=6378137.0 +b=6356752.31414 +sweep=x +units=m +no_defs",
+        250,
+        150,
+        (-3627271.2913, 1583173.6575, 1382771.9287, 4589199.5895),
+    )
+
+
+@pytest.fixture
+def small_lcc_area() -> AreaDefinition:
+    return AreaDefinition(
+        "small_lcc",
+        "",
+        "",
+        {"proj": "lcc", "lat_0": 25.0, "lat_1": 25.0, "lon_0": -95.0, "datum": "WGS84"},
+        200,
+        120,
+        (-2500000.0, -500000.0, 2500000.0, 2500000.0),
+    )
+
+
+def _test_data_array(area_def: AreaDefinition, dtype=np.float32) -> xr.DataArray:
+    data = da.arange(area_def.size, chunks=5000).reshape(area_def.shape).rechunk(64).astype(dtype)
+    return xr.DataArray(data, dims=("y", "x"), attrs={"area": area_def, "name": "test"})
+
+
+@pytest.mark.parametrize(
+    ("dtype", "fill_value"),
+    [
+        (np.float32, np.nan),
+        (np.uint16, 65535),
+    ],
+)
+def test_remap_table_matches_nearest(small_goes_area, small_lcc_area, tmp_path, dtype, fill_value):
+    data_arr = _test_data_array(small_goes_area, dtype=dtype)
+    exp = KDTreeResampler(small_goes_area, small_lcc_area).resample(data_arr, fill_value=fill_value)
+
+    res = RemapTableResampler(small_goes_area, small_lcc_area).resample(
+        data_arr, cache_dir=str(tmp_path), fill_value=fill_value
+    )
+    assert res.dtype == exp.dtype
+    assert res.dims == ("y", "x")
+    np.testing.assert_array_equal(res.values, exp.values)
+    assert (res.values == fill_value).any() or np.isnan(res.values).any()
+
+    table_files = os.listdir(tmp_path)
+    assert len(table_files) == 1
+    table = np.load(tmp_path / table_files[0])
+    assert table.dtype == np.int16
+    assert table.shape == (2,) + small_lcc_area.shape
+
+
+def test_remap_table_integer_fill_value(small_goes_area, small_lcc_area, tmp_path):
+    data_arr = _test_data_array(small_goes_area, dtype=np.uint16)
+    data_arr.attrs["_FillValue"] = 65000
+    scn = Scene()
+    scn["test"] = data_arr
+    # satpy's nearest fills integer products with their _FillValue
+    exp = scn.resample(small_lcc_area, resampler="nearest", reduce_data=False)["test"]
+
+    res = RemapTableResampler(small_goes_area, small_lcc_area).resample(data_arr, cache_dir=str(tmp_path))
+    assert res.dtype == np.uint16
+    np.testing.assert_array_equal(res.values, exp.values)
+    assert (res.values == 65000).any()
+
+
+def test_remap_table_reused(small_goes_area, small_lcc_area, tmp_path):
+    """Test that tables are only created once and only the needed source data is used per block."""
+    table_fn = get_remap_table(small_goes_area, small_lcc_area, cache_dir=str(tmp_path))
+    data_arr = _test_data_array(small_goes_area)
+    with (
+        mock.patch("polar2grid.resample.remap_tables._compute_nearest_source_indexes") as compute_indexes,
+        dask.config.set(scheduler=CustomScheduler(0)),
+    ):
+        res = RemapTableResampler(small_goes_area, small_lcc_area).resample(data_arr, cache_dir=str(tmp_path))
+    compute_indexes.assert_not_called()
+    assert isinstance(res.data, da.Array)
+    assert res.data.chunksize == (64, 64)
+    table = np.load(table_fn)
+    valid = table[0] >= 0
+    exp = np.full(small_lcc_area.shape, np.nan, dtype=np.float32)
+    exp[valid] = data_arr.values[table[0][valid], table[1][valid]]
+    np.testing.assert_array_equal(res.values, exp)
+
+
+def test_remap_table_extra_dims(small_goes_area, small_lcc_area, tmp_path):
+    data_arr = _test_data_array(small_goes_area)
+    rgb_arr = xr.concat([data_arr, data_arr * 2, data_arr * 3], dim="bands").transpose("bands", "y", "x")
+    rgb_arr = rgb_arr.assign_coords(bands=["R", "G", "B"])
+    resampler = RemapTableResampler(small_goes_area, small_lcc_area)
+    res = resampler.resample(rgb_arr, cache_dir=str(tmp_path))
+    single = resampler.resample(data_arr, cache_dir=str(tmp_path))
+    assert res.dims == ("bands", "y", "x")
+    np.testing.assert_array_equal(res.coords["bands"].values, ["R", "G", "B"])
+    np.testing.assert_allclose(res.values[2], single.values * 3)
+
+
+def test_remap_table_requires_areas(small_lcc_area):
+    from pyresample.geometry import SwathDefinition
+
+    lons = xr.DataArray(da.zeros((10, 10)), dims=("y", "x"))
+    swath_def = SwathDefinition(lons, lons)
+    with pytest.raises(TypeError):
+        RemapTableResampler(swath_def, small_lcc_area)
+
+
+def test_resample_scene_uses_remap_tables(small_goes_area, tmp_path, builtin_grids_yaml):
+    from polar2grid.resample._resample_scene import resample_scene
+
+    scn = Scene()
+    data_arr = _test_data_array(small_goes_area)
+    data_arr.attrs.update({"reader": "abi_l1b", "sensor": "abi", "platform_name": "goes16"})
+    scn["C01"] = data_arr
+    with mock.patch("polar2grid.resample.remap_tables._get_cache_dir", return_value=str(tmp_path)) as get_cache_dir:
+        scenes_to_save = resample_scene(
+            scn,
+            ["211e_10km"],
+            builtin_grids_yaml,
+            "nearest",
+            is_polar2grid=False,
+            grid_coverage=0.0,
+            remap_tables=True,
+        )
+    get_cache_dir.assert_called_once()
+    assert len(os.listdir(tmp_path)) == 1
+    new_scn, data_ids = scenes_to_save[0]
+    assert new_scn["C01"].attrs["area"].area_id == "211e_10km"
+
+
+def test_build_remap_tables_cli(small_goes_area, small_lcc_area, tmp_path):
+    from polar2grid.resample.remap_tables import main
+
+    grids_fn = tmp_path / "grids.yaml"
+    small_goes_area.dump(str(grids_fn))
+    small_lcc_area.dump(str(grids_fn))
+    with open(grids_fn, "a") as grids_file:
+        grids_file.write(
+            "dynamic_lcc:\n  projection:\n    proj: lcc\n    lat_0: 25.0\n    lat_1: 25.0\n    lon_0: -95.0\n"
+            "  resolution: 10000\n"
+        )
+    cache_dir = tmp_path / "tables"
+    ret = main(["-s", "small_goes", "--grid-configs", str(grids_fn), "--cache-dir", str(cache_dir)])
+    assert ret == 0
+    # small_goes -> small_goes, small_goes -> small_lcc, dynamic grid skipped
+    assert len(os.listdir(cache_dir)) == 2
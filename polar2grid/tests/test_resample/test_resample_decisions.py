@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2026 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for resampling decision logic."""
+
+from unittest import mock
+
+import pytest
+
+from polar2grid.resample.resample_decisions import ResamplerDecisionTree
+
+
+def test_from_configs_reuses_tree():
+    dtree1 = ResamplerDecisionTree.from_configs()
+    dtree2 = ResamplerDecisionTree.from_configs()
+    assert dtree1 is dtree2
+
+
+def test_find_match_memoized(viirs_sdr_i01_data_array):
+    from satpy._config import config_search_paths
+    from satpy.decision_tree import DecisionTree
+
+    dtree = ResamplerDecisionTree(*config_search_paths("resampling.yaml"))
+    attrs = viirs_sdr_i01_data_array.attrs
+    orig_find_match = DecisionTree.find_match
+    with mock.patch.object(DecisionTree, "find_match", autospec=True, side_effect=orig_find_match) as tree_match:
+        match1 = dtree.find_match(**attrs)
+        match2 = dtree.find_match(**attrs)
+    assert match1 == match2
+    assert match1["resampler"] == "ewa"
+    assert tree_match.call_count == 1
+    # modifying a returned match doesn't change the cached match
+    match1["resampler"] = "nearest"
+    assert dtree.find_match(**attrs)["resampler"] == "ewa"
+
+
+def test_find_match_no_match():
+    dtree = ResamplerDecisionTree("only_a:\n  area_type: swath\n  name: a\n  resampler: nearest\n")
+    with pytest.raises(KeyError, match="No resampling configuration found"):
+        dtree.find_match(name="b", area=None, sensor="viirs")
+    with pytest.raises(KeyError, match="No resampling configuration found"):
+        dtree.find_match(name="b", area=None, sensor="viirs")
@@ -25,6 +25,7 @@
 from unittest import mock
 
 import dask
+import numpy as np
 import pytest
 from pyresample.ewa import DaskEWAResampler
 from pyresample.geometry import SwathDefinition
@@ -265,3 +266,58 @@ def test_partial_filter(viirs_sdr_i01_data_array):
     assert len(scenes_to_save) == 1
     new_scn, data_ids = scenes_to_save[0]
     assert len(new_scn.keys()) == 1  # I01
+
+
+def test_wishlist_without_grid_coverage(viirs_sdr_i01_data_array):
+    """Test that products without grid coverage are found from the geolocation only."""
+    from polar2grid.resample import wishlist_without_grid_coverage
+
+    new_i01 = viirs_sdr_i01_data_array.copy()
+    orig_lons = new_i01.attrs["area"].lons
+    new_lons = orig_lons + 180.0
+    new_lons.attrs = orig_lons.attrs.copy()
+    new_i01.attrs["name"] = "I01_2"
+    new_i01.attrs["area"] = SwathDefinition(new_lons, new_i01.attrs["area"].lats)
+    new_i01.attrs["sensor"] = {"viirs", "modis"}
+    new_scn = Scene()
+    new_scn["I01"] = viirs_sdr_i01_data_array
+    new_scn["I01_2"] = new_i01
+
+    uncovered_ids = wishlist_without_grid_coverage(new_scn, ["211e"], ["grids.conf"], None, grid_coverage=0.05)
+    assert [data_id["name"] for data_id in uncovered_ids] == ["I01_2"]
+    # covered by one of the grids
+    uncovered_ids = wishlist_without_grid_coverage(new_scn, ["211e", "wgs84_fit"], ["grids.conf"], None)
+    assert uncovered_ids == set()
+    uncovered_ids = wishlist_without_grid_coverage(new_scn, ["211e"], ["grids.conf"], None, grid_coverage=0.0)
+    assert uncovered_ids == set()
+
+
+def test_frozen_area_memoized(viirs_sdr_i01_scene, builtin_grids_yaml):
+    """Test that dynamic areas are frozen once from the swath boundary."""
+    from pyresample.geometry import DynamicAreaDefinition
+
+    from polar2grid.resample._resample_scene import AreaDefResolver
+
+    viirs_sdr_i01_scene.load(["I01"])
+    area_resolver = AreaDefResolver(viirs_sdr_i01_scene, builtin_grids_yaml)
+    # computation 1: swath boundary polygon
+    with (
+        dask.config.set(scheduler=CustomScheduler(1)),
+        mock.patch.object(
+            DynamicAreaDefinition, "freeze", autospec=True, side_effect=DynamicAreaDefinition.freeze
+        ) as freeze,
+    ):
+        area_def1 = area_resolver.get_frozen_area("wgs84_fit", antimeridian_mode="modify_crs")
+        area_def2 = area_resolver.get_frozen_area("wgs84_fit", antimeridian_mode="modify_crs")
+        area_def3 = area_resolver.get_frozen_area("wgs84_fit", antimeridian_mode="global_extents")
+    assert area_def1 is area_def2
+    assert area_def3 is not area_def1
+    assert area_resolver.has_dynamic_extents("wgs84_fit")
+    assert freeze.call_count == 2
+    lons, lats = freeze.call_args.args[1]
+    assert isinstance(lons, np.ndarray)
+    assert lons.size < viirs_sdr_i01_scene["I01"].size
+
+    full_area_def = area_resolver["wgs84_fit"].freeze(viirs_sdr_i01_scene.finest_area(), antimeridian_mode="modify_crs")
+    np.testing.assert_allclose(area_def1.area_extent, full_area_def.area_extent)
+    assert area_def1.shape == full_area_def.shape
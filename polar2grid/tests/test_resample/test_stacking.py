@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for resampling products with the same geolocation as one stacked array."""
+
+from __future__ import annotations
+
+import logging
+from unittest import mock
+
+import dask.array as da
+import numpy as np
+import pytest
+import xarray as xr
+from pyresample.geometry import AreaDefinition, SwathDefinition
+from satpy import Scene
+
+from polar2grid.resample import stacking
+from polar2grid.resample._resample_scene import resample_scene
+
+
+@pytest.fixture
+def small_lcc_area() -> AreaDefinition:
+    return AreaDefinition(
+        "small_lcc",
+        "",
+        "",
+        {"proj": "lcc", "lat_0": 35.0, "lat_1": 35.0, "lon_0": -95.0, "datum": "WGS84"},
+        60,
+        50,
+        (-800000.0, -600000.0, 700000.0, 1200000.0),
+    )
+
+
+def _nucaps_scene(level_dependent_invalid: bool = False) -> Scene:
+    rng = np.random.default_rng(0)
+    num_points = 400
+    lons = xr.DataArray(da.from_array(rng.uniform(-104.0, -86.0, num_points)), dims=("y",))
+    lats = xr.DataArray(da.from_array(rng.uniform(30.0, 45.0, num_points)), dims=("y",))
+    swath_def = SwathDefinition(lons, lats)
+    invalid = rng.random(num_points) < 0.1
+    scn = Scene()
+    for level in ("100", "500", "850"):
+        data = rng.random(num_points).astype(np.float32) * 100 + 200
+        data[invalid] = np.nan
+        if level_dependent_invalid:
+            # ex. levels below the surface
+            data[rng.random(num_points) < 0.2] = np.nan
+        scn[f"Temperature_{level}mb"] = xr.DataArray(
+            da.from_array(data),
+            dims=("y",),
+            attrs={"area": swath_def, "name": f"Temperature_{level}mb", "reader": "nucaps", "sensor": "cris"},
+        )
+    return scn
+
+
+def _mirs_scene() -> Scene:
+    rng = np.random.default_rng(0)
+    rows, cols = 30, 20
+    y, x = np.mgrid[0:rows, 0:cols]
+    geo_attrs = {"rows_per_scan": 0}
+    swath_def = SwathDefinition(
+        xr.DataArray(da.from_array(-100 + x * 0.3 + y * 0.05, chunks=10), dims=("y", "x"), attrs=geo_attrs),
+        xr.DataArray(da.from_array(30 + y * 0.3, chunks=10), dims=("y", "x"), attrs=geo_attrs),
+    )
+    scn = Scene()
+    for channel in range(1, 4):
+        data = rng.random((rows, cols)).astype(np.float32) * 100 + 200
+        scn[f"btemp_{channel}"] = xr.DataArray(
+            da.from_array(data, chunks=10),
+            dims=("y", "x"),
+            attrs={"area": swath_def, "name": f"btemp_{channel}", "reader": "mirs", "sensor": "atms"},
+        )
+    return scn
+
+
+@pytest.mark.parametrize(
+    ("input_scene", "resampler", "resample_kwargs", "is_stacked"),
+    [
+        # nearest neighbor stacking would fill pixels whose nearest source pixel is invalid for one level
+        (lambda: _nucaps_scene(True), "nearest", {"radius_of_influence": 40000}, False),
+        (_mirs_scene, "ewa", {"weight_delta_max": 100.0, "weight_distance_max": 1.0, "rows_per_scan": 0}, True),
+    ],
+)
+def test_stacked_matches_separate(small_lcc_area, input_scene, resampler, resample_kwargs, is_stacked):
+    scn = input_scene()
+    exp_scn = scn.resample(small_lcc_area, resampler=resampler, **resample_kwargs)
+
+    with (
+        mock.patch("polar2grid.resample._resample_scene.AreaDefResolver") as resolver_cls,
+        mock.patch.object(stacking, "stack_products", wraps=stacking.stack_products) as stack_products,
+    ):
+        resolver_cls.return_value.get_frozen_area.return_value = small_lcc_area
+        resolver_cls.return_value.has_dynamic_extents.return_value = False
+        scenes_to_save = resample_scene(scn, ["small_lcc"], [], None, grid_coverage=0.0)
+    assert stack_products.call_count == int(is_stacked)
+    assert len(scenes_to_save) == 1
+    new_scn, data_ids = scenes_to_save[0]
+    assert data_ids == set(scn.keys())
+    assert set(new_scn.keys()) == set(scn.keys())
+    for data_id in scn.keys():
+        res = new_scn[data_id]
+        assert res.dims == exp_scn[data_id].dims
+        assert res.attrs["name"] == data_id["name"]
+        assert res.attrs["area"] is small_lcc_area
+        np.testing.assert_array_equal(res.values, exp_scn[data_id].values)
+
+
+def test_stack_products_groups_by_geolocation():
+    scn = _nucaps_scene()
+    other_scn = _mirs_scene()
+    scn["btemp_1"] = other_scn["btemp_1"]
+    stacked_scn, ids_to_resample, stacks = stacking.stack_products(scn, list(scn.keys()))
+    assert len(stacks) == 1
+    stack_name, stacked_ids = next(iter(stacks.items()))
+    assert sorted(data_id["name"] for data_id in stacked_ids) == [
+        "Temperature_100mb",
+        "Temperature_500mb",
+        "Temperature_850mb",
+    ]
+    assert len(ids_to_resample) == 2
+    assert stack_name in ids_to_resample
+    assert stacked_scn[stack_name].dims == ("bands", "y")
+    assert "Temperature_100mb" not in stacked_scn
+
+
+def test_unstack_products_keeps_resampler_attrs(small_lcc_area):
+    scn = _mirs_scene()
+    stacked_scn, _, stacks = stacking.stack_products(scn, list(scn.keys()))
+    stack_name = next(iter(stacks))
+    stacked_arr = stacked_scn[stack_name]
+    resampled_scn = Scene()
+    resampled_scn[stack_name] = xr.DataArray(
+        da.zeros((3, 50, 60), dtype=np.float32),
+        dims=("bands", "y", "x"),
+        attrs={**stacked_arr.attrs, "area": small_lcc_area, "_FillValue": -999.0},
+    )
+    stacking.unstack_products(scn, resampled_scn, stacks)
+    for data_id in scn.keys():
+        res_attrs = resampled_scn[data_id].attrs
+        assert res_attrs["name"] == data_id["name"]
+        assert res_attrs["area"] is small_lcc_area
+        assert res_attrs["_FillValue"] == -999.0
+
+
+def test_stack_key_numpy_geolocation(caplog):
+    swath_def = SwathDefinition(
+        xr.DataArray(np.zeros((2, 2)), dims=("y", "x")), xr.DataArray(np.zeros((2, 2)), dims=("y", "x"))
+    )
+    data_arr = xr.DataArray(da.zeros((2, 2)), dims=("y", "x"), attrs={"area": swath_def, "name": "test"})
+    with caplog.at_level(logging.DEBUG, logger=stacking.LOG.name):
+        assert stacking._stack_key(data_arr) == (id(data_arr),)
+    assert "Not stacking test" in caplog.text
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2022 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for helpers shared by the custom resamplers."""
+
+from unittest import mock
+
+import dask.array as da
+import numpy as np
+import pytest
+import xarray as xr
+from pyresample.geometry import AreaDefinition
+
+from polar2grid.resample import _utils
+
+
+@pytest.mark.parametrize("use_satpy", [True, False])
+def test_update_resampled_coords(use_satpy):
+    area_def = AreaDefinition("small", "", "", "EPSG:4326", 5, 3, (-10.0, -10.0, 10.0, 10.0))
+    old_data = xr.DataArray(
+        da.zeros((2, 4, 6)),
+        dims=("bands", "y", "x"),
+        coords={"bands": ["R", "G"], "y": np.arange(4), "lats": (("y", "x"), np.zeros((4, 6)))},
+    )
+    new_data = xr.DataArray(da.zeros((2, 3, 5)), dims=("bands", "y", "x"))
+    satpy_func = _utils._update_resampled_coords if use_satpy else None
+    with mock.patch.object(_utils, "_update_resampled_coords", satpy_func):
+        res = _utils.update_resampled_coords(old_data, new_data, area_def)
+    np.testing.assert_array_equal(res.coords["bands"].values, ["R", "G"])
+    assert "lats" not in res.coords
+    assert res.coords["crs"].item() == area_def.crs
+    np.testing.assert_allclose(res.coords["x"].values, [-8.0, -4.0, 0.0, 4.0, 8.0], atol=1e-12)
+    np.testing.assert_allclose(res.coords["y"].values, [20 / 3, 0.0, -20 / 3], atol=1e-12)
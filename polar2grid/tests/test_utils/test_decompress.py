@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for decompressing input files before reading."""
+
+from __future__ import annotations
+
+import bz2
+import gzip
+import os
+import zipfile
+from unittest import mock
+
+import pytest
+
+from polar2grid.utils.decompress import stage_input_files
+
+
+def _ahi_filename(band: int, segment: int) -> str:
+    return f"HS_H09_20250101_0000_B{band:02d}_FLDK_R20_S{segment:02d}10.DAT"
+
+
+@pytest.fixture
+def compressed_inputs(tmp_path):
+    input_dir = tmp_path / "inputs"
+    input_dir.mkdir()
+    bz2_fn = input_dir / (_ahi_filename(1, 1) + ".bz2")
+    bz2_fn.write_bytes(bz2.compress(b"segment 1"))
+    gz_fn = input_dir / (_ahi_filename(1, 2) + ".gz")
+    gz_fn.write_bytes(gzip.compress(b"segment 2"))
+    zip_fn = input_dir / "segments.zip"
+    with zipfile.ZipFile(zip_fn, "w") as zip_file:
+        zip_file.writestr("data/" + _ahi_filename(1, 3), b"segment 3")
+        zip_file.writestr("data/" + _ahi_filename(1, 4), b"segment 4")
+    plain_fn = input_dir / _ahi_filename(1, 5)
+    plain_fn.write_bytes(b"segment 5")
+    # decompressed name isn't supported by the reader
+    other_fn = input_dir / "README.txt.gz"
+    other_fn.write_bytes(gzip.compress(b"readme"))
+    return [str(bz2_fn), str(gz_fn), str(zip_fn), str(plain_fn), str(other_fn)]
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_stage_input_files(compressed_inputs, tmp_path, num_workers):
+    output_dir = str(tmp_path / "decompressed")
+    staged = stage_input_files(compressed_inputs, "ahi_hsd", output_dir, num_workers=num_workers)
+    assert [os.path.basename(fn) for fn in staged] == [_ahi_filename(1, seg) for seg in range(1, 6)] + ["README.txt.gz"]
+    assert staged[-2:] == compressed_inputs[-2:]
+    for seg, fn in enumerate(staged[:4], start=1):
+        assert fn.startswith(output_dir)
+        with open(fn, "rb") as staged_file:
+            assert staged_file.read() == f"segment {seg}".encode()
+
+    with (
+        mock.patch("polar2grid.utils.decompress._decompress_file") as decompress_file,
+        mock.patch("polar2grid.utils.decompress.open", create=True, side_effect=AssertionError("file was read")),
+    ):
+        staged_again = stage_input_files(compressed_inputs[:2], "ahi_hsd", output_dir, num_workers=1)
+    decompress_file.assert_not_called()
+    assert staged_again == staged[:2]
+
+    # modified inputs are decompressed again
+    with open(compressed_inputs[0], "wb") as bz2_file:
+        bz2_file.write(bz2.compress(b"new segment 1"))
+    os.utime(compressed_inputs[0], ns=(0, 0))
+    staged_new = stage_input_files(compressed_inputs[:1], "ahi_hsd", output_dir, num_workers=1)
+    assert staged_new != staged[:1]
+    with open(staged_new[0], "rb") as staged_file:
+        assert staged_file.read() == b"new segment 1"
+
+
+def test_stage_input_files_persistent_cache(compressed_inputs, tmp_path, monkeypatch):
+    import satpy
+
+    from polar2grid.utils.decompress import CACHE_SUBDIR
+
+    output_dir = tmp_path / "decompressed"
+    cache_dir = tmp_path / "cache" / CACHE_SUBDIR
+    monkeypatch.setenv("P2G_DECOMPRESS_CACHE_SIZE", "1")
+    with satpy.config.set(cache_dir=str(tmp_path / "cache")):
+        stage_input_files(compressed_inputs[:1], "ahi_hsd", str(output_dir), num_workers=1)
+        assert len(os.listdir(cache_dir)) == 1
+        # only the files currently being processed fit in the cache
+        monkeypatch.setenv("P2G_DECOMPRESS_CACHE_SIZE", str(10 / 1024**3))
+        staged = stage_input_files(compressed_inputs[1:2], "ahi_hsd", str(output_dir), num_workers=1)
+    assert os.listdir(cache_dir) == [os.path.basename(os.path.dirname(staged[0]))]
+    assert not os.path.exists(output_dir)
+
+
+def test_stage_input_files_uncompressed(compressed_inputs, tmp_path):
+    with mock.patch("polar2grid.utils.decompress._get_reader_globs") as get_reader_globs:
+        staged = stage_input_files(compressed_inputs[3:4], "ahi_hsd", str(tmp_path / "decompressed"))
+    get_reader_globs.assert_not_called()
+    assert staged == compressed_inputs[3:4]
+    assert not os.path.exists(tmp_path / "decompressed")
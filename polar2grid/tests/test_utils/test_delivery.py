@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for progressive product delivery."""
+
+from __future__ import annotations
+
+import json
+
+import dask
+import dask.array as da
+import numpy as np
+import pytest
+import xarray as xr
+from pyresample.geometry import AreaDefinition
+
+from polar2grid.utils.delivery import ProgressiveDelivery
+
+
+class _FakeTarget:
+    def __init__(self, path):
+        self.path = path
+        self.closed = False
+
+    def __setitem__(self, key, value):
+        self.data = value
+
+    def close(self):
+        self.closed = True
+
+
+def _write_filename(filename: str, order: list) -> str:
+    order.append(filename)
+    return filename
+
+
+def test_progressive_delivery(tmp_path):
+    """Test that products are computed and announced one at a time in priority order."""
+    order = []
+    records = []
+    spool_fn = tmp_path / "spool.jsonl"
+    delivery = ProgressiveDelivery(
+        priority=["i05", "true_color"], spool_filename=str(spool_fn), callbacks=[records.append]
+    )
+    delivery.add(["solar_zenith_angle"], [dask.delayed(_write_filename)("sza.bin", order)])
+    delivery.add(["true_color"], [dask.delayed(_write_filename)("true_color_grid1.bin", order)])
+    target = _FakeTarget("i05.tif")
+    delivery.add(["i05"], ([da.zeros((2, 2), chunks=1)], [target]))
+    delivery.add(["true_color"], [dask.delayed(_write_filename)("true_color_grid2.bin", order)])
+    assert len(delivery) == 3
+
+    delivery.compute()
+
+    assert len(delivery) == 0
+    assert target.closed
+    np.testing.assert_array_equal(target.data, 0)
+    assert sorted(order[:2]) == ["true_color_grid1.bin", "true_color_grid2.bin"]
+    assert order[2] == "sza.bin"
+    assert [record["products"] for record in records] == [["i05"], ["true_color"], ["solar_zenith_angle"]]
+    assert records[0]["files"] == ["i05.tif"]
+    assert sorted(records[1]["files"]) == ["true_color_grid1.bin", "true_color_grid2.bin"]
+    spool_records = [json.loads(line) for line in spool_fn.read_text().splitlines()]
+    assert spool_records == records
+
+
+@pytest.mark.parametrize("overviews", [None, [2]])
+def test_progressive_delivery_geotiff(tmp_path, overviews):
+    """Test that files written by the geotiff writer are announced."""
+    from polar2grid.writers.geotiff import GeoTIFFWriter
+
+    area = AreaDefinition(
+        "test_area", "", "", {"proj": "eqc", "datum": "WGS84"}, 100, 80, (-500000.0, -400000.0, 500000.0, 400000.0)
+    )
+    data_arr = xr.DataArray(
+        da.from_array(np.linspace(0, 1, 80 * 100).reshape((80, 100)), chunks=40),
+        dims=("y", "x"),
+        attrs={"name": "test", "area": area},
+    )
+    output_fn = str(tmp_path / "test.tif")
+    writer = GeoTIFFWriter(filename=output_fn, enhance=False)
+    records = []
+    delivery = ProgressiveDelivery(callbacks=[records.append])
+    delivery.add(["test"], writer.save_dataset(data_arr, compute=False, overviews=overviews, dtype=np.uint8))
+
+    delivery.compute()
+
+    assert records[0]["files"] == [output_fn]
@@ -28,7 +28,7 @@ import logging
 
 import pytest
 
-from polar2grid.utils.legacy_compat import convert_p2g_pattern_to_satpy
+from polar2grid.utils.legacy_compat import AliasHandler, convert_p2g_pattern_to_satpy
 
 
 @pytest.mark.parametrize(
@@ -53,3 +53,29 @@ def test_pattern_formatting(input_str, exp_str, num_exp_warnings, caplog):
     assert new_str == exp_str
     legacy_warns = [record for record in caplog.records if "to avoid this warning" in record.message]
     assert len(legacy_warns) == num_exp_warnings
+
+
+def test_alias_handler_satpy_to_p2g_names():
+    from satpy import DataID, DataQuery
+    from satpy.dataset.dataid import default_id_keys_config
+
+    i01_id = DataID(default_id_keys_config, name="I01", resolution=371, calibration="reflectance")
+    i01_rad_id = DataID(default_id_keys_config, name="I01", resolution=371, calibration="radiance")
+    m01_id = DataID(default_id_keys_config, name="M01", resolution=742, calibration="reflectance")
+    other_id = DataID(default_id_keys_config, name="other", resolution=742)
+    aliases = {
+        "i01": DataQuery(name="I01", calibration="reflectance"),
+        "i01_rad": DataQuery(name="I01", calibration="radiance"),
+        "m01": DataQuery(name="M01", calibration="reflectance"),
+    }
+    alias_handler = AliasHandler(aliases, ["i01", "i01_rad", "m01"])
+    satpy_ids = [i01_id, i01_rad_id, m01_id, other_id]
+    p2g_names = list(alias_handler.convert_satpy_to_p2g_name(satpy_ids))
+    assert p2g_names == ["i01", "i01_rad", "m01", "other"]
+
+    # a subset of the same DataIDs uses its own cached result
+    p2g_names = list(alias_handler.convert_satpy_to_p2g_name([m01_id]))
+    assert p2g_names == ["m01"]
+    p2g_names = list(alias_handler.convert_satpy_to_p2g_name(satpy_ids))
+    assert p2g_names == ["i01", "i01_rad", "m01", "other"]
+    assert len(alias_handler._satpy_to_p2g_cache) == 2
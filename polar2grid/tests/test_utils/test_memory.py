@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for the memory governor."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+
+import dask
+import dask.array as da
+import numpy as np
+import xarray as xr
+
+from polar2grid.utils.memory import MemoryGovernor, get_rss
+
+
+class _ConcurrencyCounter:
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, block):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.01)
+        with self._lock:
+            self.running -= 1
+        return block
+
+
+def test_memory_governor_throttles_tasks(caplog):
+    """Test that only one task runs at a time when over the memory limit."""
+    counter = _ConcurrencyCounter()
+    data = da.zeros((40, 40), chunks=5).map_blocks(counter, dtype=np.float64)
+    governor = MemoryGovernor(get_rss() // 2, num_workers=4, interval=0.01)
+    with caplog.at_level(logging.INFO), dask.config.set(scheduler="threads"), governor:
+        assert governor.allowed_workers() == 1
+        data.compute()
+    assert counter.max_running == 1
+    assert governor.high_water_mark >= governor.max_memory
+    assert "Peak memory usage" in caplog.text
+
+
+def test_memory_governor_not_throttled():
+    """Test that all workers are used when well under the memory limit."""
+    governor = MemoryGovernor(get_rss() * 100, num_workers=4)
+    with governor:
+        assert governor.allowed_workers() == 4
+        assert not governor.should_spill()
+        arr = da.zeros((10, 10), chunks=5).persist()
+        assert governor.spill_if_needed([arr])[0] is arr
+
+
+def test_memory_governor_spills_arrays():
+    """Test that persisted arrays are moved to memory-mapped files when over the memory limit."""
+    np_data = np.arange(100.0).reshape((10, 10))
+    dask_arr = da.from_array(np_data, chunks=5).persist()
+    xr_arr = xr.DataArray(dask_arr, dims=("y", "x"), attrs={"name": "test"})
+    governor = MemoryGovernor(get_rss() // 2, num_workers=2)
+    with governor:
+        spilled_dask, spilled_xr = governor.spill_if_needed([dask_arr, xr_arr])
+        spill_dir = governor._spill_dir
+        assert len(os.listdir(spill_dir)) == 2
+        assert spilled_dask.chunks == dask_arr.chunks
+        assert isinstance(spilled_xr, xr.DataArray)
+        assert spilled_xr.attrs == xr_arr.attrs
+        np.testing.assert_array_equal(spilled_dask.compute(), np_data)
+        np.testing.assert_array_equal(spilled_xr.values, np_data)
+    assert not os.path.exists(spill_dir)
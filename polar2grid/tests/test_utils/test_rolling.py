@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for rolling window accumulation."""
+
+from __future__ import annotations
+
+import warnings
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from polar2grid.utils.rolling import RollingAccumulator
+
+START_TIME = datetime(2025, 10, 25, 15, 0)
+
+
+def _minute_data(minute: int) -> np.ndarray:
+    rng = np.random.default_rng(minute)
+    data = rng.random((4, 6), dtype=np.float32) * 10
+    data[rng.random((4, 6)) < 0.3] = np.nan
+    return data
+
+
+def _expected(all_data: list[np.ndarray], statistic: str) -> np.ndarray:
+    stack = np.stack(all_data)
+    funcs = {"sum": np.nansum, "mean": np.nanmean, "min": np.nanmin, "max": np.nanmax}
+    with warnings.catch_warnings():
+        # all NaN pixels
+        warnings.simplefilter("ignore", RuntimeWarning)
+        exp = funcs[statistic](stack, axis=0)
+    exp[np.isnan(stack).all(axis=0)] = np.nan
+    return exp
+
+
+@pytest.mark.parametrize("statistic", ["sum", "mean", "min", "max"])
+def test_rolling_window(tmp_path, statistic):
+    all_data = [_minute_data(minute) for minute in range(8)]
+    for minute, data in enumerate(all_data):
+        # new accumulator every minute to test persisting between executions
+        accumulator = RollingAccumulator(str(tmp_path), timedelta(minutes=5))
+        accumulator.add("fed", data, START_TIME + timedelta(minutes=minute), statistic=statistic)
+        accumulator.save()
+        res = accumulator.get("fed")
+        np.testing.assert_allclose(res, _expected(all_data[max(minute - 4, 0) : minute + 1], statistic), rtol=1e-6)
+        assert accumulator.window_start_time("fed") == START_TIME + timedelta(minutes=max(minute - 4, 0))
+
+
+def test_rolling_window_gaps_and_old_data(tmp_path, caplog):
+    all_data = [_minute_data(minute) for minute in range(12)]
+    accumulator = RollingAccumulator(str(tmp_path), timedelta(minutes=5))
+    for minute in (0, 1, 2, 8, 1, 9):
+        accumulator.add("fed", all_data[minute], START_TIME + timedelta(minutes=minute))
+    assert "older than the rolling window" in caplog.text
+    # minutes 0-2 expired when minute 8 was added
+    np.testing.assert_allclose(accumulator.get("fed"), _expected(all_data[8:10], "sum"), rtol=1e-6)
+    # re-adding a minute replaces it
+    accumulator.add("fed", all_data[0], START_TIME + timedelta(minutes=9))
+    np.testing.assert_allclose(accumulator.get("fed"), _expected([all_data[8], all_data[0]], "sum"), rtol=1e-6)
+
+
+def test_rolling_window_grid_change(tmp_path, caplog):
+    accumulator = RollingAccumulator(str(tmp_path), timedelta(minutes=5))
+    accumulator.add("fed", np.ones((4, 6), dtype=np.float32), START_TIME, grid_id="a")
+    accumulator.add("fed", np.ones((4, 6), dtype=np.float32), START_TIME + timedelta(minutes=1), grid_id="b")
+    assert "previous observations are discarded" in caplog.text
+    np.testing.assert_array_equal(accumulator.get("fed"), 1.0)
+    accumulator.save()
+
+    accumulator = RollingAccumulator(str(tmp_path), timedelta(minutes=10))
+    assert "settings changed" in caplog.text
+    with pytest.raises(KeyError):
+        accumulator.get("fed")
+
+
+def test_rolling_window_bad_args(tmp_path):
+    with pytest.raises(ValueError):
+        RollingAccumulator(str(tmp_path), timedelta(seconds=10))
+    accumulator = RollingAccumulator(str(tmp_path), timedelta(minutes=5))
+    with pytest.raises(ValueError):
+        accumulator.add("fed", np.ones((4, 6), dtype=np.float32), START_TIME, statistic="median")
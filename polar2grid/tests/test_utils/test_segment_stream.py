@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for processing segmented inputs as they arrive."""
+
+from __future__ import annotations
+
+import os
+from unittest import mock
+
+import dask.array as da
+import numpy as np
+import pytest
+import xarray as xr
+from pyresample.geometry import AreaDefinition
+from satpy import Scene
+
+from polar2grid.utils.segment_stream import SegmentAccumulator, SegmentStream
+
+
+def _ahi_filename(band: int, segment: int, start_time: str = "20250101_0000") -> str:
+    return f"HS_H09_{start_time}_B{band:02d}_FLDK_R20_S{segment:02d}10.DAT"
+
+
+def _create_files(watch_dir, filenames) -> None:
+    for fn in filenames:
+        (watch_dir / fn).touch()
+
+
+def _stream_with_new_files(stream: SegmentStream, watch_dir, files_per_check: list[list[str]]):
+    """Add files to the watch directory every time the stream checks it."""
+    orig_scan = stream._scan
+    files_per_check = list(files_per_check)
+
+    def _scan_and_add():
+        if files_per_check:
+            _create_files(watch_dir, files_per_check.pop(0))
+        return orig_scan()
+
+    with mock.patch.object(stream, "_scan", _scan_and_add):
+        return list(stream)
+
+
+def test_segment_stream_ahi(tmp_path):
+    stream = SegmentStream.from_reader("ahi_hsd", str(tmp_path), interval=0, timeout=10)
+    updates = _stream_with_new_files(
+        stream,
+        tmp_path,
+        [
+            [_ahi_filename(13, 1), _ahi_filename(13, 2), "README.txt"],
+            # segment 2 is ready once segment 3 arrives for any band
+            [_ahi_filename(14, 1), _ahi_filename(14, 2), _ahi_filename(14, 3)],
+            # next observation is ignored
+            [_ahi_filename(13, 1, start_time="20250101_0010")],
+            [_ahi_filename(13, 3)] + [_ahi_filename(band, seg) for band in (13, 14) for seg in range(4, 11)],
+        ],
+    )
+    assert [update.row_range for update in updates] == [(0.0, 0.1), (0.0, 0.2), (0.0, 1.0)]
+    assert [update.is_final for update in updates] == [False, False, True]
+    assert len(updates[0].filenames) == 2
+    assert len(updates[-1].filenames) == 20
+    assert all("20250101_0000" in fn for fn in updates[-1].filenames)
+
+
+def test_segment_stream_from_bottom_variable_heights(tmp_path):
+    stream = SegmentStream.from_reader("ahi_hsd", str(tmp_path), interval=0, timeout=10)
+    stream._from_bottom = True
+    stream._variable_heights = True
+    updates = _stream_with_new_files(
+        stream,
+        tmp_path,
+        [[_ahi_filename(13, seg) for seg in range(1, 5)], [_ahi_filename(13, seg) for seg in range(5, 11)]],
+    )
+    assert [update.row_range for update in updates] == [(pytest.approx(0.8), 1.0), (0.0, 1.0)]
+
+
+def test_segment_stream_waits_for_complete_files(tmp_path):
+    stream = SegmentStream.from_reader("ahi_hsd", str(tmp_path), interval=0, timeout=10)
+    segment_file = tmp_path / _ahi_filename(13, 10)
+    segment_file.write_bytes(b"a")
+    assert stream._scan()
+    assert stream._first_group() is None
+    # still being written
+    segment_file.write_bytes(b"ab")
+    assert stream._scan()
+    assert stream._first_group() is None
+    assert stream._scan()
+    assert stream._first_group() is not None
+    assert not stream._scan()
+
+
+def test_segment_stream_timeout(tmp_path, caplog):
+    _create_files(tmp_path, [_ahi_filename(13, seg) for seg in (1, 2, 4)])
+    updates = list(SegmentStream.from_reader("ahi_hsd", str(tmp_path), interval=0, timeout=0.05))
+    assert updates[-1].is_final
+    assert len(updates[-1].filenames) == 3
+    assert "Timed out" in caplog.text
+
+
+def test_segment_stream_unsupported_reader(tmp_path):
+    with pytest.raises(ValueError):
+        SegmentStream.from_reader("abi_l1b", str(tmp_path))
+
+
+@pytest.fixture
+def full_disk_area() -> AreaDefinition:
+    return AreaDefinition(
+        "small_fldk",
+        "",
+        "",
+        "+proj=geos +lon_0=140.7 +h=35785863 +a=6378137.0 +b=6356752.3 +units=m +no_defs",
+        100,
+        100,
+        (-5500000.0, -5500000.0, 5500000.0, 5500000.0),
+    )
+
+
+@pytest.fixture
+def north_grid() -> AreaDefinition:
+    return AreaDefinition(
+        "north_grid",
+        "",
+        "",
+        "EPSG:4326",
+        40,
+        20,
+        (120.0, 0.0, 160.0, 40.0),
+    )
+
+
+def _scenes_to_save(area_def: AreaDefinition, data: da.Array) -> list[tuple[Scene, set]]:
+    scn = Scene()
+    scn["B13"] = xr.DataArray(data, dims=("y", "x"), attrs={"area": area_def, "name": "B13"})
+    return [(scn, {scn["B13"].attrs["_satpy_id"]})]
+
+
+@pytest.mark.parametrize("use_native", [False, True])
+def test_segment_accumulator(full_disk_area, north_grid, tmp_path, use_native):
+    target_area = full_disk_area if use_native else north_grid
+    shape = target_area.shape
+    first_data = da.full(shape, 1.0, chunks=10)
+    final_data = da.full(shape, 2.0, chunks=10)
+    with SegmentAccumulator(work_dir=str(tmp_path)) as accumulator:
+        num_blocks = accumulator.update(_scenes_to_save(target_area, first_data), full_disk_area, (0.0, 0.5))
+        assert 0 < num_blocks < first_data.npartitions
+        assert accumulator.update(_scenes_to_save(target_area, first_data), full_disk_area, (0.0, 0.5)) == 0
+        num_final_blocks = accumulator.update(_scenes_to_save(target_area, final_data), full_disk_area, (0.0, 1.0))
+        assert num_blocks + num_final_blocks == first_data.npartitions
+
+        (scn, data_ids), *_ = accumulator.finalize()
+        res = scn["B13"]
+        assert res.chunks == final_data.chunks
+        assert res.attrs["area"] == target_area
+        res_data = res.values
+    assert not os.listdir(tmp_path)
+    np.testing.assert_array_equal(np.unique(res_data), [1.0, 2.0])
+    # top rows only depend on the northern half of the full disk
+    assert (res_data[:10] == 1.0).all()
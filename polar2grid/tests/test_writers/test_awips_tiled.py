@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for the AWIPS tiled writer."""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import dask
+import dask.array as da
+import numpy as np
+import pytest
+import satpy
+import xarray as xr
+from pyresample.geometry import AreaDefinition
+
+
+def _create_lcc_data_arr() -> xr.DataArray:
+    area_def = AreaDefinition(
+        "test",
+        "test",
+        "test",
+        "+proj=lcc +datum=WGS84 +ellps=WGS84 +lon_0=-95. +lat_0=25 +lat_1=25 +units=m +no_defs",
+        100,
+        200,
+        (-1000.0, -1500.0, 1000.0, 1500.0),
+    )
+    data = np.linspace(0.0, 1.0, 200 * 100, dtype=np.float32).reshape((200, 100))
+    # only the top half of the image has valid data
+    data[100:, :] = np.nan
+    return xr.DataArray(
+        da.from_array(data, chunks=50),
+        dims=("y", "x"),
+        attrs={
+            "name": "test_ds",
+            "platform_name": "PLAT",
+            "sensor": "SENSOR",
+            "units": "1",
+            "standard_name": "toa_bidirectional_reflectance",
+            "area": area_def,
+            "start_time": dt.datetime(2018, 1, 1, 12, 0, 0),
+            "end_time": dt.datetime(2018, 1, 1, 12, 15, 0),
+        },
+    )
+
+
+class TestAWIPSTiledWriter:
+    def setup_method(self):
+        """Add P2G configs to the Satpy path."""
+        from polar2grid.utils.config import add_polar2grid_config_paths
+
+        self._old_path = satpy.config.get("config_path")
+        add_polar2grid_config_paths()
+
+    def teardown_method(self):
+        """Reset Satpy config path back to the original value."""
+        satpy.config.set(config_path=self._old_path)
+
+    @pytest.mark.parametrize("tile_workers", [0, 2])
+    def test_empty_tiles_skipped(self, tile_workers, tmp_path):
+        """Test that only tiles with valid data are written."""
+        scn = satpy.Scene()
+        scn["test_ds"] = _create_lcc_data_arr()
+        results = scn.save_datasets(
+            writer="awips_tiled",
+            base_dir=str(tmp_path),
+            sector_id="LCC",
+            source_name="TESTS",
+            tile_count=(2, 2),
+            compress=True,
+            tile_workers=tile_workers,
+            compute=False,
+        )
+        dask_results = dask.compute(*results)
+        all_files = sorted(os.listdir(tmp_path))
+        assert len(all_files) == 2
+        assert all("_T001" in fn or "_T002" in fn for fn in all_files)
+        if tile_workers:
+            # skipped tiles aren't reported as written
+            (written_files,) = dask_results
+            assert sorted(os.path.basename(fn) for fn in written_files) == all_files
+        with xr.open_dataset(tmp_path / all_files[0], mask_and_scale=False) as nc_ds:
+            assert "data" in nc_ds
+            assert nc_ds["data"].encoding["zlib"]
+
+    def test_tile_processes_shut_down(self, tmp_path):
+        """Test that tile writing processes are only started when tiles are written and are shut down after."""
+        from unittest import mock
+
+        from polar2grid.writers import awips_tiled
+
+        scn = satpy.Scene()
+        scn["test_ds"] = _create_lcc_data_arr()
+        save_kwargs = {
+            "writer": "awips_tiled",
+            "base_dir": str(tmp_path),
+            "sector_id": "LCC",
+            "source_name": "TESTS",
+            "tile_count": (2, 2),
+            "tile_workers": 2,
+        }
+        executors = []
+
+        def _create_executor(*args, **kwargs):
+            executor = ProcessPoolExecutor(*args, **kwargs)
+            executors.append(executor)
+            return executor
+
+        with mock.patch.object(awips_tiled, "ProcessPoolExecutor", side_effect=_create_executor):
+            scn.save_datasets(compute=False, **save_kwargs)
+            assert not executors
+            scn.save_datasets(**save_kwargs)
+        assert len(executors) == 1
+        with pytest.raises(RuntimeError, match="shutdown"):
+            executors[0].submit(print)
+        assert len(os.listdir(tmp_path)) == 2
+
+    def test_incremental_tiles(self, tmp_path):
+        """Test that tiles are only rewritten when their data changes."""
+        from unittest import mock
+
+        from polar2grid.writers import awips_tiled
+
+        data_arr = _create_lcc_data_arr()
+        save_kwargs = {
+            "writer": "awips_tiled",
+            "base_dir": str(tmp_path),
+            "sector_id": "LCC",
+            "source_name": "TESTS",
+            "tile_count": (2, 2),
+            "incremental_tiles": True,
+        }
+        with mock.patch.object(
+            awips_tiled, "to_nonempty_netcdf", wraps=awips_tiled.to_nonempty_netcdf
+        ) as to_netcdf_mock:
+            scn = satpy.Scene()
+            scn["test_ds"] = data_arr
+            with mock.patch.object(awips_tiled.os, "replace", wraps=os.replace) as replace_mock:
+                scn.save_datasets(**save_kwargs)
+            assert to_netcdf_mock.call_count == 2
+            assert os.path.isfile(tmp_path / ".awips_tile_state_LCC.json")
+            # state is saved once for all tiles
+            assert replace_mock.call_count == 1
+
+            scn = satpy.Scene()
+            scn["test_ds"] = data_arr.copy()
+            scn.save_datasets(**save_kwargs)
+            assert to_netcdf_mock.call_count == 2
+
+            # change data in only one of the valid tiles
+            new_data = data_arr.data.compute()
+            new_data[:10, :10] = 0.25
+            scn = satpy.Scene()
+            scn["test_ds"] = data_arr.copy(data=da.from_array(new_data, chunks=50))
+            scn.save_datasets(**save_kwargs)
+            assert to_netcdf_mock.call_count == 3
+
+            # new data that only partially covers a tile is merged with the existing tile
+            partial_data = np.full_like(new_data, np.nan)
+            partial_data[:10, :10] = 0.3
+            scn = satpy.Scene()
+            scn["test_ds"] = data_arr.copy(data=da.from_array(partial_data, chunks=50))
+            scn.save_datasets(**save_kwargs)
+            assert to_netcdf_mock.call_count == 4
+            # merging the same partial data again doesn't change the tile
+            scn.save_datasets(**save_kwargs)
+            assert to_netcdf_mock.call_count == 4
+
+            # the tile is modified without recording its state
+            scn_full = satpy.Scene()
+            scn_full["test_ds"] = data_arr.copy(data=da.from_array(new_data, chunks=50))
+            scn_full.save_datasets(**{**save_kwargs, "incremental_tiles": False})
+            scn.save_datasets(**save_kwargs)
+            assert to_netcdf_mock.call_count == 5
+
+        # state for removed tile files is dropped
+        for tile_fn in tmp_path.glob("*_T002_*.nc"):
+            tile_fn.unlink()
+        scn.save_datasets(**save_kwargs)
+        with open(tmp_path / ".awips_tile_state_LCC.json") as state_file:
+            tile_names = list(json.load(state_file))
+        assert len(tile_names) == 1
+        assert "_T001_" in tile_names[0]
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for the CF writer."""
+
+import datetime as dt
+
+import dask.array as da
+import numpy as np
+import satpy
+import xarray as xr
+from pyresample import AreaDefinition
+
+
+def test_cf_include_lonlats_cached(tmp_path, monkeypatch):
+    """Test that lon/lat coordinates are written from the grid lon/lat cache."""
+    from polar2grid.grids.lonlat_cache import CACHE_SUBDIR, register_static_grid
+    from polar2grid.utils.config import add_polar2grid_config_paths
+
+    monkeypatch.setenv("P2G_LONLAT_CACHE_SIZE", "2")
+
+    area_def = AreaDefinition(
+        "test_lcc", "test_lcc", "test_lcc", "+proj=lcc +lat_0=25 +lat_1=25 +lon_0=-95", 100, 80, (-1e6, -8e5, 1e6, 8e5)
+    )
+    register_static_grid(area_def)
+    data_arr = xr.DataArray(
+        da.zeros((80, 100), chunks=40, dtype=np.float32),
+        dims=("y", "x"),
+        attrs={
+            "name": "test",
+            "area": area_def,
+            "start_time": dt.datetime(2020, 1, 1),
+            "end_time": dt.datetime(2020, 1, 1, 0, 5),
+            "platform_name": "PLAT",
+            "sensor": "SENSOR",
+        },
+    )
+    scn = satpy.Scene()
+    scn["test"] = data_arr
+    output_fn = tmp_path / "test.nc"
+    old_path = satpy.config.get("config_path")
+    add_polar2grid_config_paths()
+    try:
+        with satpy.config.set(cache_dir=str(tmp_path / "cache")):
+            scn.save_datasets(writer="cf", filename=str(output_fn), include_lonlats=True)
+    finally:
+        satpy.config.set(config_path=old_path)
+    assert len(list((tmp_path / "cache" / CACHE_SUBDIR).iterdir())) == 1
+
+    exp_lons, exp_lats = area_def.get_lonlats()
+    with xr.open_dataset(output_fn) as nc_ds:
+        np.testing.assert_allclose(nc_ds["longitude"].values, exp_lons)
+        np.testing.assert_allclose(nc_ds["latitude"].values, exp_lats)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for the geotiff writer."""
+
+from __future__ import annotations
+
+import dask.array as da
+import numpy as np
+import pytest
+import xarray as xr
+
+
+def _create_l_image() -> xr.DataArray:
+    data = np.linspace(0.0, 1.0, 250 * 300).reshape((1, 250, 300))
+    data[:, :20] = np.nan
+    return xr.DataArray(
+        da.from_array(data, chunks=64),
+        dims=("bands", "y", "x"),
+        coords={"bands": ["L"]},
+        attrs={"name": "test"},
+    )
+
+
+@pytest.mark.filterwarnings("ignore::rasterio.errors.NotGeoreferencedWarning")
+@pytest.mark.parametrize("resampling", ["nearest", "average"])
+def test_in_graph_overviews(resampling, tmp_path, monkeypatch):
+    """Test that overviews are computed by dask and written to the overview levels."""
+    pytest.importorskip("osgeo")
+    import rasterio
+    from trollimage.xrimage import XRImage
+
+    from polar2grid.writers.geotiff import GeoTIFFWriter, _downsample_image, _InGraphOverviewsRIODataset
+
+    # write the overviews in multiple strips
+    monkeypatch.setattr(_InGraphOverviewsRIODataset, "rows_per_write", 16)
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path / "tmp"))
+    (tmp_path / "tmp").mkdir()
+    output_fn = tmp_path / "test.tif"
+    writer = GeoTIFFWriter(filename=str(output_fn))
+    img = XRImage(_create_l_image())
+    writer.save_image(img, overviews=[2, 4], overviews_resampling=resampling, dtype=np.uint8)
+
+    with rasterio.open(output_fn) as tif_file:
+        assert tif_file.overviews(1) == [2, 4]
+        base_data = tif_file.read()
+    for overview_level, factor in enumerate([2, 4]):
+        with rasterio.open(output_fn, overview_level=overview_level) as ov_file:
+            ov_data = ov_file.read()
+        exp_data = _downsample_image(da.from_array(base_data), factor, resampling, None).compute()
+        assert ov_data.shape == (2, -(-250 // factor), -(-300 // factor))
+        # overviews built from the empty image before writing would be all 0
+        assert ov_data[0].any()
+        np.testing.assert_array_equal(ov_data, exp_data)
+    assert not list((tmp_path / "tmp").iterdir())
+
+
+@pytest.mark.filterwarnings("ignore::rasterio.errors.NotGeoreferencedWarning")
+def test_overviews_without_gdal_python(tmp_path, monkeypatch):
+    """Test that overviews are built by GDAL after writing when the GDAL python bindings aren't available."""
+    import sys
+
+    import rasterio
+    from satpy.writers.core.compute import compute_writer_results
+    from trollimage.xrimage import XRImage
+
+    from polar2grid.writers.geotiff import GeoTIFFWriter
+
+    monkeypatch.setitem(sys.modules, "osgeo", None)
+    output_fn = tmp_path / "test.tif"
+    writer = GeoTIFFWriter(filename=str(output_fn))
+    img = XRImage(_create_l_image())
+    sources, targets = writer.save_image(
+        img, overviews=[2, 4], overviews_resampling="average", dtype=np.uint8, compute=False
+    )
+    assert len(sources) == len(targets) == 1
+    compute_writer_results([(sources, targets)])
+    with rasterio.open(output_fn) as tif_file:
+        assert tif_file.overviews(1) == [2, 4]
+    with rasterio.open(output_fn, overview_level=0) as ov_file:
+        assert ov_file.read()[0].any()
+
+
+def test_overview_buffers_created_on_write(tmp_path, monkeypatch):
+    """Test that the temporary overview files are only created when overview data is written."""
+    from unittest import mock
+
+    from polar2grid.writers.geotiff import _InGraphOverviewsRIODataset
+
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    ov_src = da.zeros((1, 10, 12), dtype=np.uint8)
+    in_graph_dataset = _InGraphOverviewsRIODataset(mock.Mock(), [ov_src])
+    assert not list(tmp_path.iterdir())
+
+    da.store([ov_src + 1], in_graph_dataset.overview_buffers)
+    (tmp_dir,) = tmp_path.iterdir()
+    np.testing.assert_array_equal(in_graph_dataset.overview_buffers[0].flush(), 1)
+    assert [path.name for path in tmp_dir.iterdir()] == ["overview_0.npy"]
+
+
+def test_downsample_image_nearest_center_pixel():
+    """Test that nearest neighbor overviews use the center pixel of each block."""
+    from polar2grid.writers.geotiff import _downsample_image
+
+    data = da.from_array(np.arange(5 * 5, dtype=np.uint8).reshape((1, 5, 5)), chunks=2)
+    res = _downsample_image(data, 2, "nearest", None).compute()
+    np.testing.assert_array_equal(res[0], [[6, 8, 9], [16, 18, 19], [21, 23, 24]])
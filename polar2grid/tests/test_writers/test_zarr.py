@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+# Copyright (C) 2026 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Tests for the zarr writer."""
+
+import datetime as dt
+import os
+
+import numpy as np
+import pytest
+import satpy
+
+TEST_ETC_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "etc"))
+
+
+class TestZarrWriter:
+    def setup_method(self):
+        """Add P2G configs to the Satpy path."""
+        from polar2grid.utils.config import add_polar2grid_config_paths
+
+        self._old_path = satpy.config.get("config_path")
+        add_polar2grid_config_paths()
+        # add test specific configs
+        curr_path = satpy.config.get("config_path")
+        satpy.config.set(config_path=[TEST_ETC_DIR] + curr_path)
+
+    def teardown_method(self):
+        """Reset Satpy config path back to the original value."""
+        satpy.config.set(config_path=self._old_path)
+
+    def test_zarr_basic(self, abi_l1b_c01_scene, tmp_path):
+        """Test basic writing of gridded data."""
+        zarr = pytest.importorskip("zarr")
+
+        abi_l1b_c01_scene.load(["C01"])
+        data_arr = abi_l1b_c01_scene["C01"]
+        abi_l1b_c01_scene.save_datasets(
+            writer="zarr",
+            base_dir=str(tmp_path),
+            filename="{platform_name}_{sensor}_{start_time:%Y%m%d_%H%M%S}.zarr",
+        )
+        exp_fn = tmp_path / "goes16_abi_20210101_120000.zarr"
+
+        assert os.path.isdir(exp_fn)
+        root = zarr.open_group(exp_fn, mode="r")
+        assert "goes_east" in root
+        assert "proj4_definition" in root["goes_east"].attrs
+        zarr_arr = root["goes_east"]["C01"]
+        assert zarr_arr.shape == data_arr.shape
+        assert zarr_arr.chunks == data_arr.data.chunksize
+        assert zarr_arr.attrs["begin_time"] == data_arr.attrs["start_time"].isoformat()
+        np.testing.assert_allclose(zarr_arr[:], data_arr.values, equal_nan=True)
+
+    def test_zarr_append_time(self, abi_l1b_c01_scene, tmp_path):
+        """Test appending new time steps to an existing store."""
+        zarr = pytest.importorskip("zarr")
+
+        abi_l1b_c01_scene.load(["C01"])
+        data_arr = abi_l1b_c01_scene["C01"]
+        output_fn = tmp_path / "abi.zarr"
+        for time_step in range(2):
+            new_data_arr = data_arr + time_step
+            new_data_arr.attrs = data_arr.attrs.copy()
+            new_data_arr.attrs["start_time"] = data_arr.attrs["start_time"] + dt.timedelta(minutes=10 * time_step)
+            scn = satpy.Scene()
+            scn["C01"] = new_data_arr
+            scn.save_datasets(writer="zarr", filename=str(output_fn), append_time=True)
+
+        root = zarr.open_group(output_fn, mode="r")
+        zarr_arr = root["goes_east"]["C01"]
+        assert zarr_arr.shape == (2,) + data_arr.shape
+        assert zarr_arr.chunks == (1,) + data_arr.data.chunksize
+        time_arr = root["goes_east"]["time"]
+        np.testing.assert_array_equal(np.diff(time_arr[:]), [600.0])
+        np.testing.assert_allclose(zarr_arr[1], data_arr.values + 1, equal_nan=True)
+
+    def test_zarr_append_existing_time(self, abi_l1b_c01_scene, tmp_path):
+        """Test that data for an existing time step with different chunks replaces that time step."""
+        zarr = pytest.importorskip("zarr")
+
+        abi_l1b_c01_scene.load(["C01"])
+        data_arr = abi_l1b_c01_scene["C01"]
+        output_fn = tmp_path / "abi.zarr"
+        for time_step in range(2):
+            new_data_arr = data_arr + time_step
+            if time_step == 1:
+                new_data_arr = new_data_arr.chunk({"y": data_arr.shape[0] // 3, "x": data_arr.shape[1] // 3})
+            new_data_arr.attrs = data_arr.attrs.copy()
+            scn = satpy.Scene()
+            scn["C01"] = new_data_arr
+            scn.save_datasets(writer="zarr", filename=str(output_fn), append_time=True)
+
+        root = zarr.open_group(output_fn, mode="r")
+        zarr_arr = root["goes_east"]["C01"]
+        assert zarr_arr.shape == (1,) + data_arr.shape
+        assert zarr_arr.chunks == (1,) + data_arr.data.chunksize
+        assert root["goes_east"]["time"].shape == (1,)
+        np.testing.assert_allclose(zarr_arr[0], data_arr.values + 1, equal_nan=True)
+
+    def test_zarr_integer_fill_value(self, abi_l1b_c01_scene, tmp_path):
+        """Test that integer arrays use the product's fill value."""
+        zarr = pytest.importorskip("zarr")
+
+        abi_l1b_c01_scene.load(["C01"])
+        data_arr = abi_l1b_c01_scene["C01"]
+        int_data_arr = data_arr.fillna(255).astype(np.uint8)
+        int_data_arr.attrs = data_arr.attrs.copy()
+        int_data_arr.attrs["_FillValue"] = 255
+        scn = satpy.Scene()
+        scn["C01"] = int_data_arr
+        output_fn = tmp_path / "abi.zarr"
+        scn.save_datasets(writer="zarr", filename=str(output_fn))
+
+        root = zarr.open_group(output_fn, mode="r")
+        assert root["goes_east"]["C01"].fill_value == 255
+
+    def test_zarr_multiple_sensors(self, abi_l1b_c01_scene, tmp_path):
+        """Test that products from multiple sensors have a single instrument name."""
+        zarr = pytest.importorskip("zarr")
+
+        abi_l1b_c01_scene.load(["C01"])
+        data_arr = abi_l1b_c01_scene["C01"].copy()
+        data_arr.attrs["sensor"] = {"viirs", "abi"}
+        scn = satpy.Scene()
+        scn["C01"] = data_arr
+        output_fn = tmp_path / "abi.zarr"
+        scn.save_datasets(writer="zarr", filename=str(output_fn))
+
+        root = zarr.open_group(output_fn, mode="r")
+        assert root["goes_east"]["C01"].attrs["instrument"] == "abi-viirs"
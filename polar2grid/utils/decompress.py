@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Decompress compressed input files before they are read.
+
+Some inputs are commonly distributed compressed (ex. bzip2 compressed
+``ahi_hsd`` segments). Readers that support these files decompress them one
+at a time while reading and again every time the files are processed. Instead,
+input files ending in ``.bz2``, ``.gz``, or ``.zip`` whose decompressed name
+is supported by the reader are decompressed in parallel worker processes
+before the files are given to Satpy.
+
+By default files are decompressed to a temporary directory that is removed
+when processing is done. Setting the environment variable
+``P2G_DECOMPRESS_CACHE_SIZE`` to a number of gigabytes instead keeps the
+decompressed files in a ``polar2grid_decompressed`` directory of Satpy's
+``cache_dir`` so processing the same inputs again reuses them. Only the most
+recently used files are kept, up to that size.
+
+Decompressed files are stored in a sub-directory named by the path, size,
+and modification time of the compressed file so finding an existing copy
+doesn't require reading the compressed file.
+
+"""
+
+from __future__ import annotations
+
+import bz2
+import fnmatch
+import gzip
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional
+
+LOG = logging.getLogger(__name__)
+
+CACHE_SUBDIR = "polar2grid_decompressed"
+COMPRESSED_SUFFIXES = (".bz2", ".gz", ".zip")
+_COPY_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def stage_input_files(
+    filenames: list,
+    reader_name: str,
+    output_dir: str,
+    num_workers: Optional[int] = None,
+) -> list:
+    """Replace compressed input files with their decompressed copies.
+
+    Args:
+        filenames: Input files. Entries that aren't local paths (ex. remote
+            files) are returned as is.
+        reader_name: Satpy reader that will read the files. Only files whose
+            decompressed names match one of the reader's file patterns are
+            decompressed.
+        output_dir: Directory to decompress files to for this execution.
+            The caller is responsible for removing it. Not used if the
+            persistent cache is enabled with ``P2G_DECOMPRESS_CACHE_SIZE``.
+        num_workers: Maximum number of worker processes. Defaults to the
+            number of CPUs.
+
+    Returns:
+        Input files with every decompressed file in place of its compressed
+        file.
+
+    """
+    if not any(isinstance(fn, str) and fn.endswith(COMPRESSED_SUFFIXES) for fn in filenames):
+        return list(filenames)
+    reader_globs = _get_reader_globs(reader_name)
+    to_decompress = [fn for fn in filenames if isinstance(fn, str) and _should_decompress(fn, reader_globs)]
+    if not to_decompress:
+        return list(filenames)
+
+    cache_size = _get_cache_size()
+    cache_dir = _get_cache_dir() if cache_size > 0 else output_dir
+    os.makedirs(cache_dir, exist_ok=True)
+    LOG.info("Decompressing %d input files to %s", len(to_decompress), cache_dir)
+    staged_files = dict(zip(to_decompress, _decompress_all(to_decompress, cache_dir, num_workers), strict=True))
+    if cache_size > 0:
+        _prune_cache_dir(cache_dir, cache_size, {os.path.dirname(fns[0]) for fns in staged_files.values() if fns})
+
+    new_filenames = []
+    for fn in filenames:
+        if isinstance(fn, str) and fn in staged_files:
+            new_filenames.extend(staged_files[fn])
+        else:
+            new_filenames.append(fn)
+    return new_filenames
+
+
+def _get_cache_size() -> int:
+    return int(float(os.environ.get("P2G_DECOMPRESS_CACHE_SIZE", "0")) * 1024**3)
+
+
+def _get_cache_dir() -> str:
+    import satpy
+
+    return os.path.join(satpy.config.get("cache_dir"), CACHE_SUBDIR)
+
+
+def _get_reader_globs(reader_name: str) -> list[str]:
+    from satpy.readers.core.config import configs_for_reader
+    from satpy.readers.core.yaml_reader import load_yaml_configs
+    from trollsift import globify
+
+    config_files = next(configs_for_reader(reader_name))
+    file_types = load_yaml_configs(*config_files)["file_types"]
+    return [globify(pattern) for file_type in file_types.values() for pattern in file_type["file_patterns"]]
+
+
+def _should_decompress(filename: str, reader_globs: list[str]) -> bool:
+    if not filename.endswith(COMPRESSED_SUFFIXES) or not os.path.isfile(filename):
+        return False
+    if filename.endswith(".zip"):
+        try:
+            with zipfile.ZipFile(filename) as zip_file:
+                member_names = [os.path.basename(name) for name in zip_file.namelist()]
+        except zipfile.BadZipFile:
+            return False
+    else:
+        member_names = [os.path.splitext(os.path.basename(filename))[0]]
+    return any(_matches_any(name, reader_globs) for name in member_names)
+
+
+def _matches_any(basename: str, reader_globs: Iterable[str]) -> bool:
+    return any(fnmatch.fnmatch(basename, pattern) for pattern in reader_globs)
+
+
+def _decompress_all(filenames: list[str], cache_dir: str, num_workers: Optional[int]) -> list[list[str]]:
+    num_workers = min(num_workers or os.cpu_count() or 1, len(filenames))
+    if num_workers <= 1:
+        return [_decompress_to_cache(fn, cache_dir) for fn in filenames]
+    # don't fork a process that may already be running dask threads
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return list(executor.map(_decompress_to_cache, filenames, [cache_dir] * len(filenames)))
+
+
+def _decompress_to_cache(filename: str, cache_dir: str) -> list[str]:
+    """Decompress one file in to the cache directory if it isn't there already.
+
+    Returns:
+        Paths of the decompressed files.
+
+    """
+    entry_dir = os.path.join(cache_dir, _file_cache_key(filename))
+    if os.path.isdir(entry_dir):
+        LOG.debug("Using cached decompressed copy of %s", filename)
+        # mark as recently used
+        os.utime(entry_dir)
+        return _list_entry_files(entry_dir)
+
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp_", dir=cache_dir)
+    try:
+        _decompress_file(filename, tmp_dir)
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # another process decompressed the same file first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.isdir(entry_dir):
+            raise
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return _list_entry_files(entry_dir)
+
+
+def _file_cache_key(filename: str) -> str:
+    file_stat = os.stat(filename)
+    key_parts = (os.path.abspath(filename), file_stat.st_size, file_stat.st_mtime_ns)
+    return hashlib.sha1(repr(key_parts).encode()).hexdigest()
+
+
+def _decompress_file(filename: str, output_dir: str) -> None:
+    if filename.endswith(".zip"):
+        with zipfile.ZipFile(filename) as zip_file:
+            for member in zip_file.infolist():
+                if member.is_dir():
+                    continue
+                out_fn = os.path.join(output_dir, os.path.basename(member.filename))
+                with zip_file.open(member) as in_file, open(out_fn, "wb") as out_file:
+                    shutil.copyfileobj(in_file, out_file)
+        return
+
+    open_func = bz2.open if filename.endswith(".bz2") else gzip.open
+    out_fn = os.path.join(output_dir, os.path.splitext(os.path.basename(filename))[0])
+    with open_func(filename, "rb") as in_file, open(out_fn, "wb") as out_file:
+        shutil.copyfileobj(in_file, out_file, _COPY_BLOCK_SIZE)
+
+
+def _list_entry_files(entry_dir: str) -> list[str]:
+    return sorted(os.path.join(entry_dir, fn) for fn in os.listdir(entry_dir))
+
+
+def _prune_cache_dir(cache_dir: str, cache_size: int, keep_dirs: set[str]) -> None:
+    """Remove the least recently used decompressed files beyond ``cache_size`` bytes."""
+    entry_dirs = [entry.path for entry in os.scandir(cache_dir) if entry.is_dir() and not entry.name.startswith(".")]
+    entry_dirs.sort(key=os.path.getmtime, reverse=True)
+    total_size = 0
+    for entry_dir in entry_dirs:
+        total_size += sum(entry.stat().st_size for entry in os.scandir(entry_dir))
+        if total_size <= cache_size or entry_dir in keep_dirs:
+            continue
+        LOG.debug("Removing old decompressed files: %s", entry_dir)
+        shutil.rmtree(entry_dir, ignore_errors=True)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Progressive delivery of products as soon as each one is computed.
+
+By default all writer results are computed together so no output file is
+complete until every product on every grid is finished. With
+:class:`ProgressiveDelivery` the writer results are grouped by product and
+computed one product at a time in priority order. After a product's files are
+finalized they are announced through a log message, optional callbacks, and
+an optional spool file where one JSON object is appended per product:
+
+.. code-block:: json
+
+    {"products": ["i05"], "files": ["/data/npp_viirs_i05_20240101_000000_wgs84_fit.tif"],
+     "finished": "2024-01-01T00:05:12.123456", "elapsed": 12.3}
+
+Products computed separately can't share intermediate results (ex. loading
+the same input band for multiple composites) so total processing time may
+increase in exchange for getting the highest priority products sooner.
+
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Iterable, Optional
+
+from satpy.writers.core.compute import compute_writer_results, split_results
+
+LOG = logging.getLogger(__name__)
+
+DeliveryCallback = Callable[[dict], Any]
+
+
+class ProgressiveDelivery:
+    """Compute writer results one product at a time in priority order.
+
+    Args:
+        priority: Product names in the order they should be produced. Products
+            not in this list are produced after all listed products in the
+            order they were added.
+        spool_filename: Optional file to append a JSON line to for every
+            finished product.
+        callbacks: Functions called with the same information written to the
+            spool file for every finished product.
+
+    """
+
+    def __init__(
+        self,
+        priority: Optional[Iterable[str]] = None,
+        spool_filename: Optional[str] = None,
+        callbacks: Iterable[DeliveryCallback] = (),
+    ):
+        self._priority: dict[str, int] = {}
+        for product_name in priority or []:
+            self._priority.setdefault(product_name, len(self._priority))
+        self._spool_filename = spool_filename
+        self._callbacks = list(callbacks)
+        self._units: dict[tuple[str, ...], list] = {}
+
+    def add(self, product_names: Iterable[str], writer_result) -> None:
+        """Add a writer result producing the provided products.
+
+        Results for the same products (ex. different grids or writers) are
+        computed and announced together.
+
+        """
+        self._units.setdefault(tuple(product_names), []).append(writer_result)
+
+    def __len__(self) -> int:
+        """Get the number of products or groups of products waiting to be computed."""
+        return len(self._units)
+
+    def _unit_priority(self, unit_index_and_names: tuple[int, tuple[str, ...]]) -> tuple[int, int]:
+        unit_index, product_names = unit_index_and_names
+        unlisted = len(self._priority)
+        return min((self._priority.get(name, unlisted) for name in product_names), default=unlisted), unit_index
+
+    def compute(self) -> list:
+        """Compute and announce every product, highest priority first."""
+        ordered_names = [names for _, names in sorted(enumerate(self._units), key=self._unit_priority)]
+        num_units = len(ordered_names)
+        all_computed = []
+        for unit_num, product_names in enumerate(ordered_names, 1):
+            # remove our reference so completed products can be garbage collected
+            results = self._units.pop(product_names)
+            start = time.monotonic()
+            filenames = _target_filenames(results)
+            computed = compute_writer_results(results)
+            del results
+            filenames.extend(_result_filenames(computed))
+            all_computed.extend(computed)
+            record = {
+                "products": list(product_names),
+                "files": filenames,
+                "finished": datetime.now().isoformat(),
+                "elapsed": round(time.monotonic() - start, 3),
+            }
+            self._announce(record, unit_num, num_units)
+        return all_computed
+
+    def _announce(self, record: dict, unit_num: int, num_units: int) -> None:
+        LOG.info(
+            "Finished %s (%d/%d) in %0.1fs",
+            ", ".join(record["products"]),
+            unit_num,
+            num_units,
+            record["elapsed"],
+        )
+        if self._spool_filename:
+            with open(self._spool_filename, "a") as spool_file:
+                spool_file.write(json.dumps(record) + "\n")
+        for callback in self._callbacks:
+            callback(record)
+
+
+def _target_filenames(results: list) -> list[str]:
+    _, targets, _ = split_results(results)
+    filenames = []
+    for target in targets:
+        filename = _target_filename(target)
+        if filename is not None:
+            filenames.append(filename)
+    return filenames
+
+
+def _target_filename(target) -> Optional[str]:
+    """Get the file a writer target writes to.
+
+    Besides targets with a ``path`` or ``filename``, this handles trollimage
+    ``RIODataset`` targets (the file is in ``rfile.path``) and wrappers of
+    them storing the wrapped dataset in ``r_dataset``.
+
+    """
+    for candidate in (target, getattr(target, "rfile", None)):
+        filename = getattr(candidate, "path", None) or getattr(candidate, "filename", None)
+        if isinstance(filename, (str, os.PathLike)):
+            return os.fspath(filename)
+    wrapped = getattr(target, "r_dataset", None)
+    if wrapped is not None:
+        return _target_filename(wrapped)
+    return None
+
+
+def _result_filenames(computed: Iterable) -> list[str]:
+    filenames = []
+    for result in computed:
+        if isinstance(result, (str, os.PathLike)):
+            filenames.append(os.fspath(result))
+        elif isinstance(result, (list, tuple)):
+            filenames.extend(_result_filenames(result))
+    return filenames
@@ -27,7 +27,7 @@ from __future__ import annotations
 import logging
 from typing import Generator, Iterable, Optional, Union
 
-from satpy import DataID, DataQuery, Scene, DatasetDict
+from satpy import DataID, DataQuery, DatasetDict, Scene
 
 logger = logging.getLogger(__name__)
 
@@ -106,6 +106,8 @@ class AliasHandler:
     ):
         self._all_aliases = all_aliases
         self._user_products = self._unique_ordered_list(user_products)
+        self._satpy_name_index_cache: dict[tuple[str, ...], dict[str, Optional[str]]] = {}
+        self._satpy_to_p2g_cache: dict[tuple, dict[DataID, Optional[str]]] = {}
 
     @staticmethod
     def _unique_ordered_list(orig_list):
@@ -164,14 +166,30 @@ class AliasHandler:
         ``None`` is yielded. A name is not compatible if requesting it would
         produce a different product than the original DataID.
 
-        """
-        from satpy import DatasetDict
+        Results are cached for each unique set of Satpy DataIDs so repeated
+        conversions (ex. one per resampled Scene) don't need to be recomputed.
 
+        """
         if possible_p2g_names is None:
             possible_p2g_names = self._user_products
+        satpy_products = list(satpy_products)
+        possible_p2g_names = tuple(possible_p2g_names)
+        cache_key = (frozenset(satpy_products), possible_p2g_names)
+        satpy_id_to_p2g_name = self._satpy_to_p2g_cache.get(cache_key)
+        if satpy_id_to_p2g_name is None:
+            satpy_id_to_p2g_name = self._map_satpy_ids_to_p2g_names(satpy_products, possible_p2g_names)
+            self._satpy_to_p2g_cache[cache_key] = satpy_id_to_p2g_name
+        for satpy_product in satpy_products:
+            yield satpy_id_to_p2g_name[satpy_product]
+
+    def _map_satpy_ids_to_p2g_names(
+        self,
+        satpy_products: list[DataID],
+        possible_p2g_names: tuple[str, ...],
+    ) -> dict[DataID, Optional[str]]:
         satpy_id_dict = DatasetDict({x: x for x in satpy_products})
         satpy_id_to_p2g_name = {}
-        for p2g_name in possible_p2g_names:
+        for p2g_name in self._candidate_p2g_names(satpy_products, possible_p2g_names):
             satpy_data_query = self._all_aliases.get(p2g_name, p2g_name)
             matching_satpy_id = _get_matching_satpy_id(satpy_id_dict, satpy_data_query)
             if matching_satpy_id is None:
@@ -182,22 +200,56 @@ class AliasHandler:
                 logger.warning("Multiple product names map to the same identifier in Satpy")
             satpy_id_to_p2g_name[matching_satpy_id] = p2g_name
 
+        p2g_names_set = set(possible_p2g_names)
+        result = {}
         for satpy_product in satpy_products:
             satpy_id_name = satpy_product["name"]
             satpy_id_as_p2g_name = satpy_id_to_p2g_name.get(satpy_product)
-            satpy_name_is_p2g_name = satpy_id_name in possible_p2g_names
+            satpy_name_is_p2g_name = satpy_id_name in p2g_names_set
             satpy_name_does_not_round_trip = satpy_id_dict[satpy_product] != satpy_product
             if satpy_id_as_p2g_name is None:
-                # We can't yield this name if it is also a P2G name or if
+                # We can't use this name if it is also a P2G name or if
                 # asking Satpy for the name doesn't return the same DataID
                 # product. Otherwise users would ask for X and not get X.
                 if satpy_name_is_p2g_name or satpy_name_does_not_round_trip:
-                    yield None
+                    result[satpy_product] = None
                 else:
-                    yield satpy_id_name
+                    result[satpy_product] = satpy_id_name
                 continue
+            result[satpy_product] = satpy_id_as_p2g_name
+        return result
 
-            yield satpy_id_to_p2g_name.get(satpy_product, satpy_id_name)
+    def _candidate_p2g_names(
+        self,
+        satpy_products: list[DataID],
+        possible_p2g_names: tuple[str, ...],
+    ) -> Generator[str, None, None]:
+        """Get P2G names, in order, whose Satpy product name is in the provided DataIDs."""
+        satpy_names = {satpy_product["name"] for satpy_product in satpy_products}
+        satpy_name_index = self._get_satpy_name_index(possible_p2g_names)
+        for p2g_name in possible_p2g_names:
+            satpy_name = satpy_name_index[p2g_name]
+            if satpy_name is None or satpy_name in satpy_names:
+                yield p2g_name
+
+    def _get_satpy_name_index(self, possible_p2g_names: tuple[str, ...]) -> dict[str, Optional[str]]:
+        """Map P2G names to the Satpy product name they query for.
+
+        P2G names whose Satpy query doesn't include a name map to ``None``.
+
+        """
+        satpy_name_index = self._satpy_name_index_cache.get(possible_p2g_names)
+        if satpy_name_index is not None:
+            return satpy_name_index
+        satpy_name_index = {}
+        for p2g_name in possible_p2g_names:
+            satpy_data_query = self._all_aliases.get(p2g_name, p2g_name)
+            if isinstance(satpy_data_query, str):
+                satpy_name_index[p2g_name] = satpy_data_query
+            else:
+                satpy_name_index[p2g_name] = satpy_data_query.get("name")
+        self._satpy_name_index_cache[possible_p2g_names] = satpy_name_index
+        return satpy_name_index
 
     def apply_p2g_name_to_scene(
         self,
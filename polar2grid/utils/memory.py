@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Keep dask processing within a memory budget.
+
+The :class:`MemoryGovernor` watches the resident memory (RSS) of the current
+process while |project| is running. When memory usage gets close to the
+configured limit it:
+
+* Reduces the number of dask tasks allowed to run at the same time in the
+  threaded scheduler, down to a single task at the limit.
+* Spills persisted intermediate results (ex. swath geolocation) to
+  memory-mapped temporary files instead of keeping them in memory.
+* Disables persisting of resampling intermediates (``--ewa-persist``).
+
+The highest memory usage seen is reported when processing is done.
+
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+import dask
+import dask.array as da
+import numpy as np
+import xarray as xr
+from dask.utils import format_bytes
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+LOG = logging.getLogger(__name__)
+
+# fraction of the memory limit where task concurrency starts being reduced
+THROTTLE_FRACTION = 0.85
+# fraction of the memory limit where persisted intermediates are spilled to disk
+SPILL_FRACTION = 0.6
+
+_IN_THROTTLED_TASK: contextvars.ContextVar[bool] = contextvars.ContextVar("_IN_THROTTLED_TASK", default=False)
+
+
+def get_rss() -> Optional[int]:
+    """Get the resident memory of the current process in bytes or None if it can't be determined."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm", "r") as statm_file:
+            resident_pages = int(statm_file.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _get_peak_rss() -> int:
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+class _MemoryThrottledExecutor(ThreadPoolExecutor):
+    """Thread pool for dask's threaded scheduler that limits concurrent tasks based on memory usage."""
+
+    def __init__(self, max_workers: int, governor: MemoryGovernor):
+        super().__init__(max_workers)
+        self._governor = governor
+
+    def submit(self, fn, /, *args, **kwargs):
+        # propagate context variables like dask's own thread pool
+        ctx = contextvars.copy_context()
+        return super().submit(ctx.run, self._run_throttled, fn, *args, **kwargs)
+
+    def _run_throttled(self, fn, *args, **kwargs):
+        if _IN_THROTTLED_TASK.get():
+            # tasks from a computation started inside another task count as part of that task
+            return fn(*args, **kwargs)
+        _IN_THROTTLED_TASK.set(True)
+        with self._governor.task_slot():
+            return fn(*args, **kwargs)
+
+
+class MemoryGovernor:
+    """Context manager limiting dask processing based on the memory usage of the process.
+
+    Args:
+        max_memory: Maximum number of bytes the process should use.
+        num_workers: Number of dask worker threads to use when memory usage
+            is low.
+        interval: Number of seconds between memory usage checks.
+
+    """
+
+    def __init__(self, max_memory: int, num_workers: int, interval: float = 0.25):
+        self.max_memory = max_memory
+        self.num_workers = max(1, num_workers)
+        self.high_water_mark = 0
+        self._interval = interval
+        self._rss = 0
+        self._running_tasks = 0
+        self._throttled = False
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._monitor_thread: Optional[threading.Thread] = None
+        self._exit_stack: Optional[contextlib.ExitStack] = None
+        self._spill_dir: Optional[str] = None
+
+    def __enter__(self) -> MemoryGovernor:
+        """Start monitoring memory usage and throttling dask tasks."""
+        if self._update_rss() is None:
+            LOG.warning("Can't determine memory usage of the current process. '--max-memory' will be ignored.")
+            return self
+        self._stop_event.clear()
+        self._monitor_thread = threading.Thread(target=self._monitor, name="p2g-memory-governor", daemon=True)
+        self._monitor_thread.start()
+        self._exit_stack = contextlib.ExitStack()
+        pool = _MemoryThrottledExecutor(self.num_workers, self)
+        self._exit_stack.callback(pool.shutdown)
+        self._exit_stack.enter_context(dask.config.set(pool=pool))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Stop monitoring, remove spilled data, and report the peak memory usage."""
+        if self._monitor_thread is None:
+            return
+        self._stop_event.set()
+        self._monitor_thread.join()
+        self._monitor_thread = None
+        self._exit_stack.close()
+        self._exit_stack = None
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+        self.high_water_mark = max(self.high_water_mark, _get_peak_rss())
+        LOG.info(
+            "Peak memory usage: %s (limit: %s)",
+            format_bytes(self.high_water_mark),
+            format_bytes(self.max_memory),
+        )
+
+    def _update_rss(self) -> Optional[int]:
+        rss = get_rss()
+        if rss is None:
+            return None
+        self._rss = rss
+        self.high_water_mark = max(self.high_water_mark, rss)
+        return rss
+
+    def _monitor(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            self._update_rss()
+            with self._condition:
+                # let waiting tasks check the new limit
+                self._condition.notify_all()
+
+    def allowed_workers(self) -> int:
+        """Get the number of dask tasks allowed to run at the same time for the current memory usage."""
+        throttle_memory = self.max_memory * THROTTLE_FRACTION
+        if self._rss <= throttle_memory:
+            return self.num_workers
+        over_fraction = min(1.0, (self._rss - throttle_memory) / (self.max_memory - throttle_memory))
+        return max(1, round(self.num_workers * (1.0 - over_fraction)))
+
+    @contextlib.contextmanager
+    def task_slot(self) -> Iterator[None]:
+        """Wait until memory usage allows another task to run."""
+        with self._condition:
+            while self._running_tasks >= self.allowed_workers():
+                self._log_throttle_change(True)
+                self._condition.wait(self._interval)
+            if self.allowed_workers() == self.num_workers:
+                self._log_throttle_change(False)
+            self._running_tasks += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running_tasks -= 1
+                self._condition.notify()
+
+    def _log_throttle_change(self, throttled: bool) -> None:
+        if throttled == self._throttled:
+            return
+        self._throttled = throttled
+        if throttled:
+            LOG.debug("Memory usage (%s) near the limit, reducing concurrent tasks", format_bytes(self._rss))
+        else:
+            LOG.debug("Memory usage (%s) below the limit, resuming normal concurrency", format_bytes(self._rss))
+
+    def should_spill(self) -> bool:
+        """Check if persisted intermediate results should be stored on disk instead of in memory."""
+        rss = self._update_rss()
+        return rss is not None and rss > self.max_memory * SPILL_FRACTION
+
+    def spill_if_needed(self, arrays: list) -> list:
+        """Move persisted dask or xarray arrays to memory-mapped files if memory usage is high.
+
+        Arrays are returned unchanged if memory usage is below the spill
+        threshold.
+
+        """
+        if not self.should_spill():
+            return arrays
+        LOG.info("Memory usage (%s) is high, moving persisted data to temporary files", format_bytes(self._rss))
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="p2g_spill_")
+        return [spill_to_memmap(arr, self._spill_dir) for arr in arrays]
+
+
+def spill_to_memmap(arr, directory: str):
+    """Write a dask or xarray array to a numpy file and return an array reading from it through a memory map."""
+    if isinstance(arr, xr.DataArray):
+        return arr.copy(data=spill_to_memmap(arr.data, directory))
+    fd, spill_fn = tempfile.mkstemp(suffix=".npy", dir=directory)
+    os.close(fd)
+    out_arr = np.lib.format.open_memmap(spill_fn, mode="w+", dtype=arr.dtype, shape=arr.shape)
+    da.store(arr, out_arr, lock=False)
+    out_arr.flush()
+    del out_arr
+    chunks = arr.chunks if isinstance(arr, da.Array) else "auto"
+    return da.from_array(np.load(spill_fn, mmap_mode="r"), chunks=chunks)
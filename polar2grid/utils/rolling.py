@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Accumulate gridded products over a rolling time window.
+
+Readers that produce short, regularly spaced observations of the same grid
+(ex. 1 minute ``glm_l2`` files) can be aggregated over a longer window
+without reading every file in the window each time. A
+:class:`RollingAccumulator` keeps the following memory-mapped arrays per
+product in a store directory that persists between executions:
+
+* one slot per time step in the window holding that step's data,
+* the running sum of all valid values in the window,
+* the running number of valid values in the window.
+
+Adding a new time step subtracts the data of the steps that left the window
+from the running sum and count and adds the new data, so ``sum`` and
+``mean`` statistics cost the same no matter how long the window is. ``min``
+and ``max`` statistics are reduced over the slots of the window.
+
+Readers support aggregation by defining a ``ROLLING_STATISTICS`` dictionary
+mapping product name to the statistic to compute. Products without a
+statistic are written for the current observation only.
+
+"""
+
+from __future__ import annotations
+
+import calendar
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+
+STATISTICS = ("sum", "mean", "min", "max")
+STATE_FILENAME = "rolling_state.json"
+
+
+class RollingAccumulator:
+    """Rolling window statistics of products stored in memory-mapped files.
+
+    Args:
+        store_dir: Directory holding the accumulated arrays. It is created if
+            it doesn't exist.
+        window: Length of time to aggregate over.
+        step: Time between observations. Observations must start on multiples
+            of this step.
+
+    """
+
+    def __init__(self, store_dir: str, window: timedelta, step: timedelta = timedelta(minutes=1)):
+        num_slots = window // step
+        if num_slots < 1:
+            raise ValueError("Rolling window must be at least one time step long.")
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self._window = window
+        self._step = step
+        self._num_slots = num_slots
+        self._state = self._load_state()
+
+    def _load_state(self) -> dict:
+        state_fn = os.path.join(self.store_dir, STATE_FILENAME)
+        if not os.path.isfile(state_fn):
+            return {}
+        with open(state_fn) as state_file:
+            state = json.load(state_file)
+        if state.get("window") != self._window.total_seconds() or state.get("step") != self._step.total_seconds():
+            LOG.warning("Rolling window settings changed, existing accumulated products are discarded.")
+            return {}
+        return state.get("products", {})
+
+    def save(self) -> None:
+        """Write the time of every stored observation so the next execution can continue the window."""
+        state = {
+            "window": self._window.total_seconds(),
+            "step": self._step.total_seconds(),
+            "products": self._state,
+        }
+        state_fn = os.path.join(self.store_dir, STATE_FILENAME)
+        tmp_fn = state_fn + ".tmp"
+        with open(tmp_fn, "w") as state_file:
+            json.dump(state, state_file)
+        os.replace(tmp_fn, state_fn)
+
+    def add(self, name: str, data: np.ndarray, start_time: datetime, statistic: str = "sum", grid_id=None) -> None:
+        """Add one observation of a product to the window.
+
+        Observations that have left the window by ``start_time`` are removed.
+        Observations older than the window are ignored.
+
+        Args:
+            name: Product name.
+            data: 2D array of the observation. Invalid values must be NaN.
+            start_time: Start time of the observation.
+            statistic: One of "sum", "mean", "min", or "max".
+            grid_id: Optional JSON serializable identifier for the grid of the
+                data. Stored observations are discarded if it changes.
+
+        """
+        if statistic not in STATISTICS:
+            raise ValueError(f"Unknown rolling statistic '{statistic}'. Must be one of {STATISTICS}.")
+        product = self._get_product(name, data.shape, statistic, grid_id)
+        slot_times = product.slot_times
+        newest_time = max(filter(None, slot_times), default=start_time)
+        if start_time <= newest_time - self._window:
+            LOG.warning("Observation of '%s' at %s is older than the rolling window, ignoring.", name, start_time)
+            return
+        window_start = max(start_time, newest_time) - self._window
+        for slot_idx, slot_time in enumerate(slot_times):
+            if slot_time is not None and (slot_time <= window_start or slot_time == start_time):
+                product.remove(slot_idx)
+        product.insert(self._slot_index(start_time), data, start_time)
+        product.flush()
+        self._state[name] = product.to_state()
+
+    def get(self, name: str) -> np.ndarray:
+        """Compute the product's statistic over all observations in the window."""
+        return self._get_stored_product(name).compute()
+
+    def window_start_time(self, name: str) -> Optional[datetime]:
+        """Get the start time of the oldest observation of a product in the window."""
+        return min(filter(None, self._get_stored_product(name).slot_times), default=None)
+
+    def _slot_index(self, start_time: datetime) -> int:
+        return int(calendar.timegm(start_time.utctimetuple()) // self._step.total_seconds()) % self._num_slots
+
+    def _get_stored_product(self, name: str) -> _RollingProduct:
+        if name not in self._state:
+            raise KeyError(f"No observations of '{name}' have been accumulated.")
+        return _RollingProduct.from_state(self.store_dir, self._state[name])
+
+    def _get_product(self, name: str, shape: tuple, statistic: str, grid_id) -> _RollingProduct:
+        product_state = self._state.get(name)
+        if product_state is not None and (
+            tuple(product_state["shape"]) == shape
+            and product_state["statistic"] == statistic
+            and product_state["grid_id"] == grid_id
+        ):
+            return _RollingProduct.from_state(self.store_dir, product_state)
+        if product_state is not None:
+            LOG.warning("Grid or statistic of '%s' changed, previous observations are discarded.", name)
+        return _RollingProduct.create(self.store_dir, name, shape, statistic, grid_id, self._num_slots)
+
+
+class _RollingProduct:
+    def __init__(self, name: str, statistic: str, grid_id, slots, total, count, slot_times: list):
+        self.name = name
+        self.statistic = statistic
+        self.grid_id = grid_id
+        self.slots = slots
+        self.total = total
+        self.count = count
+        self.slot_times = slot_times
+
+    @classmethod
+    def create(cls, store_dir: str, name: str, shape: tuple, statistic: str, grid_id, num_slots: int):
+        slots = _open_array(store_dir, name, "slots", "w+", dtype=np.float32, shape=(num_slots,) + shape)
+        slots[:] = np.nan
+        total = _open_array(store_dir, name, "total", "w+", dtype=np.float64, shape=shape)
+        count = _open_array(store_dir, name, "count", "w+", dtype=np.int32, shape=shape)
+        return cls(name, statistic, grid_id, slots, total, count, [None] * num_slots)
+
+    @classmethod
+    def from_state(cls, store_dir: str, product_state: dict):
+        name = product_state["name"]
+        slot_times = [
+            None if slot_time is None else datetime.fromisoformat(slot_time)
+            for slot_time in product_state["slot_times"]
+        ]
+        return cls(
+            name,
+            product_state["statistic"],
+            product_state["grid_id"],
+            _open_array(store_dir, name, "slots", "r+"),
+            _open_array(store_dir, name, "total", "r+"),
+            _open_array(store_dir, name, "count", "r+"),
+            slot_times,
+        )
+
+    def to_state(self) -> dict:
+        return {
+            "name": self.name,
+            "statistic": self.statistic,
+            "grid_id": self.grid_id,
+            "shape": list(self.total.shape),
+            "slot_times": [None if slot_time is None else slot_time.isoformat() for slot_time in self.slot_times],
+        }
+
+    def insert(self, slot_idx: int, data: np.ndarray, start_time: datetime) -> None:
+        if self.slot_times[slot_idx] is not None:
+            self.remove(slot_idx)
+        valid = np.isfinite(data)
+        self.slots[slot_idx] = data
+        self.total[valid] += data[valid]
+        self.count[valid] += 1
+        self.slot_times[slot_idx] = start_time
+
+    def remove(self, slot_idx: int) -> None:
+        old_data = self.slots[slot_idx]
+        valid = np.isfinite(old_data)
+        self.total[valid] -= old_data[valid]
+        self.count[valid] -= 1
+        # avoid floating point error building up where the window is empty
+        self.total[self.count == 0] = 0
+        self.slots[slot_idx] = np.nan
+        self.slot_times[slot_idx] = None
+
+    def flush(self) -> None:
+        for arr in (self.slots, self.total, self.count):
+            arr.flush()
+
+    def compute(self) -> np.ndarray:
+        if self.statistic in ("min", "max"):
+            reduce_func = np.fmin if self.statistic == "min" else np.fmax
+            return reduce_func.reduce(self.slots, axis=0)
+        has_data = self.count > 0
+        result = np.full(self.total.shape, np.nan, dtype=np.float32)
+        if self.statistic == "sum":
+            result[has_data] = self.total[has_data]
+        else:
+            result[has_data] = self.total[has_data] / self.count[has_data]
+        return result
+
+
+def _open_array(store_dir: str, name: str, kind: str, mode: str, **kwargs) -> np.memmap:
+    return np.lib.format.open_memmap(os.path.join(store_dir, f"{name}_{kind}.npy"), mode=mode, **kwargs)
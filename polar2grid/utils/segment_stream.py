@@ -0,0 +1,409 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2021 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""Process segmented full disk observations while the segments arrive.
+
+Some geostationary instruments deliver a full disk observation as many files
+that each cover a band of rows. For example, ``ahi_hsd`` data is split in to
+10 segments per band and ``fci_l1c_nc`` data in to 40 body chunks holding
+every channel. When the glue script is given ``--watch-dir``:
+
+1. :class:`SegmentStream` polls the directory and reports which fraction of
+   the full disk rows is complete every time more segments are available.
+   Files are only used once their size stops changing between checks.
+2. All files received so far are processed the same way as a normal
+   execution. Satpy fills missing segments with invalid values so every
+   product has its full disk shape.
+3. :class:`SegmentAccumulator` computes only the output grid blocks whose
+   source rows have all arrived and stores them in temporary files.
+4. When the last segment arrives the remaining blocks are computed and the
+   stored results are given to the writers.
+
+Readers support streaming by defining a ``SEGMENT_STREAMING`` dictionary
+with the keyword arguments for :class:`SegmentStream`.
+
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Iterator, NamedTuple, Optional
+
+import dask.array as da
+import numpy as np
+from pyresample.geometry import AreaDefinition
+from satpy import Scene
+
+from polar2grid.utils.dynamic_imports import get_reader_attr
+
+LOG = logging.getLogger(__name__)
+
+# number of extra source rows a block of output pixels may depend on (ex. neighbors)
+ROW_MARGIN = 2
+
+
+class StreamUpdate(NamedTuple):
+    """Files to process and the fraction of source rows that are complete."""
+
+    filenames: list[str]
+    row_range: tuple[float, float]
+    is_final: bool
+
+
+class SegmentStream:
+    """Watch a directory for the segment files of one observation.
+
+    Args:
+        watch_dir: Directory where new files will appear.
+        reader_name: Satpy reader whose file patterns are used to identify
+            files and their segment number.
+        segment_key: Filename pattern field holding the segment number.
+        group_keys: Filename pattern fields identifying one observation. Only
+            the earliest observation found in the directory is processed.
+        from_bottom: Segment 1 is at the bottom (south) of the image instead
+            of the top.
+        variable_heights: Segments don't all have the same number of rows.
+            The rows of the newest complete segment are not considered
+            complete until the following segment is also complete.
+        interval: Seconds between directory checks. New files are used once
+            their size didn't change between two checks.
+        timeout: Seconds to wait for new files before processing what has
+            arrived so far.
+
+    """
+
+    def __init__(
+        self,
+        watch_dir: str,
+        reader_name: str,
+        segment_key: str = "segment",
+        group_keys: tuple[str, ...] = ("start_time",),
+        from_bottom: bool = False,
+        variable_heights: bool = False,
+        interval: float = 2.0,
+        timeout: float = 600.0,
+    ):
+        self.watch_dir = watch_dir
+        self._file_types = _get_reader_file_types(reader_name)
+        self._segment_key = segment_key
+        self._group_keys = tuple(group_keys)
+        self._from_bottom = from_bottom
+        self._variable_heights = variable_heights
+        self._interval = interval
+        self._timeout = timeout
+        self._known_files: dict[str, Optional[tuple]] = {}
+        self._pending_sizes: dict[str, int] = {}
+
+    @classmethod
+    def from_reader(cls, reader_name: str, watch_dir: str, **kwargs) -> SegmentStream:
+        """Create a stream using the reader's ``SEGMENT_STREAMING`` settings."""
+        stream_kwargs = get_reader_attr(reader_name, "SEGMENT_STREAMING")
+        if stream_kwargs is None:
+            raise ValueError(f"Reader '{reader_name}' does not support processing segments as they arrive.")
+        return cls(watch_dir, reader_name, **stream_kwargs, **kwargs)
+
+    def __iter__(self) -> Iterator[StreamUpdate]:
+        """Wait for segments and yield an update every time more rows are complete.
+
+        The last update always has ``is_final`` set and covers all rows.
+
+        """
+        last_ready = 0
+        last_change = time.monotonic()
+        while True:
+            if self._scan():
+                last_change = time.monotonic()
+            group = self._first_group()
+            if group is not None:
+                filenames, ready, total = self._ready_segments(group)
+                if ready == total:
+                    yield StreamUpdate(filenames, (0.0, 1.0), True)
+                    return
+                if ready > last_ready:
+                    LOG.info("Received %d of %d segments", ready, total)
+                    last_ready = ready
+                    yield StreamUpdate(filenames, self._row_range(ready, total), False)
+            if time.monotonic() - last_change > self._timeout:
+                if group is None:
+                    raise TimeoutError(f"No input files found in '{self.watch_dir}'.")
+                LOG.warning("Timed out waiting for segments. Processing the segments received so far.")
+                yield StreamUpdate(filenames, (0.0, 1.0), True)
+                return
+            time.sleep(self._interval)
+
+    def _scan(self) -> bool:
+        """Check the watch directory for new files and return if any were found or finished arriving.
+
+        A new file is only identified once its size is the same in two
+        consecutive checks so files that are still being written (ex. the
+        last segment) aren't read early.
+
+        """
+        new_paths = []
+        pending_sizes = {}
+        for entry in os.scandir(self.watch_dir):
+            if entry.name.startswith(".") or entry.path in self._known_files or not entry.is_file():
+                continue
+            size = entry.stat().st_size
+            if self._pending_sizes.get(entry.path) == size:
+                new_paths.append(entry.path)
+                self._known_files[entry.path] = None
+            else:
+                pending_sizes[entry.path] = size
+        changed = bool(new_paths) or pending_sizes != self._pending_sizes
+        self._pending_sizes = pending_sizes
+        if not new_paths:
+            return changed
+        for file_type, file_type_info in self._file_types.items():
+            for filename, filename_info in _filename_items_for_filetype(new_paths, file_type_info):
+                segment = int(filename_info[self._segment_key])
+                total = int(file_type_info.get("expected_segments", filename_info.get("total_segments", 1)))
+                group = tuple(filename_info[key] for key in self._group_keys)
+                self._known_files[filename] = (group, file_type, segment, total)
+        return True
+
+    def _first_group(self) -> Optional[tuple]:
+        groups = {file_info[0] for file_info in self._known_files.values() if file_info is not None}
+        return min(groups) if groups else None
+
+    def _ready_segments(self, group: tuple) -> tuple[list[str], int, int]:
+        filenames = []
+        segments_by_type: dict[str, set] = {}
+        total = 1
+        for filename, file_info in self._known_files.items():
+            if file_info is None or file_info[0] != group:
+                continue
+            _, file_type, segment, total = file_info
+            filenames.append(filename)
+            segments_by_type.setdefault(file_type, set()).add(segment)
+        ready = _count_ready_segments(list(segments_by_type.values()), total)
+        if self._variable_heights and ready < total:
+            ready = max(ready - 1, 0)
+        return sorted(filenames), ready, total
+
+    def _row_range(self, ready: int, total: int) -> tuple[float, float]:
+        fraction = ready / total
+        if self._from_bottom:
+            return 1.0 - fraction, 1.0
+        return 0.0, fraction
+
+
+def _get_reader_file_types(reader_name: str) -> dict:
+    from satpy.readers.core.config import configs_for_reader
+    from satpy.readers.core.yaml_reader import load_yaml_configs
+
+    config_files = next(configs_for_reader(reader_name))
+    return load_yaml_configs(*config_files)["file_types"]
+
+
+def _filename_items_for_filetype(filenames: list[str], file_type_info: dict):
+    from satpy.readers.core.yaml_reader import FileYAMLReader
+
+    return FileYAMLReader.filename_items_for_filetype(filenames, file_type_info)
+
+
+def _count_ready_segments(segments_by_type: list[set], total: int) -> int:
+    """Count the consecutive segments received for every file type.
+
+    A segment is only considered ready when a later segment of any file type
+    has been received (or it is the last segment) so that a segment isn't
+    processed before the files for all file types had a chance to arrive.
+
+    """
+    if not segments_by_type:
+        return 0
+    complete = set.intersection(*segments_by_type)
+    latest = max(max(segments) for segments in segments_by_type)
+    ready = 0
+    while ready + 1 in complete and (ready + 1 == total or latest > ready + 1):
+        ready += 1
+    return ready
+
+
+class _AccumulatedOutput(NamedTuple):
+    array: np.memmap
+    done: np.ndarray
+
+
+class SegmentAccumulator:
+    """Compute and store output grid blocks once all of their source rows are available.
+
+    Args:
+        work_dir: Directory to create the temporary storage directory in.
+            Defaults to the system's temporary directory.
+
+    """
+
+    def __init__(self, work_dir: Optional[str] = None):
+        self._work_dir = tempfile.mkdtemp(prefix="p2g_stream_", dir=work_dir)
+        self._outputs: dict[tuple, _AccumulatedOutput] = {}
+        self._block_rows: dict[tuple, np.ndarray] = {}
+        self._scenes_to_save: list[tuple[Scene, set]] = []
+
+    def __enter__(self) -> SegmentAccumulator:
+        """Use the accumulator and remove its temporary files when done."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Remove temporary files."""
+        self.cleanup()
+
+    def cleanup(self) -> None:
+        """Remove the temporary files holding the accumulated results."""
+        self._outputs.clear()
+        self._scenes_to_save = []
+        shutil.rmtree(self._work_dir, ignore_errors=True)
+
+    def update(
+        self, scenes_to_save: list[tuple[Scene, set]], source_area: AreaDefinition, row_range: tuple[float, float]
+    ) -> int:
+        """Compute the blocks of every product that only depend on rows in ``row_range``.
+
+        Args:
+            scenes_to_save: Resampled scenes and the products to save from
+                each as returned by
+                :func:`~polar2grid.resample.resample_scene`.
+            source_area: Full disk area of the input data. Source rows of
+                output pixels are computed as fractions of this area's height
+                so any resolution of the same full disk can be used.
+            row_range: Fraction of the source rows, from the top, that are
+                complete.
+
+        Returns:
+            Number of blocks computed.
+
+        """
+        sources = []
+        targets = []
+        regions = []
+        for scn, data_ids in scenes_to_save:
+            for data_id in data_ids:
+                data_arr = scn[data_id]
+                output = self._get_output(data_id, data_arr)
+                block_rows = self._get_block_rows(source_area, data_arr.attrs["area"], data_arr.chunks[-2:])
+                is_ready = _blocks_in_row_range(block_rows, row_range) & ~output.done
+                for y_idx, x_idx in zip(*np.nonzero(is_ready), strict=True):
+                    block_index = (slice(None),) * (data_arr.ndim - 2) + (y_idx, x_idx)
+                    sources.append(data_arr.data.blocks[block_index])
+                    targets.append(output.array)
+                    regions.append(_block_region(data_arr.chunks, y_idx, x_idx))
+                output.done[is_ready] = True
+        self._scenes_to_save = scenes_to_save
+        if sources:
+            LOG.info(
+                "Computing %d output blocks for rows %0.1f%% to %0.1f%%", len(sources), *np.multiply(row_range, 100)
+            )
+            da.store(sources, targets, regions=regions, lock=False)
+        return len(sources)
+
+    def finalize(self) -> list[tuple[Scene, set]]:
+        """Get the last scenes provided to :meth:`update` with their data replaced by the stored results."""
+        final_scenes = []
+        for scn, data_ids in self._scenes_to_save:
+            for data_id in data_ids:
+                data_arr = scn[data_id]
+                output = self._outputs[self._output_key(data_id, data_arr)]
+                if not output.done.all():
+                    raise RuntimeError("Not all output blocks were computed before finalizing.")
+                output.array.flush()
+                scn[data_id] = data_arr.copy(data=da.from_array(output.array, chunks=data_arr.chunks))
+            final_scenes.append((scn, data_ids))
+        return final_scenes
+
+    @staticmethod
+    def _output_key(data_id, data_arr) -> tuple:
+        return data_id, data_arr.attrs["area"], data_arr.shape
+
+    def _get_output(self, data_id, data_arr) -> _AccumulatedOutput:
+        key = self._output_key(data_id, data_arr)
+        if key not in self._outputs:
+            out_fn = os.path.join(self._work_dir, f"output_{len(self._outputs)}.npy")
+            array = np.lib.format.open_memmap(out_fn, mode="w+", dtype=data_arr.dtype, shape=data_arr.shape)
+            done = np.zeros(tuple(len(dim_chunks) for dim_chunks in data_arr.chunks[-2:]), dtype=bool)
+            self._outputs[key] = _AccumulatedOutput(array, done)
+        return self._outputs[key]
+
+    def _get_block_rows(self, source_area: AreaDefinition, target_area: AreaDefinition, chunks: tuple) -> np.ndarray:
+        key = (source_area, target_area, chunks)
+        if key not in self._block_rows:
+            self._block_rows[key] = _compute_block_source_rows(source_area, target_area, chunks)
+        return self._block_rows[key]
+
+
+def _block_region(chunks: tuple, y_idx: int, x_idx: int) -> tuple[slice, ...]:
+    y_start = sum(chunks[-2][:y_idx])
+    x_start = sum(chunks[-1][:x_idx])
+    return (slice(None),) * (len(chunks) - 2) + (
+        slice(y_start, y_start + chunks[-2][y_idx]),
+        slice(x_start, x_start + chunks[-1][x_idx]),
+    )
+
+
+def _compute_block_source_rows(source_area: AreaDefinition, target_area: AreaDefinition, chunks: tuple) -> np.ndarray:
+    """Get the first and last source row, as fractions of the source height, used by every output block.
+
+    Blocks that don't overlap the source area have NaN bounds.
+
+    """
+    y_chunks, x_chunks = chunks
+    block_rows = np.full((len(y_chunks), len(x_chunks), 2), np.nan)
+    margin = ROW_MARGIN / source_area.height
+    y_start = 0
+    for y_idx, y_size in enumerate(y_chunks):
+        x_start = 0
+        for x_idx, x_size in enumerate(x_chunks):
+            block_area = target_area[y_start : y_start + y_size, x_start : x_start + x_size]
+            rows = _source_rows_for_area(source_area, block_area)
+            if rows.count():
+                block_rows[y_idx, x_idx] = (
+                    rows.min() / source_area.height - margin,
+                    (rows.max() + 1) / source_area.height + margin,
+                )
+            x_start += x_size
+        y_start += y_size
+    return np.clip(block_rows, 0.0, 1.0)
+
+
+def _source_rows_for_area(source_area: AreaDefinition, block_area: AreaDefinition) -> np.ma.MaskedArray:
+    if isinstance(source_area, AreaDefinition) and source_area.crs == block_area.crs:
+        # same projection (ex. native resampling), no need to go through lon/lats
+        _, ys = block_area.get_proj_vectors()
+        rows = (source_area.area_extent[3] - ys) / source_area.pixel_size_y
+        rows = np.ma.masked_outside(np.floor(rows), 0, source_area.height - 1)
+        return rows
+    lons, lats = block_area.get_lonlats()
+    _, rows = source_area.get_array_indices_from_lonlat(lons, lats)
+    return np.ma.masked_invalid(rows)
+
+
+def _blocks_in_row_range(block_rows: np.ndarray, row_range: tuple[float, float]) -> np.ndarray:
+    row_start, row_end = row_range
+    outside_source = np.isnan(block_rows[..., 0])
+    if row_start <= 0.0 and row_end >= 1.0:
+        return np.ones(block_rows.shape[:2], dtype=bool)
+    with np.errstate(invalid="ignore"):
+        in_range = (block_rows[..., 0] >= row_start) & (block_rows[..., 1] <= row_end)
+    return in_range | outside_source
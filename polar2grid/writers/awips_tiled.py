@@ -77,13 +77,59 @@ created.
      The writer does not default to using any grid. Therefore, it is recommended to specify
      one or more grids for remapping by using the `-g` flag.
 
+Writing Tiles in Parallel
+-------------------------
+
+By default each tile is written from the dask worker threads. Writing NetCDF4
+files, including any zlib compression (`--compress`), can only be done by one
+thread at a time. By specifying ``--tile-workers N``, tiles are instead
+written by a pool of ``N`` separate processes so that compression and file
+writing happen concurrently. Tiles are handed to the pool as soon as their data
+is computed and the dask worker threads move on to the next tile without
+waiting for them to be written. Tiles that only contain invalid floating point
+data are skipped before any NetCDF metadata is generated for them.
+
+Incremental Tile Updates
+------------------------
+
+When lettered tiles are updated over multiple executions
+(``--letters --use-sector-reference``) the same tile files are often
+rewritten with data that has not changed. By specifying
+``--incremental-tiles`` a small state file
+(``.awips_tile_state_<sector_id>.json``) is kept in the output directory
+recording a digest of the data last written to each tile file. New data is
+merged with the existing tile the same way the file would be updated and the
+tile is not rewritten if the merged result matches what was previously
+written. Tile files are only updated when the output filename is the same
+between executions. The default filenames include the start time of the data
+so an ``--output-filename`` without time fields is usually needed. Entries for
+tile files that no longer exist are removed from the state file.
+
 For more detailed information on templates and other options for this writer
 see the Satpy documentation :mod:`here <satpy.writers.awips_tiled>`.
 
 """
 
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import json
 import logging
+import multiprocessing
+import os
+import threading
 from argparse import BooleanOptionalAction
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+import dask
+import dask.array as da
+import numpy as np
+import xarray as xr
+from satpy.writers.awips_tiled import AWIPSNetCDFTemplate, NetCDFTemplate
+from satpy.writers.awips_tiled import AWIPSTiledWriter as _SatpyAWIPSTiledWriter
+from satpy.writers.awips_tiled import to_nonempty_netcdf
 
 from polar2grid.utils.legacy_compat import convert_p2g_pattern_to_satpy
 
@@ -100,6 +146,463 @@ DEFAULT_OUTPUT_FILENAMES = {
 }
 
 
+class AWIPSTiledWriter(_SatpyAWIPSTiledWriter):
+    """Write AWIPS NetCDF4 tile files with optional multi-process tile writing.
+
+    This is Satpy's :class:`~satpy.writers.awips_tiled.AWIPSTiledWriter` with
+    two optional changes to how individual tiles are produced:
+
+    1. If ``tile_workers`` is greater than 0, rendered tiles are handed to a
+       pool of that many processes which compress and write the NetCDF files
+       concurrently.
+    2. A tile state store can be used to skip writing tiles whose data has
+       not changed since the last time they were written. See
+       :class:`TileStateStore`.
+
+    With either of these, tiles whose floating point data is entirely invalid
+    are skipped before the NetCDF template is rendered for them and only the
+    names of the tile files that were written are returned. Otherwise tiles
+    are written by Satpy's writer.
+
+    """
+
+    def __init__(self, tile_workers: int = 0, **kwargs):
+        """Initialize writer and number of tile writing processes.
+
+        Args:
+            tile_workers: Number of separate processes used to compress and
+                write tiles. By default (0) tiles are written by the dask
+                worker threads.
+            kwargs: Keyword arguments passed to Satpy's
+                :class:`~satpy.writers.awips_tiled.AWIPSTiledWriter`.
+
+        """
+        super().__init__(**kwargs)
+        self.tile_workers = tile_workers
+
+    @classmethod
+    def separate_init_kwargs(cls, kwargs):
+        """Separate keyword arguments by initialization and saving keyword arguments."""
+        init_kwargs, kwargs = super().separate_init_kwargs(kwargs)
+        if "tile_workers" in kwargs:
+            init_kwargs["tile_workers"] = kwargs.pop("tile_workers")
+        return init_kwargs, kwargs
+
+    def save_datasets(
+        self,
+        datasets,
+        sector_id=None,
+        source_name=None,
+        tile_count=(1, 1),
+        tile_size=None,
+        lettered_grid=False,
+        num_subtiles=None,
+        use_end_time=False,
+        use_sector_reference=False,
+        template="polar",
+        check_categories=True,
+        extra_global_attrs=None,
+        environment_prefix="DR",
+        incremental_tiles=False,
+        compute=True,
+        **kwargs,
+    ):
+        """Write a series of DataArray objects to multiple NetCDF4 Tile files.
+
+        If ``incremental_tiles`` is True, the data written to each tile is
+        recorded in a per-sector state file in the output directory and tiles
+        whose data has not changed since they were last written are skipped.
+        The number of processes writing tiles is set by the ``tile_workers``
+        argument when creating the writer. If neither is used this is the
+        same as Satpy's writer. See
+        :meth:`satpy.writers.awips_tiled.AWIPSTiledWriter.save_datasets` for a
+        description of the other keyword arguments.
+
+        """
+        if not self.tile_workers and not incremental_tiles:
+            return super().save_datasets(
+                datasets,
+                sector_id=sector_id,
+                source_name=source_name,
+                tile_count=tile_count,
+                tile_size=tile_size,
+                lettered_grid=lettered_grid,
+                num_subtiles=num_subtiles,
+                use_end_time=use_end_time,
+                use_sector_reference=use_sector_reference,
+                template=template,
+                check_categories=check_categories,
+                extra_global_attrs=extra_global_attrs,
+                environment_prefix=environment_prefix,
+                compute=compute,
+                **kwargs,
+            )
+        if not isinstance(template, dict):
+            template = self.config["templates"][template]
+        template = AWIPSNetCDFTemplate(template, swap_end_time=use_end_time)
+        area_data_arrs = self._group_by_area(datasets)
+
+        arrays_to_compute = []
+        tile_stores: dict[str, TileStateStore] = {}
+        tile_pool = _TileProcessPool(self.tile_workers) if self.tile_workers else None
+        creation_time = dt.datetime.now(dt.timezone.utc)
+        area_tile_data_gen = self._iter_area_tile_info_and_datasets(
+            area_data_arrs,
+            template,
+            lettered_grid,
+            sector_id,
+            num_subtiles,
+            tile_size,
+            tile_count,
+            use_sector_reference,
+        )
+        for area_def, tile_info, data_arrs in area_tile_data_gen:
+            ds_info = self._get_tile_data_info(data_arrs, creation_time, source_name)
+            output_filename = self.get_filename(
+                template, area_def, tile_info, sector_id, environment_prefix=environment_prefix, **ds_info
+            )
+            self.check_tile_exists(output_filename)
+            tile_store = None
+            if incremental_tiles:
+                state_fn = TileStateStore.get_state_filename(output_filename, sector_id)
+                tile_store = tile_stores.setdefault(state_fn, TileStateStore(state_fn))
+
+            render_kwargs = {
+                "area_def": area_def,
+                "tile_info": tile_info,
+                "sector_id": sector_id,
+                "creation_time": creation_time,
+                "shared_attrs": ds_info,
+                "extra_global_attrs": extra_global_attrs,
+            }
+            res = _save_tile_data_arrays(
+                data_arrs,
+                output_filename,
+                template,
+                self.compress,
+                check_categories,
+                render_kwargs,
+                tile_pool,
+                tile_store,
+            )
+            arrays_to_compute.append(res)
+        if not arrays_to_compute:
+            # no tiles produced
+            return []
+
+        written_tiles = dask.delayed(_finish_tile_writes, pure=False)(
+            arrays_to_compute, tile_pool, list(tile_stores.values())
+        )
+        if not compute:
+            return [written_tiles]
+        try:
+            return dask.compute(written_tiles)
+        finally:
+            if tile_pool is not None:
+                tile_pool.shutdown()
+
+
+def _save_tile_data_arrays(
+    data_arrs: list[xr.DataArray],
+    output_filename: str,
+    template: NetCDFTemplate,
+    compress: bool,
+    check_categories: bool,
+    render_kwargs: dict[str, Any],
+    tile_pool: _TileProcessPool | None,
+    tile_store: TileStateStore | None,
+) -> da.Array:
+    data_arr_dims_pairs = tuple(
+        elem for data_arr in data_arrs for elem in (data_arr.data, "".join(str(dim) for dim in data_arr.dims))
+    )
+    # Convert xarray's internal dict-like objects to pure dicts so dask
+    # tokenizing doesn't try generic object tokenization
+    all_attrs = [dict(data_arr.attrs) for data_arr in data_arrs]
+    all_coords = [dict(data_arr.coords) for data_arr in data_arrs]
+    return da.blockwise(
+        _save_tile_block,
+        "a",
+        *data_arr_dims_pairs,
+        new_axes={"a": 1},
+        meta=np.ndarray((), dtype=object),
+        dtype=object,
+        all_attrs=all_attrs,
+        all_coords=all_coords,
+        template=template,
+        compress=compress,
+        check_categories=check_categories,
+        output_filename=output_filename,
+        render_kwargs=render_kwargs,
+        tile_pool=tile_pool,
+        tile_store=tile_store,
+    )
+
+
+def _save_tile_block(
+    *input_arrays: list,
+    output_filename: str,
+    template: NetCDFTemplate,
+    compress: bool,
+    check_categories: bool,
+    render_kwargs: dict[str, Any],
+    all_attrs: list[dict],
+    all_coords: list[dict],
+    tile_pool: _TileProcessPool | None,
+    tile_store: TileStateStore | None,
+) -> np.ndarray:
+    tile_arrays = [np_arr_list[0][0] for np_arr_list in input_arrays]
+    if _all_invalid_float_tiles(tile_arrays):
+        LOG.debug("Skipping tile creation for %s because it would be empty.", output_filename)
+        return _as_block(_TileWrite(output_filename, None))
+
+    restruct_data_arrs = [
+        xr.DataArray(tile_arr, attrs=all_attrs[idx], dims=("y", "x"), coords=all_coords[idx])
+        for idx, tile_arr in enumerate(tile_arrays)
+    ]
+    new_ds = template.render(restruct_data_arrs, **render_kwargs)
+    if compress:
+        new_ds.encoding["zlib"] = True
+        for var in new_ds.variables.values():
+            var.encoding["zlib"] = True
+
+    tile_state = None
+    if tile_store is not None:
+        tile_state = _get_merged_tile_state(new_ds, output_filename)
+        if tile_store.is_unchanged(output_filename, tile_state):
+            LOG.debug("Skipping tile creation for %s because its data has not changed.", output_filename)
+            return _as_block(_TileWrite(output_filename, None))
+
+    if tile_pool is not None:
+        # don't wait for the tile to be written, it is finished with all other tiles
+        written = tile_pool.submit(_write_tile, new_ds, output_filename, check_categories)
+    else:
+        written = _write_tile(new_ds, output_filename, check_categories)
+    return _as_block(_TileWrite(output_filename, written, tile_state, tile_store))
+
+
+def _write_tile(new_ds: xr.Dataset, output_filename: str, check_categories: bool) -> str | None:
+    """Write a rendered tile and get its filename or None if it was empty and not written."""
+    prev_mtime = os.stat(output_filename).st_mtime_ns if os.path.isfile(output_filename) else None
+    to_nonempty_netcdf(new_ds, output_filename, update_existing=True, check_categories=check_categories)
+    if not os.path.isfile(output_filename) or os.stat(output_filename).st_mtime_ns == prev_mtime:
+        return None
+    return output_filename
+
+
+class _TileWrite:
+    """Tile that was skipped, written, or is being written by a tile writing process."""
+
+    def __init__(
+        self,
+        output_filename: str,
+        written: str | Future | None,
+        tile_state: dict[str, Any] | None = None,
+        tile_store: TileStateStore | None = None,
+    ):
+        self.output_filename = output_filename
+        self.written = written
+        self.tile_state = tile_state
+        self.tile_store = tile_store
+
+    def finish(self) -> str | None:
+        """Wait for the tile to be written and get its filename or None if it was skipped."""
+        written = self.written.result() if isinstance(self.written, Future) else self.written
+        if written is None:
+            return None
+        if self.tile_store is not None:
+            self.tile_store.update(self.output_filename, self.tile_state)
+        return self.output_filename
+
+
+def _as_block(tile_write: _TileWrite) -> np.ndarray:
+    block = np.empty((1,), dtype=object)
+    block[0] = tile_write
+    return block
+
+
+def _finish_tile_writes(
+    tile_writes: list[np.ndarray], tile_pool: _TileProcessPool | None, tile_stores: list[TileStateStore]
+) -> list[str]:
+    """Wait for every tile to be written, save the tile states, and get the names of the written files."""
+    written_files = []
+    try:
+        for tile_write in (tile_write for block in tile_writes for tile_write in block):
+            output_filename = tile_write.finish()
+            if output_filename is not None:
+                written_files.append(output_filename)
+    finally:
+        if tile_pool is not None:
+            tile_pool.shutdown()
+    for tile_store in tile_stores:
+        tile_store.save()
+    return written_files
+
+
+def _get_merged_tile_state(new_ds: xr.Dataset, output_filename: str) -> dict[str, Any]:
+    """Get a digest of the tile data as it will be stored after merging it with an existing tile file.
+
+    Like :func:`~satpy.writers.awips_tiled.to_nonempty_netcdf`, valid new
+    pixels replace the pixels of the existing file and the existing file's
+    encoding is used. The digest is of the encoded values that end up in the
+    file.
+
+    """
+    existing_ds = xr.open_dataset(output_filename, cache=False) if os.path.isfile(output_filename) else None
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        for var_name, data_arr in sorted(new_ds.data_vars.items()):
+            if data_arr.ndim != 2:
+                continue
+            merged_var = data_arr.variable.copy(deep=False)
+            if existing_ds is not None and var_name in existing_ds:
+                existing_data_arr = existing_ds[var_name]
+                merged_var = merged_var.copy(data=np.where(_valid_tile_pixels(data_arr), data_arr, existing_data_arr))
+                merged_var.encoding = {**data_arr.encoding, **existing_data_arr.encoding}
+                merged_var.encoding.pop("source", None)
+            encoded = xr.conventions.encode_cf_variable(merged_var, name=var_name).values
+            digest.update(str(var_name).encode())
+            digest.update(str(encoded.dtype).encode())
+            digest.update(np.ascontiguousarray(encoded).tobytes())
+    finally:
+        if existing_ds is not None:
+            existing_ds.close()
+    return {"digest": digest.hexdigest()}
+
+
+def _valid_tile_pixels(data_arr: xr.DataArray) -> np.ndarray:
+    """Get the pixels of a rendered tile variable that replace existing pixels when a tile is updated."""
+    fill_value = data_arr.encoding.get("_FillValue", data_arr.attrs.get("_FillValue"))
+    if np.issubdtype(data_arr.dtype, np.integer) and fill_value is not None:
+        return (data_arr != fill_value).values
+    return data_arr.notnull().values
+
+
+class TileStateStore:
+    """Record of the data last written to each tile of a sector.
+
+    State is stored as a JSON file mapping tile filename to a digest of the
+    data that was written to it and the size and modification time of the
+    file after it was written. Updates are kept in memory and the state file
+    is saved once after all tiles of an execution have been written. Tiles
+    whose files no longer exist are removed from the state when it is saved.
+
+    """
+
+    def __init__(self, state_filename: str):
+        """Load any existing state from ``state_filename``."""
+        self.state_filename = state_filename
+        self._lock = threading.Lock()
+        self._tiles = self._load()
+
+    @staticmethod
+    def get_state_filename(output_filename: str, sector_id: str | None) -> str:
+        """Get the state file used for tiles written next to ``output_filename``."""
+        return os.path.join(os.path.dirname(output_filename), f".awips_tile_state_{sector_id}.json")
+
+    def __dask_tokenize__(self):
+        return self.__class__.__name__, self.state_filename
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if not os.path.isfile(self.state_filename):
+            return {}
+        try:
+            with open(self.state_filename, "r") as state_file:
+                return json.load(state_file)
+        except (OSError, ValueError):
+            LOG.warning("Could not read tile state file %s, all tiles will be written", self.state_filename)
+            return {}
+
+    def is_unchanged(self, output_filename: str, tile_state: dict[str, Any]) -> bool:
+        """Check if the tile file already holds data matching ``tile_state``.
+
+        The file must also not have been modified since its state was
+        recorded, for example by writing to it without a tile state store.
+
+        """
+        tile_key = os.path.basename(output_filename)
+        with self._lock:
+            prev_state = self._tiles.get(tile_key)
+        if prev_state is None or prev_state.get("file_stat") != _get_file_stat(output_filename):
+            return False
+        return prev_state.get("digest") == tile_state["digest"]
+
+    def update(self, output_filename: str, tile_state: dict[str, Any]) -> None:
+        """Record the data written to a tile and the state of the written file."""
+        tile_key = os.path.basename(output_filename)
+        tile_state = {**tile_state, "file_stat": _get_file_stat(output_filename)}
+        with self._lock:
+            self._tiles[tile_key] = tile_state
+
+    def save(self) -> None:
+        """Save the state of every tile to the state file."""
+        state_dir = os.path.dirname(self.state_filename)
+        with self._lock:
+            self._tiles = {
+                tile_key: tile_state
+                for tile_key, tile_state in self._tiles.items()
+                if os.path.isfile(os.path.join(state_dir, tile_key))
+            }
+            tmp_filename = self.state_filename + ".tmp"
+            with open(tmp_filename, "w") as state_file:
+                json.dump(self._tiles, state_file)
+            os.replace(tmp_filename, self.state_filename)
+
+
+def _get_file_stat(filename: str) -> list[int] | None:
+    """Get the size and modification time of a file or None if it doesn't exist."""
+    try:
+        file_stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return [file_stat.st_size, file_stat.st_mtime_ns]
+
+
+def _all_invalid_float_tiles(tile_arrays: list[np.ndarray]) -> bool:
+    """Check if every tile array is floating point and contains only NaNs.
+
+    Integer (category) products are left to the final check on the rendered
+    tile since their fill value may be defined by the template.
+
+    """
+    for tile_arr in tile_arrays:
+        if not np.issubdtype(tile_arr.dtype, np.floating):
+            return False
+        if not np.isnan(tile_arr).all():
+            return False
+    return True
+
+
+class _TileProcessPool:
+    """Pool of processes writing the tiles of one call to ``save_datasets``.
+
+    The processes are only started once the first tile is submitted so a
+    task graph that is never computed doesn't leave idle processes behind.
+
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def __dask_tokenize__(self):
+        return self.__class__.__name__, id(self)
+
+    def submit(self, *args) -> Future:
+        with self._lock:
+            if self._executor is None:
+                # don't fork a process that is running dask worker threads
+                mp_context = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp_context)
+            return self._executor.submit(*args)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
 def add_writer_argument_groups(parser, group=None):
     import argparse
 
@@ -108,6 +611,13 @@ def add_writer_argument_groups(parser, group=None):
     # group_1.add_argument('--file-pattern', default=DEFAULT_OUTPUT_PATTERN,
     #                      help="Custom file pattern to save dataset to")
     group.add_argument("--compress", action="store_true", help="zlib compress each netcdf file")
+    group.add_argument(
+        "--tile-workers",
+        type=int,
+        default=0,
+        help="Number of separate processes used to compress and write tiles "
+        "concurrently. By default (0) tiles are written by the main processing threads.",
+    )
     # help="modify NetCDF output to work with the old/broken AWIPS NetCDF library")
     group.add_argument(
         "--output-filename",
@@ -148,6 +658,12 @@ def add_writer_argument_groups(parser, group=None):
         default=None,
         help="Specify how many pixels are in each tile (overrides '--tiles')",
     )
+    group.add_argument(
+        "--incremental-tiles",
+        action="store_true",
+        help="Keep track of the data written to each tile and only rewrite tiles "
+        "whose data has changed. Most useful with '--letters --use-sector-reference'.",
+    )
     group.add_argument(
         "--letters",
         dest="lettered_grid",
@@ -48,10 +48,10 @@ import dask.array as da
 import numpy as np
 import xarray as xr
 from satpy.writers.core.image import ImageWriter
-from satpy.enhancements.enhancer import get_enhanced_image
 
 from polar2grid.core.dtype import NUMPY_DTYPE_STRS, clip_to_data_type, dtype_to_str, int_or_float, str_to_dtype
 from polar2grid.core.script_utils import NumpyDtypeList
+from polar2grid.enhancements.image_cache import get_enhanced_image
 from polar2grid.utils.legacy_compat import convert_p2g_pattern_to_satpy
 
 logger = logging.getLogger(__name__)
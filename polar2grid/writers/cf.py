@@ -25,13 +25,26 @@
 All datasets to be saved must have the same projection coordinates ``x`` and ``y``. If a scene holds datasets with
 different grids, the CF compliant workaround is to save the datasets to separate files.
 
+Longitude and latitude coordinates requested with ``--include-lonlats`` are
+read from Polar2Grid's lon/lat cache (see :mod:`polar2grid.grids.lonlat_cache`)
+for gridded data instead of being recomputed for every file.
+
 """
 
 import json
 import logging
 
+import xarray as xr
+from pyresample.geometry import AreaDefinition
+from satpy.writers.cf_writer import CFWriter as _SatpyCFWriter
+
+from polar2grid.grids.lonlat_cache import get_cached_lonlats
+
 LOG = logging.getLogger(__name__)
 
+# all products are written to the same file(s) so they can't be delivered one at a time
+MULTI_PRODUCT_FILES = True
+
 # reader_name -> filename
 DEFAULT_OUTPUT_FILENAMES = {
     "polar2grid": {
@@ -43,6 +56,43 @@ DEFAULT_OUTPUT_FILENAMES = {
 }
 
 
+class CFWriter(_SatpyCFWriter):
+    """Satpy CF writer using cached longitude and latitude arrays for gridded data."""
+
+    def save_datasets(self, datasets, include_lonlats=True, **kwargs):
+        """Save the given datasets in one netCDF file.
+
+        See :meth:`satpy.writers.cf_writer.CFWriter.save_datasets` for
+        information on all keyword arguments.
+
+        """
+        if include_lonlats and all(isinstance(data_arr.attrs.get("area"), AreaDefinition) for data_arr in datasets):
+            datasets = [_add_cached_lonlat_coords(data_arr) for data_arr in datasets]
+            # coordinates are already included, don't let Satpy compute them again
+            include_lonlats = False
+        return super().save_datasets(datasets, include_lonlats=include_lonlats, **kwargs)
+
+
+def _add_cached_lonlat_coords(data_arr: xr.DataArray) -> xr.DataArray:
+    data_arr = data_arr.copy()
+    ignore_dims = {dim: 0 for dim in data_arr.dims if dim not in ["x", "y"]}
+    chunks = getattr(data_arr.isel(**ignore_dims), "chunks", None)
+    lons, lats = get_cached_lonlats(data_arr.attrs["area"], chunks=chunks)
+    data_arr["longitude"] = xr.DataArray(
+        lons,
+        dims=["y", "x"],
+        attrs={"name": "longitude", "standard_name": "longitude", "units": "degrees_east"},
+        name="longitude",
+    )
+    data_arr["latitude"] = xr.DataArray(
+        lats,
+        dims=["y", "x"],
+        attrs={"name": "latitude", "standard_name": "latitude", "units": "degrees_north"},
+        name="latitude",
+    )
+    return data_arr
+
+
 def add_writer_argument_groups(parser, group=None):
     if group is None:
         group = parser.add_argument_group(title="cf Writer")
@@ -37,15 +37,37 @@ By default the 'geotiff' writer will add an "Alpha" band to the file to mark
 any invalid or missing data pixels. This results in invalid pixels showing up
 as transparent in most image viewers.
 
+Overviews requested with ``--overviews`` using the "nearest" or "average"
+``--overviews-resampling`` methods are computed in the same dask processing
+as the full resolution image. They are stored in temporary memory-mapped files
+while the full resolution image is written and then copied to the overview
+levels of the output file with GDAL's python bindings (``osgeo``). Other
+resampling methods, the GDAL "COG" driver, or environments without the GDAL
+python bindings fall back to having GDAL build the overviews from the written
+full resolution image. In-graph overviews are stored in the file after the
+full resolution image so the file does not have the layout of a Cloud
+Optimized GeoTIFF. Use ``--gdal-driver COG`` for that.
+
 """
 
+from __future__ import annotations
+
 import argparse
 import logging
 import os
+import shutil
+import tempfile
+import threading
 from argparse import BooleanOptionalAction
 
+import dask.array as da
+import numpy as np
+from satpy.writers.core.compute import compute_writer_results
+from satpy.writers.geotiff import GeoTIFFWriter as _SatpyGeoTIFFWriter
+
 from polar2grid.core.dtype import NUMPY_DTYPE_STRS, int_or_float, str_to_dtype
 from polar2grid.core.script_utils import NumpyDtypeList
+from polar2grid.enhancements.image_cache import get_enhanced_image
 from polar2grid.utils.legacy_compat import convert_p2g_pattern_to_satpy
 
 LOG = logging.getLogger(__name__)
@@ -64,6 +86,252 @@ DEFAULT_OUTPUT_FILENAMES = {
 }
 
 
+IN_GRAPH_OVERVIEW_RESAMPLING = ("nearest", "average")
+
+
+class GeoTIFFWriter(_SatpyGeoTIFFWriter):
+    """Satpy GeoTIFF writer that computes overviews with the full resolution image.
+
+    Instead of having GDAL re-read the full resolution image after it has been
+    written, overview levels are produced from the same finalized dask array
+    using block-wise reductions. Empty overview levels are allocated in the
+    new file before any data is written. The computed overview data is
+    stored in temporary memory-mapped files and written to the overview
+    levels once the full resolution image has been written.
+
+    Enhanced images are created with
+    :func:`polar2grid.enhancements.image_cache.get_enhanced_image` so they can
+    be shared with other writers.
+
+    """
+
+    def save_dataset(
+        self,
+        dataset,
+        filename: str | None = None,
+        fill_value: int | float | None = None,
+        compute: bool = True,
+        units: str | None = None,
+        overlay: dict | None = None,
+        decorate: dict | None = None,
+        **kwargs,
+    ):
+        """Save the ``dataset`` to a given ``filename``."""
+        if units is not None:
+            import pint_xarray  # noqa
+
+            dataset = dataset.pint.quantify().pint.to(units).pint.dequantify()
+        img = get_enhanced_image(
+            dataset.squeeze(), enhance=self.enhancer, overlay=overlay, decorate=decorate, fill_value=fill_value
+        )
+        return self.save_image(img, filename=filename, compute=compute, fill_value=fill_value, **kwargs)
+
+    def save_image(
+        self,
+        img,
+        filename: str | None = None,
+        compute: bool = True,
+        overviews: list[int] | None = None,
+        overviews_minsize: int = 256,
+        overviews_resampling: str | None = None,
+        driver: str | None = None,
+        **kwargs,
+    ):
+        """Save the image to the given ``filename`` in geotiff format.
+
+        See :meth:`satpy.writers.geotiff.GeoTIFFWriter.save_image` for
+        information on all keyword arguments.
+
+        """
+        overviews_resampling = overviews_resampling or "nearest"
+        in_graph_overviews = (
+            overviews is not None
+            and overviews_resampling in IN_GRAPH_OVERVIEW_RESAMPLING
+            and driver in (None, "GTiff")
+            and _has_gdal_python()
+        )
+        if not in_graph_overviews:
+            return super().save_image(
+                img,
+                filename=filename,
+                compute=compute,
+                overviews=overviews,
+                overviews_minsize=overviews_minsize,
+                overviews_resampling=overviews_resampling,
+                driver=driver,
+                **kwargs,
+            )
+
+        sources, targets = super().save_image(img, filename=filename, compute=False, driver=driver, **kwargs)
+        r_dataset = targets[0]
+        r_file = r_dataset.rfile
+        factors = _get_overview_factors(overviews, r_file.width, r_file.height, overviews_minsize)
+        if factors:
+            nodata = r_file.kwargs.get("nodata")
+            overview_sources = [
+                _downsample_image(sources[0], factor, overviews_resampling, nodata) for factor in factors
+            ]
+            _allocate_overviews(r_file, factors)
+            in_graph_dataset = _InGraphOverviewsRIODataset(r_dataset, overview_sources)
+            targets[0] = in_graph_dataset
+            sources = sources + overview_sources
+            targets = targets + in_graph_dataset.overview_buffers
+        if compute:
+            return compute_writer_results([(sources, targets)])
+        return sources, targets
+
+
+def _has_gdal_python() -> bool:
+    try:
+        from osgeo import gdal  # noqa: F401
+    except ImportError:
+        LOG.debug("GDAL python bindings are not available, overviews will be built by GDAL after writing.")
+        return False
+    return True
+
+
+def _get_overview_factors(overviews: list, width: int, height: int, overviews_minsize: int) -> list[int]:
+    if len(overviews) == 0:
+        from rasterio.rio.overview import get_maximum_overview_level
+
+        max_level = get_maximum_overview_level(width, height, overviews_minsize)
+        return [2**j for j in range(1, max_level + 1)]
+    return sorted({int(factor) for factor in overviews})
+
+
+def _allocate_overviews(r_file, factors: list[int]) -> None:
+    """Create empty overview levels in a file that has no data written to it yet.
+
+    GDAL doesn't have to read any data for this since none of the full
+    resolution blocks exist in the file yet.
+
+    """
+    from rasterio.enums import Resampling
+
+    r_file.build_overviews(factors, resampling=Resampling.nearest)
+
+
+def _downsample_image(data: da.Array, factor: int, resampling: str, nodata: int | float | None) -> da.Array:
+    """Reduce a ``(bands, y, x)`` image by ``factor`` matching GDAL overview sizes."""
+    out_height = -(-data.shape[1] // factor)
+    out_width = -(-data.shape[2] // factor)
+    if resampling == "nearest":
+        # center pixel of each factor x factor block, clipped to the image
+        y_idx = np.minimum(np.arange(out_height) * factor + factor // 2, data.shape[1] - 1)
+        x_idx = np.minimum(np.arange(out_width) * factor + factor // 2, data.shape[2] - 1)
+        return data[:, y_idx][:, :, x_idx]
+
+    float_data = data.astype(np.float64)
+    if nodata is not None and not np.isnan(nodata):
+        float_data = da.where(float_data == nodata, np.nan, float_data)
+    pad_y = out_height * factor - data.shape[1]
+    pad_x = out_width * factor - data.shape[2]
+    if pad_y or pad_x:
+        float_data = da.pad(float_data, ((0, 0), (0, pad_y), (0, pad_x)), constant_values=np.nan)
+    averaged = da.coarsen(_nanmean_quiet, float_data, {1: factor, 2: factor})
+    fill = np.nan if nodata is None else nodata
+    if np.issubdtype(data.dtype, np.integer):
+        averaged = da.round(averaged)
+        if nodata is None:
+            fill = 0
+    averaged = da.where(np.isnan(averaged), fill, averaged)
+    return averaged.astype(data.dtype)
+
+
+def _nanmean_quiet(data: np.ndarray, axis=None) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        data_sum = np.nansum(data, axis=axis)
+        data_count = np.count_nonzero(~np.isnan(data), axis=axis)
+        return data_sum / data_count
+
+
+class _InGraphOverviewsRIODataset:
+    """Wrap a trollimage RIODataset to write computed overviews after the full resolution image.
+
+    The overview data is stored in temporary memory-mapped files while the
+    full resolution image is being written so it doesn't have to be kept in
+    memory. GDAL can't write to overview levels through rasterio or while
+    the file is open for writing the full resolution image, so the overviews
+    are copied to the file with GDAL's band API once it is closed. The
+    temporary directory is only created once overview data is computed.
+
+    """
+
+    rows_per_write = 1024
+
+    def __init__(self, r_dataset, overview_sources: list[da.Array]):
+        self.r_dataset = r_dataset
+        self._tmp_dir: str | None = None
+        self._tmp_dir_lock = threading.Lock()
+        self.overview_buffers = [
+            _OverviewBuffer(self, f"overview_{level}.npy", ov_src.dtype, ov_src.shape)
+            for level, ov_src in enumerate(overview_sources)
+        ]
+
+    def get_buffer_path(self, buffer_name: str) -> str:
+        """Get the path of a temporary overview file creating the temporary directory if needed."""
+        with self._tmp_dir_lock:
+            if self._tmp_dir is None:
+                self._tmp_dir = tempfile.mkdtemp(prefix="p2g_overviews_")
+            return os.path.join(self._tmp_dir, buffer_name)
+
+    def __setitem__(self, key, item):
+        self.r_dataset[key] = item
+
+    def close(self):
+        from osgeo import gdal
+
+        path = self.r_dataset.rfile.path
+        self.r_dataset.close()
+        try:
+            gdal_ds = gdal.Open(path, gdal.GA_Update)
+            for overview_level, overview_buffer in enumerate(self.overview_buffers):
+                overview_data = overview_buffer.flush()
+                for band_idx in range(overview_data.shape[0]):
+                    ov_band = gdal_ds.GetRasterBand(band_idx + 1).GetOverview(overview_level)
+                    for row_start in range(0, overview_data.shape[1], self.rows_per_write):
+                        rows = overview_data[band_idx, row_start : row_start + self.rows_per_write]
+                        ov_band.WriteArray(np.asarray(rows), 0, row_start)
+            gdal_ds.FlushCache()
+            del gdal_ds
+        finally:
+            self.overview_buffers = []
+            if self._tmp_dir is not None:
+                shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+class _OverviewBuffer:
+    """Temporary memory-mapped file for one overview level that is created on the first write."""
+
+    def __init__(self, in_graph_dataset: _InGraphOverviewsRIODataset, buffer_name: str, dtype, shape: tuple):
+        self._in_graph_dataset = in_graph_dataset
+        self._buffer_name = buffer_name
+        self.dtype = np.dtype(dtype)
+        self.shape = shape
+        self._memmap: np.memmap | None = None
+        self._lock = threading.Lock()
+
+    def _get_memmap(self) -> np.memmap:
+        with self._lock:
+            if self._memmap is None:
+                self._memmap = np.lib.format.open_memmap(
+                    self._in_graph_dataset.get_buffer_path(self._buffer_name),
+                    mode="w+",
+                    dtype=self.dtype,
+                    shape=self.shape,
+                )
+            return self._memmap
+
+    def __setitem__(self, key, item):
+        self._get_memmap()[key] = item
+
+    def flush(self) -> np.memmap:
+        """Write any pending changes to the temporary file and get the overview data."""
+        memmap = self._get_memmap()
+        memmap.flush()
+        return memmap
+
+
 def add_writer_argument_groups(parser, group=None):
     from argparse import SUPPRESS
 
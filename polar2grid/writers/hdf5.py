@@ -54,12 +54,16 @@ from pyresample.geometry import SwathDefinition
 from satpy.writers.core.base import Writer
 from satpy.writers.core.compute import compute_writer_results, split_results
 
+from polar2grid.grids.lonlat_cache import get_cached_lonlats
 from polar2grid.utils.legacy_compat import convert_p2g_pattern_to_satpy
 from polar2grid.utils.warnings import ignore_pyproj_proj_warnings
 from polar2grid.writers.geotiff import NUMPY_DTYPE_STRS, NumpyDtypeList, str_to_dtype
 
 LOG = logging.getLogger(__name__)
 
+# all products are written to the same file(s) so they can't be delivered one at a time
+MULTI_PRODUCT_FILES = True
+
 # reader_name -> filename
 DEFAULT_OUTPUT_FILENAMES = {
     "polar2grid": {
@@ -76,6 +80,28 @@ def all_equal(iterable: list[str]) -> bool:
     return all(iterable[0] == item for item in iterable[1:])
 
 
+def get_proj_attrs(area_def) -> dict:
+    """Get attributes describing the projection of a grid or swath."""
+    attrs = {}
+    if isinstance(area_def, SwathDefinition):
+        attrs["height"], attrs["width"] = area_def.shape
+        attrs["description"] = "No projection: native format"
+        return attrs
+
+    with ignore_pyproj_proj_warnings():
+        attrs["proj4_definition"] = area_def.crs.to_string()
+    for a in ["height", "width"]:
+        ds_attr = getattr(area_def, a, None)
+        if ds_attr is not None:
+            attrs[a] = ds_attr
+
+    attrs["cell_height"] = np.round(-area_def.pixel_size_y, 5)
+    attrs["cell_width"] = np.round(area_def.pixel_size_x, 5)
+    attrs["origin_x"] = area_def.pixel_upper_left[0]
+    attrs["origin_y"] = area_def.pixel_upper_left[1]
+    return attrs
+
+
 class FakeHDF5:
     """Use fake hdf class to create targets for da.store and delayed sources."""
 
@@ -162,24 +188,7 @@ class HDF5Writer(Writer):
         # create top group for first time
         group = parent.create_group(projection_name)
         # add attributes from grid_defintion.
-        if isinstance(area_def, SwathDefinition):
-            group.attrs["height"], group.attrs["width"] = area_def.shape
-            group.attrs["description"] = "No projection: native format"
-        else:
-            with ignore_pyproj_proj_warnings():
-                group.attrs["proj4_definition"] = area_def.crs.to_string()
-            for a in ["height", "width"]:
-                ds_attr = getattr(area_def, a, None)
-                if ds_attr is None:
-                    pass
-                else:
-                    group.attrs[a] = ds_attr
-
-            group.attrs["cell_height"] = np.round(-area_def.pixel_size_y, 5)
-            group.attrs["cell_width"] = np.round(area_def.pixel_size_x, 5)
-            group.attrs["origin_x"] = area_def.pixel_upper_left[0]
-            group.attrs["origin_y"] = area_def.pixel_upper_left[1]
-
+        group.attrs.update(get_proj_attrs(area_def))
         return projection_name
 
     def write_geolocation(
@@ -188,7 +197,7 @@ class HDF5Writer(Writer):
         """Delayed Geolocation Data write."""
         msg = ("Adding geolocation 'longitude' and 'latitude' datasets for grid %s", parent)
         LOG.info(msg)
-        lon_data, lat_data = area_def.get_lonlats(chunks=chunks)
+        lon_data, lat_data = get_cached_lonlats(area_def, chunks=chunks)
 
         dtype = lon_data.dtype if dtype is None else dtype
         data_shape = lon_data.shape
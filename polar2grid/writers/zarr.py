@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+# Copyright (C) 2026 Space Science and Engineering Center (SSEC),
+#  University of Wisconsin-Madison.
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# This file is part of the polar2grid software package. Polar2grid takes
+# satellite observation data, remaps it, and writes it to a file format for
+# input into another program.
+# Documentation: http://www.ssec.wisc.edu/software/polar2grid/
+"""The Zarr writer creates chunked Zarr stores with groups for each gridded area.
+
+All selected products are written to one Zarr store (a directory). Like the
+HDF5 writer, products are subgrouped under a parent group for each grid
+(projection group) which holds attributes describing the projection. Each
+product array has attributes for the platform, instrument, and observation
+times.
+
+The chunks of each Zarr array match the dask chunks of the data being
+written (data appended to an existing array is rechunked to the array's
+chunks) so every chunk can be written by a separate worker at the same time
+without any locking. This also means that readers of the store can load
+individual chunks without reading the rest of the array.
+
+By specifying ``--append-time`` every product array gets a leading ``time``
+dimension and each execution writing to the same store adds a new time step.
+The observation start time of each step is stored in a ``time`` array in each
+projection group. Data with the start time of an existing time step replaces
+that time step. When appending, an ``--output-filename`` without any time
+information should be used so that the same store is written to each time.
+
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import logging
+
+import dask.array as da
+import numpy as np
+import xarray as xr
+from satpy.writers.core.base import Writer
+from satpy.writers.core.compute import compute_writer_results
+
+from polar2grid.utils.legacy_compat import convert_p2g_pattern_to_satpy
+from polar2grid.writers.geotiff import NUMPY_DTYPE_STRS, NumpyDtypeList, str_to_dtype
+from polar2grid.writers.hdf5 import get_proj_attrs
+
+LOG = logging.getLogger(__name__)
+
+# all products are written to the same file(s) so they can't be delivered one at a time
+MULTI_PRODUCT_FILES = True
+
+# reader_name -> filename
+DEFAULT_OUTPUT_FILENAMES = {
+    "polar2grid": {
+        None: "{platform_name}_{sensor}_{start_time:%Y%m%d_%H%M%S}.zarr",
+    },
+    "geo2grid": {
+        None: "{platform_name}_{sensor}_{start_time:%Y%m%d_%H%M%S}.zarr",
+    },
+}
+
+TIME_UNITS = "seconds since 1970-01-01 00:00:00"
+_EPOCH = dt.datetime(1970, 1, 1)
+
+
+class ZarrWriter(Writer):
+    """Writer for chunked Zarr stores."""
+
+    def __init__(self, **kwargs):
+        """Init the writer."""
+        super().__init__(**kwargs)
+
+        if self.filename_parser is None:
+            raise RuntimeError("No filename pattern or specific filename provided")
+
+    def save_datasets(
+        self,
+        datasets: list[xr.DataArray],
+        filename: str | None = None,
+        dtype: np.dtype | None = None,
+        compression: str = "zstd",
+        append_time: bool = False,
+        compute: bool = True,
+        **kwargs,
+    ):
+        """Save DataArrays to a single Zarr store.
+
+        Array metadata (groups, array shapes, and attributes) is created
+        immediately. The returned dask ``Delayed`` objects write the array
+        chunks without any locking.
+
+        """
+        import zarr
+
+        output_names = [filename or self.get_filename(**data_arr.attrs) for data_arr in datasets]
+        filename = output_names[0]
+        if any(output_name != filename for output_name in output_names[1:]):
+            LOG.warning("More than one output filename possible. Writing to only '%s'.", filename)
+
+        LOG.info("Writing Zarr store: %s", filename)
+        root = zarr.open_group(filename, mode="a")
+        compressors = _get_compressors(compression)
+        delayeds = []
+        for area, data_arrs in _group_by_area(datasets).items():
+            proj_group = _create_proj_group(root, area)
+            time_index = _append_time_step(proj_group, data_arrs) if append_time else None
+            for data_arr in data_arrs:
+                data = _get_zarr_aligned_data(data_arr, dtype)
+                zarr_arr = _create_or_extend_array(proj_group, data_arr, data, time_index, compressors)
+                # every dask chunk must write to exactly one Zarr chunk to not need a lock
+                data = data.rechunk(zarr_arr.chunks[-2:])
+                region = (slice(None), slice(None)) if time_index is None else (time_index, slice(None), slice(None))
+                target = _ZarrRegion(zarr_arr, region)
+                delayeds.append(da.store(data, target, lock=False, compute=False))
+
+        if compute:
+            LOG.info("Computing and writing results...")
+            return compute_writer_results([delayeds])
+        return delayeds
+
+
+class _ZarrRegion:
+    """Write dask chunks to a region of a Zarr array."""
+
+    def __init__(self, zarr_arr, region: tuple):
+        self.zarr_arr = zarr_arr
+        self.region = region
+
+    def __setitem__(self, key, value):
+        if len(self.region) == 3:
+            key = (self.region[0],) + key
+        self.zarr_arr[key] = value
+
+
+def _group_by_area(datasets: list[xr.DataArray]) -> dict:
+    datasets_by_area = {}
+    for data_arr in datasets:
+        datasets_by_area.setdefault(data_arr.attrs["area"], []).append(data_arr)
+    return datasets_by_area
+
+
+def _get_compressors(compression: str) -> tuple | None:
+    from zarr.codecs import GzipCodec, ZstdCodec
+
+    if compression == "none":
+        return None
+    if compression == "gzip":
+        return (GzipCodec(),)
+    return (ZstdCodec(),)
+
+
+def _create_proj_group(root, area_def):
+    projection_name = area_def.area_id.replace(" ", "_")
+    if projection_name in root:
+        return root[projection_name]
+    group = root.create_group(projection_name)
+    group.attrs.update(_to_json_attrs(get_proj_attrs(area_def)))
+    return group
+
+
+def _to_json_attrs(attrs: dict) -> dict:
+    return {key: val.item() if isinstance(val, np.generic) else val for key, val in attrs.items()}
+
+
+def _append_time_step(proj_group, data_arrs: list[xr.DataArray]) -> int:
+    """Add the start time of the data as a new step of the group's time array."""
+    start_time = min(data_arr.attrs["start_time"] for data_arr in data_arrs).replace(tzinfo=None)
+    time_value = (start_time - _EPOCH).total_seconds()
+    if "time" not in proj_group:
+        time_arr = proj_group.create_array(
+            "time", shape=(0,), chunks=(1024,), dtype=np.float64, dimension_names=["time"]
+        )
+        time_arr.attrs.update({"units": TIME_UNITS, "standard_name": "time"})
+    time_arr = proj_group["time"]
+    existing_indexes = np.flatnonzero(time_arr[:] == time_value)
+    if existing_indexes.size:
+        LOG.info("Replacing existing time step %s in Zarr group", start_time)
+        return int(existing_indexes[0])
+    time_index = time_arr.shape[0]
+    time_arr.resize((time_index + 1,))
+    time_arr[time_index] = time_value
+    # products missing from this time step are filled
+    for _, zarr_arr in proj_group.arrays():
+        if zarr_arr.ndim == 3:
+            zarr_arr.resize((time_index + 1,) + zarr_arr.shape[1:])
+    return time_index
+
+
+def _get_zarr_aligned_data(data_arr: xr.DataArray, dtype: np.dtype | None) -> da.Array:
+    """Get dask data whose chunks can be mapped one-to-one on to Zarr chunks.
+
+    Zarr requires all chunks of an array to be the same size except for the
+    last chunk of each dimension.
+
+    """
+    data = data_arr.data
+    if not isinstance(data, da.Array):
+        data = da.from_array(data, chunks="auto")
+    if dtype is not None:
+        data = data.astype(dtype)
+    if not all(_is_regular_dim_chunks(dim_chunks) for dim_chunks in data.chunks):
+        data = data.rechunk(data.chunksize)
+    return data
+
+
+def _is_regular_dim_chunks(dim_chunks: tuple[int, ...]) -> bool:
+    return all(chunk == dim_chunks[0] for chunk in dim_chunks[:-1]) and dim_chunks[-1] <= dim_chunks[0]
+
+
+def _create_or_extend_array(proj_group, data_arr: xr.DataArray, data: da.Array, time_index, compressors):
+    var_name = data_arr.attrs.get("p2g_name", data_arr.attrs["name"])
+    fill_value = _get_fill_value(data_arr, data.dtype)
+    if time_index is None:
+        if var_name in proj_group:
+            LOG.warning("Product %s already in Zarr group, will overwrite existing array", var_name)
+        zarr_arr = proj_group.create_array(
+            var_name,
+            shape=data.shape,
+            chunks=data.chunksize,
+            dtype=data.dtype,
+            fill_value=fill_value,
+            compressors=compressors,
+            dimension_names=["y", "x"],
+            overwrite=True,
+        )
+        zarr_arr.attrs["begin_time"] = data_arr.attrs["start_time"].isoformat()
+        zarr_arr.attrs["end_time"] = data_arr.attrs["end_time"].isoformat()
+    elif var_name not in proj_group:
+        zarr_arr = proj_group.create_array(
+            var_name,
+            shape=(time_index + 1,) + data.shape,
+            chunks=(1,) + data.chunksize,
+            dtype=data.dtype,
+            fill_value=fill_value,
+            compressors=compressors,
+            dimension_names=["time", "y", "x"],
+        )
+    else:
+        zarr_arr = proj_group[var_name]
+        if zarr_arr.shape[1:] != data.shape:
+            raise ValueError(
+                f"Can't append {var_name} with shape {data.shape} to existing array with shape {zarr_arr.shape[1:]}"
+            )
+        if zarr_arr.shape[0] <= time_index:
+            zarr_arr.resize((time_index + 1,) + data.shape)
+    zarr_arr.attrs["satellite"] = data_arr.attrs["platform_name"]
+    zarr_arr.attrs["instrument"] = _get_instrument_name(data_arr.attrs["sensor"])
+    return zarr_arr
+
+
+def _get_instrument_name(sensor) -> str:
+    """Get a JSON serializable instrument name for single or multi-sensor products."""
+    if isinstance(sensor, str):
+        return sensor
+    return "-".join(sorted(sensor))
+
+
+def _get_fill_value(data_arr: xr.DataArray, dtype: np.dtype):
+    """Get the product's fill value in the output data type.
+
+    Integer products without a ``_FillValue`` use Zarr's default fill value.
+
+    """
+    fill_value = data_arr.attrs.get("_FillValue")
+    if fill_value is None or np.isnan(fill_value):
+        return np.nan if np.issubdtype(dtype, np.floating) else None
+    return np.array(fill_value).astype(dtype).item()
+
+
+def add_writer_argument_groups(parser, group=None):
+    """Create writer argument groups."""
+    if group is None:
+        group = parser.add_argument_group(title="Zarr Writer")
+    group.add_argument(
+        "--output-filename",
+        dest="filename",
+        type=convert_p2g_pattern_to_satpy,
+        help="Custom file pattern to save dataset to",
+    )
+    group.add_argument(
+        "--dtype",
+        choices=NumpyDtypeList(NUMPY_DTYPE_STRS),
+        type=str_to_dtype,
+        help="Data type of the output arrays. Defaults to the data type of each product.",
+    )
+    group.add_argument(
+        "--compress",
+        dest="compression",
+        choices=["none", "zstd", "gzip"],
+        default="zstd",
+        help="Chunk compression algorithm. Defaults to 'zstd'.",
+    )
+    group.add_argument(
+        "--append-time",
+        action="store_true",
+        help="Add a leading 'time' dimension to every product and append the "
+        "current data as a new time step if the Zarr store already exists.",
+    )
+    return group, None